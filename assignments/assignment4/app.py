@@ -8,17 +8,35 @@ Date: [Current Date]
 """
 
 import sqlite3
+import argparse
+import contextlib
+import json
 import os
 import sys
+from itertools import chain
 from db_operations import DatabaseOperations
 from helper import Helper
+from batch import BatchRunner, read_command_file
+from parallel_ingest import expand_song_files, is_file_pattern, parallel_load_files
+from replica import InMemoryReplica
+from query_stats import DEFAULT_SLOW_QUERY_MS, format_report
 
 class PlaylistApp:
     """Main application class for the playlist management system."""
     
-    def __init__(self):
-        """Initialize the application with database connection."""
-        self.db_ops = DatabaseOperations()
+    def __init__(self, db_path: str = "playlist.db", replica: bool = False, **db_options):
+        """
+        Initialize the application with database connection.
+        
+        Args:
+            db_path: SQLite database file
+            replica: Serve reads from an in-memory copy of the database
+                (writes still go to the file)
+            db_options: Extra DatabaseOperations options (e.g. instrument=True)
+        """
+        db_class = InMemoryReplica if replica else DatabaseOperations
+        self.db_ops = db_class(db_path, full_text_search=True, cache_size=1024,
+                               **db_options)
         self.helper = Helper()
         self.db_ops.create_table()
     
@@ -34,20 +52,28 @@ class PlaylistApp:
         print("5. Delete a song")
         print("6. Bulk update songs")
         print("7. Remove songs with NULL values")
-        print("8. Exit")
+        print("8. Find similar songs")
+        print("9. Exit")
         print("="*50)
     
     def load_new_songs(self):
-        """Load new songs from a CSV file with duplicate checking."""
+        """Load new songs from a CSV file, directory or glob with duplicate checking."""
         print("\n--- Load New Songs ---")
-        file_path = input("Enter the path to the CSV file: ").strip()
+        file_path = input("Enter the path to the CSV file (or a directory / glob pattern): ").strip()
         
-        if not os.path.exists(file_path):
+        if is_file_pattern(file_path):
+            if not expand_song_files(file_path):
+                print("Error: No CSV files found!")
+                return
+        elif not os.path.exists(file_path):
             print("Error: File not found!")
             return
         
         try:
-            songs_loaded, duplicates_skipped = self.db_ops.bulk_load_songs(file_path)
+            if is_file_pattern(file_path):
+                songs_loaded, duplicates_skipped = parallel_load_files(self.db_ops, file_path)
+            else:
+                songs_loaded, duplicates_skipped = self.db_ops.bulk_load_songs(file_path)
             print(f"Successfully loaded {songs_loaded} new songs.")
             if duplicates_skipped > 0:
                 print(f"Skipped {duplicates_skipped} duplicate songs.")
@@ -57,12 +83,13 @@ class PlaylistApp:
     def display_all_songs(self):
         """Display all songs in the database."""
         print("\n--- All Songs ---")
-        songs = self.db_ops.get_all_songs()
-        if not songs:
+        songs = self.db_ops.iter_songs()
+        first_song = next(songs, None)
+        if first_song is None:
             print("No songs found in the database.")
             return
         
-        self.helper.display_songs_table(songs)
+        self.helper.display_songs_table(chain([first_song], songs))
     
     def search_songs(self):
         """Search for songs by name."""
@@ -73,13 +100,24 @@ class PlaylistApp:
             print("Please enter a valid song name.")
             return
         
-        songs = self.db_ops.search_songs_by_name(song_name)
+        songs = self.find_songs_by_name(song_name)
         if not songs:
             print("No songs found matching that name.")
             return
         
         self.helper.display_songs_table(songs)
     
+    def find_songs_by_name(self, song_name: str):
+        """Search songs by name, falling back to a typo-tolerant search."""
+        songs = self.db_ops.search_songs_by_name(song_name)
+        if songs:
+            return songs
+        
+        matches = self.db_ops.fuzzy_search_songs(song_name)
+        if matches:
+            print(f"No exact matches for '{song_name}'. Showing closest names:")
+        return [song for song, _ in matches]
+    
     def update_song(self):
         """Update information for a specific song."""
         print("\n--- Update Song Information ---")
@@ -90,7 +128,7 @@ class PlaylistApp:
             return
         
         # Find the song
-        songs = self.db_ops.search_songs_by_name(song_name)
+        songs = self.find_songs_by_name(song_name)
         if not songs:
             print("No song found with that name.")
             return
@@ -100,7 +138,7 @@ class PlaylistApp:
             self.helper.display_songs_table(songs)
             song_id = input("Enter the song ID to update: ").strip()
         else:
-            song_id = songs[0][0]  # songID is the first column
+            song_id = songs[0].songID
         
         # Display current song information
         song = self.db_ops.get_song_by_id(song_id)
@@ -155,7 +193,7 @@ class PlaylistApp:
             self.helper.display_songs_table(songs)
             song_id = input("Enter the song ID to delete: ").strip()
         else:
-            song_id = songs[0][0]  # songID is the first column
+            song_id = songs[0].songID
         
         # Confirm deletion
         song = self.db_ops.get_song_by_id(song_id)
@@ -204,14 +242,13 @@ class PlaylistApp:
             print("Please enter a valid search value.")
             return
         
-        # Find matching songs
-        songs = self.db_ops.search_songs_by_criteria(search_type, search_value)
-        if not songs:
+        # Preview how many songs match without fetching them
+        match_count = self.db_ops.count_songs_by_criteria(search_type, search_value)
+        if not match_count:
             print(f"No songs found matching {search_type}: {search_value}")
             return
         
-        print(f"\nFound {len(songs)} songs matching {search_type}: {search_value}")
-        self.helper.display_songs_table(songs)
+        print(f"\nFound {match_count} songs matching {search_type}: {search_value}")
         
         # Get update choice
         print("\nWhat would you like to update?")
@@ -229,8 +266,10 @@ class PlaylistApp:
         
         if update_choice in ["1", "2", "3", "4", "5"]:
             new_value = input("Enter the new value: ").strip()
-            if self.db_ops.bulk_update_songs(songs, update_choice, new_value):
-                print(f"Successfully updated {len(songs)} songs!")
+            updated = self.db_ops.bulk_update_by_criteria(search_type, search_value,
+                                                          update_choice, new_value)
+            if updated:
+                print(f"Successfully updated {updated} songs!")
             else:
                 print("Error updating songs.")
         else:
@@ -240,32 +279,73 @@ class PlaylistApp:
         """Remove all songs that have at least one NULL value."""
         print("\n--- Remove Songs with NULL Values ---")
         
-        # Get songs with NULL values
-        null_songs = self.db_ops.get_songs_with_null_values()
-        if not null_songs:
+        # Count songs with NULL values from the missing-field index
+        null_count = self.db_ops.count_songs_with_null_values()
+        if not null_count:
             print("No songs with NULL values found.")
             return
         
-        print(f"Found {len(null_songs)} songs with NULL values:")
-        self.helper.display_songs_table(null_songs)
+        print(f"Found {null_count} songs with NULL values.")
+        print("Missing fields:")
+        for field, count in self.db_ops.get_missing_field_counts():
+            print(f"  {field:15}: {count}")
         
-        confirm = input(f"\nAre you sure you want to delete {len(null_songs)} songs? Type 'yes' to confirm: ").strip().lower()
+        preview_limit = 20
+        print(f"\nFirst {min(null_count, preview_limit)} songs:")
+        self.helper.display_songs_table(self.db_ops.get_songs_with_null_values(limit=preview_limit))
+        
+        confirm = input(f"\nAre you sure you want to delete {null_count} songs? Type 'yes' to confirm: ").strip().lower()
         
         if confirm == 'yes':
-            if self.db_ops.delete_songs_with_null_values():
-                print(f"Successfully deleted {len(null_songs)} songs with NULL values!")
+            deleted = self.db_ops.delete_songs_with_null_values()
+            if deleted:
+                print(f"Successfully deleted {deleted} songs with NULL values!")
             else:
                 print("Error deleting songs.")
         else:
             print("Deletion cancelled.")
     
+    def find_similar_songs(self):
+        """Show the songs whose audio features are closest to a chosen song."""
+        print("\n--- Find Similar Songs ---")
+        song_name = input("Enter the name of the song: ").strip()
+        
+        if not song_name:
+            print("Please enter a valid song name.")
+            return
+        
+        songs = self.find_songs_by_name(song_name)
+        if not songs:
+            print("No song found with that name.")
+            return
+        
+        if len(songs) > 1:
+            print("Multiple songs found with that name:")
+            self.helper.display_songs_table(songs)
+            song_id = input("Enter the song ID: ").strip()
+        else:
+            song_id = songs[0].songID
+        
+        try:
+            matches = self.db_ops.find_similar_songs(song_id)
+        except ImportError as e:
+            print(f"Error: {e}")
+            return
+        
+        if not matches:
+            print("No similar songs found.")
+            return
+        
+        print("\nSongs with the most similar audio features:")
+        self.helper.display_songs_table([song for song, _ in matches])
+    
     def run(self):
         """Main application loop."""
         print("Welcome to the Playlist Management System!")
         
         while True:
             self.display_menu()
-            choice = input("Enter your choice (1-8): ").strip()
+            choice = input("Enter your choice (1-9): ").strip()
             
             if choice == "1":
                 self.load_new_songs()
@@ -282,23 +362,110 @@ class PlaylistApp:
             elif choice == "7":
                 self.remove_null_songs()
             elif choice == "8":
+                self.find_similar_songs()
+            elif choice == "9":
                 print("Thank you for using the Playlist Management System!")
                 break
             else:
-                print("Invalid choice. Please enter a number between 1-8.")
+                print("Invalid choice. Please enter a number between 1-9.")
             
             input("\nPress Enter to continue...")
 
+    def run_batch(self, commands, transaction: bool = False) -> int:
+        """
+        Run batch commands without prompting, writing JSONL results to stdout.
+        
+        Status messages printed by the database methods go to stderr so that
+        stdout holds only the JSON lines.
+        
+        Returns:
+            Number of failed commands
+        """
+        runner = BatchRunner(self.db_ops, output=sys.stdout)
+        with contextlib.redirect_stdout(sys.stderr):
+            return runner.run(commands, transaction=transaction)
+
+def parse_arguments():
+    """Parse the command line; no commands means the interactive menu."""
+    parser = argparse.ArgumentParser(
+        description="Playlist management system. Without commands, starts the interactive menu.",
+        epilog='Example: python app.py "load songs.csv" "purge-nulls" "export features/"')
+    parser.add_argument("commands", nargs="*",
+                        help="batch commands to run (see batch.py for the list)")
+    parser.add_argument("--file", help="read batch commands from a file, one per line ('-' for stdin)")
+    parser.add_argument("--transaction", action="store_true",
+                        help="run all commands in one transaction; any failure rolls them all back")
+    parser.add_argument("--db", default="playlist.db", help="SQLite database file")
+    parser.add_argument("--replica", action="store_true",
+                        help="serve searches from an in-memory copy of the database")
+    parser.add_argument("--feature-index", action="store_true",
+                        help="maintain the R*Tree index used by feature range searches "
+                             "(makes bulk loads slower)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time every query and capture query plans; the report is "
+                             "printed at exit (or written with --query-stats)")
+    parser.add_argument("--slow-query-ms", type=float, default=DEFAULT_SLOW_QUERY_MS,
+                        help="with --instrument, log statements slower than this (default: %(default)s)")
+    parser.add_argument("--slow-query-log", metavar="FILE",
+                        help="with --instrument, append slow queries to FILE as JSON lines")
+    parser.add_argument("--query-stats", metavar="FILE",
+                        help="write the instrumentation report to FILE as JSON (implies --instrument)")
+    return parser.parse_args()
+
+def database_options(args) -> dict:
+    """DatabaseOperations options selected on the command line."""
+    options = {"replica": True} if args.replica else {}
+    if args.feature_index:
+        options["feature_index"] = True
+    if args.instrument or args.query_stats:
+        options.update(instrument=True, slow_query_ms=args.slow_query_ms,
+                       slow_query_log=args.slow_query_log)
+    return options
+
+def dump_query_stats(app: PlaylistApp, args):
+    """Write the instrumentation report to --query-stats, or print it to stderr."""
+    report = app.db_ops.get_query_stats()
+    if not report or not report["methods"]:
+        return
+    if args.query_stats:
+        with open(args.query_stats, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print("\n".join(format_report(report)), file=sys.stderr)
+
+def run_batch_mode(args) -> int:
+    """Run the commands given on the command line or in --file; returns the exit status."""
+    commands = list(args.commands)
+    if args.file:
+        commands.extend(read_command_file(args.file))
+    
+    # Keep table-creation messages out of the JSONL output
+    with contextlib.redirect_stdout(sys.stderr):
+        app = PlaylistApp(args.db, **database_options(args))
+    try:
+        failed = app.run_batch(commands, transaction=args.transaction)
+        dump_query_stats(app, args)
+    finally:
+        app.db_ops.close()
+    return 1 if failed else 0
+
 def main():
     """Main entry point of the application."""
+    args = parse_arguments()
+    if args.commands or args.file:
+        sys.exit(run_batch_mode(args))
+    
+    app = None
     try:
-        app = PlaylistApp()
+        app = PlaylistApp(args.db, **database_options(args))
         app.run()
     except KeyboardInterrupt:
         print("\n\nApplication interrupted by user.")
     except Exception as e:
         print(f"An error occurred: {str(e)}")
     finally:
+        if app is not None:
+            dump_query_stats(app, args)
         print("Goodbye!")
 
 if __name__ == "__main__":
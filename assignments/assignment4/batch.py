@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Batch Mode
+Non-interactive command runner for the playlist management system.
+
+Commands come from the command line or a file, one per line, and run
+against a single DatabaseOperations connection. Every result is written to
+stdout as one JSON object per line, so the output can be piped or logged.
+
+Commands:
+    load PATH [--sync] [--full-snapshot] [--dedupe flag|merge] [--workers N]
+    import PATH [--reject-file FILE] [--restart]
+    search VALUE [--by name|artist|album|genre] [--fuzzy]
+    features COLUMN=LOW:HIGH [COLUMN=LOW:HIGH ...]
+    update SONG_ID FIELD VALUE
+    bulk-update album|artist|genre MATCH FIELD VALUE [--dry-run]
+    delete SONG_ID
+    purge-nulls [--dry-run]
+    export DIRECTORY [--full]
+    query-stats [--reset]
+    playlist create NAME
+    playlist add NAME SONG_ID [SONG_ID ...] [--before ENTRY_ID]
+    playlist show NAME [--limit N] [--after POSITION ENTRY_ID]
+    playlist move ENTRY_ID [--before ENTRY_ID]
+    playlist remove ENTRY_ID
+    playlist delete NAME
+
+FIELD is one of name, album, artist, release_date or explicit. A features
+COLUMN is a numeric column such as tempo or energy; either bound of a range
+may be left out (e.g. "features tempo=120:130 energy=0.7:"). A load PATH
+that is a directory or glob pattern loads every matching .csv file in
+parallel (see parallel_ingest.parallel_load_files()).
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import argparse
+import json
+import shlex
+import sys
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from db_operations import DEFAULT_PAGE_SIZE, BatchAborted, DatabaseOperations
+from parallel_ingest import is_file_pattern, parallel_load_files
+
+# Field names accepted by update commands -> update_song_field() choices
+UPDATE_FIELDS = {"name": "1", "album": "2", "artist": "3", "release_date": "4", "explicit": "5"}
+
+
+class CommandError(Exception):
+    """Raised for a command that cannot be parsed or did not succeed."""
+
+
+class CommandParser(argparse.ArgumentParser):
+    """ArgumentParser that raises CommandError instead of exiting."""
+
+    def error(self, message):
+        raise CommandError(message)
+
+
+def parse_feature_range(text: str) -> Tuple[str, Tuple[Optional[float], Optional[float]]]:
+    """Parse "COLUMN=LOW:HIGH" (either bound may be empty) into (column, (low, high))."""
+    column, _, bounds = text.partition("=")
+    low, separator, high = bounds.partition(":")
+    if not column or not separator:
+        raise argparse.ArgumentTypeError(f"expected COLUMN=LOW:HIGH, got '{text}'")
+    try:
+        return column, (float(low) if low else None, float(high) if high else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bounds must be numbers: '{text}'")
+
+
+def build_command_parser() -> CommandParser:
+    """Return the parser for a single batch command line."""
+    parser = CommandParser(prog="", add_help=False)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", add_help=False)
+    load.add_argument("path")
+    load.add_argument("--sync", action="store_true",
+                      help="upsert changed songs instead of skipping existing IDs")
+    load.add_argument("--full-snapshot", action="store_true",
+                      help="with --sync, delete songs missing from the file")
+    load.add_argument("--dedupe", choices=["flag", "merge"],
+                      help="catch re-releases stored under new song IDs")
+    load.add_argument("--workers", type=int,
+                      help="parser processes for a directory or glob PATH")
+
+    import_ = commands.add_parser("import", add_help=False)
+    import_.add_argument("path")
+    import_.add_argument("--reject-file", help="CSV file for rows that cannot be loaded")
+    import_.add_argument("--restart", action="store_true",
+                         help="ignore the saved checkpoint and import from the top")
+
+    search = commands.add_parser("search", add_help=False)
+    search.add_argument("value")
+    search.add_argument("--by", choices=["name", "artist", "album", "genre"], default="name")
+    search.add_argument("--fuzzy", action="store_true")
+
+    features = commands.add_parser("features", add_help=False)
+    features.add_argument("ranges", nargs="+", type=parse_feature_range)
+
+    update = commands.add_parser("update", add_help=False)
+    update.add_argument("song_id")
+    update.add_argument("field", choices=list(UPDATE_FIELDS))
+    update.add_argument("value")
+
+    bulk_update = commands.add_parser("bulk-update", add_help=False)
+    bulk_update.add_argument("criteria", choices=["album", "artist", "genre"])
+    bulk_update.add_argument("match")
+    bulk_update.add_argument("field", choices=list(UPDATE_FIELDS))
+    bulk_update.add_argument("value")
+    bulk_update.add_argument("--dry-run", action="store_true")
+
+    delete = commands.add_parser("delete", add_help=False)
+    delete.add_argument("song_id")
+
+    purge_nulls = commands.add_parser("purge-nulls", add_help=False)
+    purge_nulls.add_argument("--dry-run", action="store_true")
+
+    export = commands.add_parser("export", add_help=False)
+    export.add_argument("directory")
+    export.add_argument("--full", action="store_true")
+
+    query_stats = commands.add_parser("query-stats", add_help=False)
+    query_stats.add_argument("--reset", action="store_true",
+                             help="clear the statistics after reporting them")
+
+    playlist = commands.add_parser("playlist", add_help=False)
+    actions = playlist.add_subparsers(dest="action", required=True)
+    actions.add_parser("create", add_help=False).add_argument("name")
+    add = actions.add_parser("add", add_help=False)
+    add.add_argument("name")
+    add.add_argument("song_ids", nargs="+")
+    add.add_argument("--before", type=int, help="entry to insert the songs in front of")
+    show = actions.add_parser("show", add_help=False)
+    show.add_argument("name")
+    show.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE)
+    show.add_argument("--after", type=int, nargs=2, metavar=("POSITION", "ENTRY_ID"),
+                      help="continue after the last entry of the previous page")
+    move = actions.add_parser("move", add_help=False)
+    move.add_argument("entry_id", type=int)
+    move.add_argument("--before", type=int, help="entry to move it in front of (default: end)")
+    actions.add_parser("remove", add_help=False).add_argument("entry_id", type=int)
+    actions.add_parser("delete", add_help=False).add_argument("name")
+    return parser
+
+
+class BatchRunner:
+    """Run batch commands against one connection and stream JSONL results."""
+
+    def __init__(self, db_ops: DatabaseOperations, output: Optional[TextIO] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            db_ops: Open DatabaseOperations instance used by every command
+            output: Stream for the JSON lines (defaults to stdout)
+        """
+        self.db_ops = db_ops
+        self.output = output or sys.stdout
+        self.parser = build_command_parser()
+
+    def emit(self, record: Dict):
+        """Write one result as a JSON line and flush it."""
+        self.output.write(json.dumps(record) + "\n")
+        self.output.flush()
+
+    def run(self, lines: Iterable[str], transaction: bool = False) -> int:
+        """
+        Run every command and report each result.
+
+        Blank lines and lines starting with '#' are ignored.
+
+        Args:
+            lines: Command lines, e.g. ["load songs.csv", "purge-nulls"]
+            transaction: Run all commands in one transaction; the first
+                failure rolls back every command and stops the batch. Export
+                commands then run after the commit.
+
+        Returns:
+            Number of failed commands
+        """
+        commands = [line.strip() for line in lines]
+        commands = [line for line in commands if line and not line.startswith("#")]
+        if not transaction:
+            return sum(0 if self.run_command(line) else 1 for line in commands)
+
+        exports = []
+        try:
+            with self.db_ops.batch_transaction():
+                for number, line in enumerate(commands, 1):
+                    if line.split(maxsplit=1)[0] == "export":
+                        # Export files are not transactional; write them only
+                        # once the changes they reflect are committed
+                        exports.append(line)
+                    elif not self.run_command(line):
+                        raise CommandError(f"command {number} failed: {line}")
+        except (CommandError, BatchAborted) as e:
+            self.emit({"command": "transaction", "ok": False,
+                       "error": f"{e}; all changes rolled back"})
+            return 1
+
+        self.emit({"command": "transaction", "ok": True,
+                   "committed": len(commands) - len(exports)})
+        return sum(0 if self.run_command(line) else 1 for line in exports)
+
+    def run_command(self, line: str) -> bool:
+        """Run one command line, emitting its results; returns True on success."""
+        name = line.split(maxsplit=1)[0] if line.split() else ""
+        try:
+            args = self.parser.parse_args(shlex.split(line))
+            handler = getattr(self, "do_" + args.command.replace("-", "_"))
+            for record in handler(args):
+                self.emit({"command": args.command, **record})
+            return True
+        except CommandError as e:
+            self.emit({"command": name, "ok": False, "error": str(e)})
+        except Exception as e:
+            self.emit({"command": name, "ok": False, "error": f"{type(e).__name__}: {e}"})
+        return False
+
+    def do_load(self, args) -> Iterator[Dict]:
+        if args.sync and args.dedupe:
+            raise CommandError("--dedupe cannot be combined with --sync")
+        if is_file_pattern(args.path):
+            if args.sync or args.dedupe:
+                raise CommandError("--sync and --dedupe need a single file")
+            loaded, skipped = parallel_load_files(self.db_ops, args.path, workers=args.workers)
+            yield {"ok": True, "path": args.path, "loaded": loaded, "skipped": skipped}
+        elif args.sync:
+            counts = self.db_ops.sync_songs(args.path, full_snapshot=args.full_snapshot)
+            yield {"ok": True, "path": args.path, **counts}
+        else:
+            loaded, skipped = self.db_ops.bulk_load_songs(args.path, dedupe=args.dedupe)
+            record = {"ok": True, "path": args.path, "loaded": loaded, "skipped": skipped}
+            if args.dedupe:
+                record["near_duplicates"] = self.db_ops.last_load_duplicates
+            yield record
+
+    def do_import(self, args) -> Iterator[Dict]:
+        counts = self.db_ops.import_songs(args.path, reject_path=args.reject_file,
+                                          restart=args.restart)
+        yield {"ok": True, "path": args.path, **counts}
+
+    def do_search(self, args) -> Iterator[Dict]:
+        if args.fuzzy:
+            matches = self.db_ops.fuzzy_search_songs(args.value, args.by)
+            songs = [song for song, _ in matches]
+        elif args.by == "name":
+            songs = self.db_ops.search_songs_by_name(args.value)
+        else:
+            songs = self.db_ops.search_songs_by_criteria(args.by, args.value)
+
+        for song in songs:
+            yield {"song": song.to_dict()}
+        yield {"ok": True, "count": len(songs)}
+
+    def do_features(self, args) -> Iterator[Dict]:
+        try:
+            songs = self.db_ops.search_songs_by_features(dict(args.ranges))
+        except ValueError as e:
+            raise CommandError(str(e))
+        for song in songs:
+            yield {"song": song.to_dict()}
+        yield {"ok": True, "count": len(songs)}
+
+    def do_update(self, args) -> Iterator[Dict]:
+        if not self.db_ops.update_song_field(args.song_id, UPDATE_FIELDS[args.field], args.value):
+            raise CommandError(f"could not update {args.field} of song {args.song_id}")
+        yield {"ok": True, "song_id": args.song_id, "updated": 1}
+
+    def do_bulk_update(self, args) -> Iterator[Dict]:
+        if args.dry_run:
+            matched = self.db_ops.count_songs_by_criteria(args.criteria, args.match)
+            yield {"ok": True, "dry_run": True, "matched": matched}
+            return
+
+        if not self.db_ops.count_songs_by_criteria(args.criteria, args.match):
+            yield {"ok": True, "updated": 0}
+            return
+        updated = self.db_ops.bulk_update_by_criteria(args.criteria, args.match,
+                                                      UPDATE_FIELDS[args.field], args.value)
+        if not updated:
+            raise CommandError(f"no songs updated for {args.criteria} '{args.match}'")
+        yield {"ok": True, "updated": updated}
+
+    def do_delete(self, args) -> Iterator[Dict]:
+        if not self.db_ops.delete_song(args.song_id):
+            raise CommandError(f"could not delete song {args.song_id}")
+        yield {"ok": True, "song_id": args.song_id, "deleted": 1}
+
+    def do_purge_nulls(self, args) -> Iterator[Dict]:
+        if args.dry_run:
+            yield {"ok": True, "dry_run": True,
+                   "matched": self.db_ops.count_songs_with_null_values(),
+                   "missing_fields": dict(self.db_ops.get_missing_field_counts())}
+            return
+        yield {"ok": True, "deleted": self.db_ops.delete_songs_with_null_values()}
+
+    def do_export(self, args) -> Iterator[Dict]:
+        count = self.db_ops.export_features(args.directory, full=args.full)
+        yield {"ok": True, "directory": args.directory, "songs": count}
+
+    def do_query_stats(self, args) -> Iterator[Dict]:
+        report = self.db_ops.get_query_stats()
+        if not report:
+            raise CommandError("query statistics are off (start with --instrument)")
+        for name, summary in report["methods"].items():
+            yield {"method": name, **summary}
+        for statement in report["statements"]:
+            yield {"statement": statement}
+        for slow_query in report["slow_queries"]:
+            yield {"slow_query": slow_query}
+        if args.reset:
+            self.db_ops.reset_query_stats()
+        yield {"ok": True, "methods": len(report["methods"]),
+               "statements": len(report["statements"]),
+               "full_scans": len(report["full_scans"]),
+               "index_scans": len(report["index_scans"]),
+               "slow_queries": len(report["slow_queries"])}
+
+    def do_playlist(self, args) -> Iterator[Dict]:
+        if args.action == "create":
+            playlist_id = self.db_ops.create_playlist(args.name)
+            if playlist_id is None:
+                raise CommandError(f"could not create playlist '{args.name}'")
+            yield {"ok": True, "playlist": args.name, "playlist_id": playlist_id}
+            return
+        if args.action in ("move", "remove"):
+            if args.action == "move":
+                done = self.db_ops.move_playlist_entry(args.entry_id, args.before)
+            else:
+                done = self.db_ops.remove_from_playlist(args.entry_id)
+            if not done:
+                raise CommandError(f"could not {args.action} playlist entry {args.entry_id}")
+            yield {"ok": True, "entry_id": args.entry_id}
+            return
+
+        playlist_id = self.db_ops.get_playlist_id(args.name)
+        if playlist_id is None:
+            raise CommandError(f"no playlist named '{args.name}'")
+        if args.action == "add":
+            if args.before is None:
+                added = self.db_ops.append_to_playlist(playlist_id, args.song_ids)
+            else:
+                added = sum(self.db_ops.insert_into_playlist(playlist_id, song_id,
+                                                             args.before) is not None
+                            for song_id in args.song_ids)
+            yield {"ok": True, "playlist": args.name, "added": added,
+                   "skipped": len(args.song_ids) - added}
+        elif args.action == "show":
+            entries = self.db_ops.get_playlist_songs(playlist_id, args.limit, args.after)
+            for entry_id, position, song in entries:
+                yield {"entry_id": entry_id, "position": position, "song": song.to_dict()}
+            record = {"ok": True, "playlist": args.name, "count": len(entries)}
+            if len(entries) == args.limit:
+                record["next_after"] = [entries[-1][1], entries[-1][0]]
+            yield record
+        else:
+            if not self.db_ops.delete_playlist(playlist_id):
+                raise CommandError(f"could not delete playlist '{args.name}'")
+            yield {"ok": True, "playlist": args.name, "deleted": 1}
+
+
+def read_command_file(path: str) -> Iterator[str]:
+    """Yield command lines from a file, or from stdin when path is '-'."""
+    if path == "-":
+        yield from sys.stdin
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        yield from file
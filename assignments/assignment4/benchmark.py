@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Benchmarks
+Benchmark suite for the playlist management system.
+
+Generates a seeded synthetic song catalog with a realistic artist/album skew,
+times every DatabaseOperations load, search, update, delete and cleanup
+method against it, and writes the results as JSON so runs on different
+branches can be compared.
+
+Usage:
+    python benchmark.py --rows 100000 --output results.json
+    python benchmark.py --rows 100000 --compare results.json
+    python benchmark.py --rows 100000 --compare-profiles
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional
+
+from db_operations import DatabaseOperations, CONNECTION_PROFILES
+
+GENRES = ["album rock", "pop", "hip hop", "jazz", "classical", "metal", "indie", "country"]
+WORDS = ["love", "night", "dream", "fire", "heart", "rain", "summer", "city",
+         "light", "blue", "gold", "river", "moon", "star", "wild", "time"]
+
+# Rows generated per batch of random draws
+GENERATION_CHUNK = 10000
+
+# Columns (by CSV position) that can be left empty to produce incomplete songs
+NUMERIC_FIELDS = range(7, 13)
+
+
+def generate_songs_csv(file_path: str, rows: int, seed: int = 408,
+                       null_fraction: float = 0.01, zipf_exponent: float = 1.1):
+    """
+    Write a synthetic songs CSV in the Assignment04_songs_update.csv format.
+
+    Artists are drawn from a Zipf distribution, so a few artists own a large
+    share of the catalog as in real music libraries. Each artist has a fixed
+    genre and a handful of albums, with earlier albums holding more tracks.
+
+    Args:
+        file_path: Destination path
+        rows: Number of songs to generate
+        seed: Random seed, so runs are repeatable
+        null_fraction: Share of songs with one numeric field left empty
+        zipf_exponent: Skew of the artist distribution (higher is more skewed)
+    """
+    rng = random.Random(seed)
+    artist_count = max(50, rows // 40)
+    artist_weights = list(accumulate(1 / (rank ** zipf_exponent)
+                                     for rank in range(1, artist_count + 1)))
+
+    with open(file_path, 'w', encoding='utf-8') as file:
+        for chunk_start in range(0, rows, GENERATION_CHUNK):
+            chunk_rows = min(GENERATION_CHUNK, rows - chunk_start)
+            artists = rng.choices(range(artist_count), cum_weights=artist_weights, k=chunk_rows)
+
+            for offset, artist in enumerate(artists):
+                i = chunk_start + offset
+                album = min(int(rng.expovariate(0.7)), 9)
+                name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+                fields = [
+                    f"song{i:09d}", f"{name.title()} {i}", f"Artist {artist}",
+                    f"Album {artist}-{album}", f"{1960 + (artist + album) % 65}-01-01",
+                    GENRES[artist % len(GENRES)], str(rng.random() < 0.1),
+                    f"{rng.uniform(60000, 400000):.0f}", f"{rng.random():.3f}",
+                    f"{rng.random():.3f}", f"{rng.random():.3f}",
+                    f"{rng.uniform(60, 200):.3f}", f"{rng.uniform(-30, 0):.3f}",
+                ]
+                if rng.random() < null_fraction:
+                    fields[rng.choice(NUMERIC_FIELDS)] = ""
+                file.write(",".join(fields) + "\n")
+
+
+def measure(calls: Iterable[Callable], rows_per_result: bool = True) -> Dict[str, float]:
+    """
+    Time a sequence of calls and summarize their latency.
+
+    Args:
+        calls: Zero-argument callables, each timed separately
+        rows_per_result: Count rows in list results (or the int returned)
+
+    Returns:
+        Dict with the call count, total seconds, operations per second,
+        mean/p50/p95/max latency in milliseconds and rows returned
+    """
+    latencies = []
+    rows = 0
+    for call in calls:
+        start = time.perf_counter()
+        result = call()
+        latencies.append(time.perf_counter() - start)
+        if rows_per_result:
+            if isinstance(result, list):
+                rows += len(result)
+            elif isinstance(result, int) and not isinstance(result, bool):
+                rows += result
+
+    latencies.sort()
+    total = sum(latencies)
+    count = len(latencies)
+    return {
+        "calls": count,
+        "seconds": total,
+        "ops_per_sec": count / total if total > 0 else 0.0,
+        "mean_ms": 1000 * total / count if count else 0.0,
+        "p50_ms": 1000 * latencies[count // 2] if count else 0.0,
+        "p95_ms": 1000 * latencies[min(count - 1, int(count * 0.95))] if count else 0.0,
+        "max_ms": 1000 * latencies[-1] if count else 0.0,
+        "rows": rows,
+    }
+
+
+def one_edit_typo(value: str, rng: random.Random) -> str:
+    """Delete, replace or insert one letter in the longest word of value."""
+    words = value.split()
+    position = max(range(len(words)), key=lambda i: 0 if words[i].isdigit() else len(words[i]))
+    word = words[position]
+    i = rng.randrange(len(word))
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    words[position] = rng.choice([word[:i] + word[i + 1:],
+                                  word[:i] + letter + word[i + 1:],
+                                  word[:i] + letter + word[i:]])
+    return " ".join(words)
+
+
+def measure_fuzzy_search(db_ops: DatabaseOperations, songs: List, criteria_type: str,
+                         rng: random.Random) -> Dict[str, float]:
+    """
+    Time fuzzy searches for one-edit typos of song names and record recall.
+
+    Args:
+        db_ops: Database with the trigram index
+        songs: Songs whose name (or artist) is misspelled and searched for
+        criteria_type: "name" or "artist"
+        rng: Random source for the typos
+
+    Returns:
+        measure() summary plus "recall", the share of searches that
+        returned a song with the correctly spelled value
+    """
+    position = {"name": 1, "artist": 2}[criteria_type]
+    found = []
+
+    def search(song):
+        matches = db_ops.fuzzy_search_songs(one_edit_typo(song[position], rng), criteria_type)
+        found.append(any(match[position] == song[position] for match, _ in matches))
+        return matches
+
+    result = measure([lambda song=song: search(song) for song in songs if song])
+    result["recall"] = sum(found) / len(found) if found else 0.0
+    return result
+
+
+def run_suite(csv_path: str, db_path: str, rows: int, operations: int, seed: int,
+              db_options: Dict) -> Dict[str, Dict[str, float]]:
+    """
+    Time every DatabaseOperations workload against a fresh database.
+
+    Args:
+        csv_path: Synthetic catalog written by generate_songs_csv()
+        db_path: Path for the benchmark database (must not exist yet)
+        rows: Number of songs in the catalog
+        operations: Calls timed per lookup, search, update and delete method
+        seed: Random seed for choosing songs and search terms
+        db_options: Keyword arguments passed to DatabaseOperations
+
+    Returns:
+        Dict of benchmark name -> measure() summary
+    """
+    rng = random.Random(seed + 1)
+    artist_count = max(50, rows // 40)
+    results = {}
+
+    def song_ids(count: int) -> List[str]:
+        return [f"song{i:09d}" for i in rng.sample(range(rows), min(count, rows))]
+
+    def artists(count: int) -> List[str]:
+        # Mix the head of the distribution (big artists) with the long tail
+        head = [f"Artist {rng.randrange(10)}" for _ in range(count // 2)]
+        tail = [f"Artist {rng.randrange(artist_count)}" for _ in range(count - len(head))]
+        return head + tail
+
+    # The database methods print progress messages; keep the report clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_ops = DatabaseOperations(db_path, **db_options)
+
+        load = measure([lambda: db_ops.bulk_load_songs(csv_path)], rows_per_result=False)
+        load["rows"] = rows
+        load["rows_per_sec"] = rows / load["seconds"] if load["seconds"] else 0.0
+        results["bulk_load_songs"] = load
+        # The first sync compares every song field by field and stores the
+        # hashes; the second is the nightly "nothing changed" re-import
+        results["sync_songs.first"] = measure([lambda: db_ops.sync_songs(csv_path)])
+        results["sync_songs.unchanged"] = measure([lambda: db_ops.sync_songs(csv_path)])
+
+        results["get_song_by_id"] = measure(
+            [lambda song_id=song_id: [db_ops.get_song_by_id(song_id)]
+             for song_id in song_ids(operations)])
+        results["search_songs_by_name"] = measure(
+            [lambda term=term: db_ops.search_songs_by_name(term)
+             for term in (f"{rng.choice(WORDS)} {rng.randrange(rows)}" for _ in range(operations))])
+        results["search_songs_by_criteria.artist"] = measure(
+            [lambda name=name: db_ops.search_songs_by_criteria("artist", name)
+             for name in artists(operations)])
+        results["search_songs_by_criteria.album"] = measure(
+            [lambda name=name: db_ops.search_songs_by_criteria("album", f"{name[7:]}-0")
+             for name in artists(operations)])
+        results["search_songs_by_criteria.genre"] = measure(
+            [lambda genre=genre: db_ops.search_songs_by_criteria("genre", genre)
+             for genre in (rng.choice(GENRES) for _ in range(max(1, operations // 10)))])
+        results["count_songs_by_criteria"] = measure(
+            [lambda name=name: db_ops.count_songs_by_criteria("artist", name)
+             for name in artists(operations)])
+        if db_ops.full_text_search:
+            for criteria_type in ("name", "artist"):
+                songs = [db_ops.get_song_by_id(song_id) for song_id in song_ids(operations)]
+                results[f"fuzzy_search_songs.{criteria_type}"] = measure_fuzzy_search(
+                    db_ops, songs, criteria_type, rng)
+        if db_ops.group_stats:
+            results["get_group_stats"] = measure(
+                [lambda group_type=group_type: db_ops.get_group_stats(group_type, limit=100)
+                 for group_type in ("artist", "album", "genre") * max(1, operations // 3)])
+        results["iter_songs"] = measure([lambda: sum(1 for _ in db_ops.iter_songs())])
+        results["count_songs_with_null_values"] = measure(
+            [db_ops.count_songs_with_null_values, db_ops.count_songs_with_null_values])
+        results["get_missing_field_counts"] = measure([db_ops.get_missing_field_counts])
+
+        results["update_song_field"] = measure(
+            [lambda song_id=song_id: db_ops.update_song_field(song_id, "4", "2000-01-01")
+             for song_id in song_ids(operations)], rows_per_result=False)
+        results["bulk_update_by_criteria"] = measure(
+            [lambda name=name: db_ops.bulk_update_by_criteria("artist", name, "5", "yes")
+             for name in artists(max(1, operations // 10))])
+        results["bulk_update_songs"] = measure(
+            [lambda ids=ids: db_ops.bulk_update_songs([(song_id,) for song_id in ids], "5", "no")
+             for ids in (song_ids(1000) for _ in range(max(1, operations // 20)))],
+            rows_per_result=False)
+        results["delete_song"] = measure(
+            [lambda song_id=song_id: db_ops.delete_song(song_id)
+             for song_id in song_ids(operations)], rows_per_result=False)
+        results["delete_songs_with_null_values"] = measure(
+            [db_ops.delete_songs_with_null_values])
+
+        db_ops.close()
+    return results
+
+
+def benchmark_profile(profile: str, csv_path: str, rows: int, operations: int) -> Dict[str, float]:
+    """
+    Measure load, search and update throughput for one connection profile.
+
+    Each profile gets a fresh database so the results are independent.
+
+    Returns:
+        Dict of operation name -> operations per second
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # The database methods print progress messages; keep the report clean
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_ops = DatabaseOperations(os.path.join(temp_dir, "bench.db"), profile=profile)
+
+            start = time.perf_counter()
+            db_ops.bulk_load_songs(csv_path)
+            results["load rows/s"] = rows / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(operations):
+                db_ops.search_songs_by_name(f"{WORDS[i % len(WORDS)]} {i}")
+                db_ops.search_songs_by_criteria("artist", f"Artist {i % 1000}")
+            results["searches/s"] = 2 * operations / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(operations):
+                db_ops.update_song_field(f"song{i * 7 % rows:09d}", "4", "2000-01-01")
+            results["updates/s"] = operations / (time.perf_counter() - start)
+
+            db_ops.close()
+    return results
+
+
+def compare_profiles(csv_path: str, rows: int, operations: int):
+    """Print load, search and update throughput for every connection profile."""
+    print(f"{'Profile':12} | {'load rows/s':>12} | {'searches/s':>10} | {'updates/s':>10}")
+    print("-" * 54)
+    for profile in CONNECTION_PROFILES:
+        results = benchmark_profile(profile, csv_path, rows, operations)
+        print(f"{profile:12} | {results['load rows/s']:12,.0f} | "
+              f"{results['searches/s']:10,.1f} | {results['updates/s']:10,.1f}")
+
+
+def git_revision() -> Optional[str]:
+    """Return the current git commit, if the benchmark runs inside a checkout."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """
+    List benchmarks whose throughput dropped by more than tolerance.
+
+    Any drop in fuzzy search recall counts too; the typos are seeded, so
+    the same catalog gives the same searches.
+
+    Args:
+        baseline: JSON report from an earlier run
+        current: JSON report from this run
+        tolerance: Allowed relative slowdown (0.2 = 20%)
+
+    Returns:
+        Human-readable descriptions of each regression
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("ops_per_sec"):
+            continue
+        change = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+        if change < -tolerance:
+            regressions.append(f"{name}: {previous['ops_per_sec']:,.1f} -> "
+                               f"{result['ops_per_sec']:,.1f} ops/s ({change:+.0%})")
+        if "recall" in previous and result.get("recall", 0.0) < previous["recall"]:
+            regressions.append(f"{name}: recall {previous['recall']:.0%} -> "
+                               f"{result.get('recall', 0.0):.0%}")
+    return regressions
+
+
+def print_report(report: Dict):
+    """Print a benchmark report as a table."""
+    print(f"{'Benchmark':34} | {'calls':>6} | {'ops/s':>10} | {'p50 ms':>9} | "
+          f"{'p95 ms':>9} | {'rows':>10}")
+    print("-" * 92)
+    for name, result in report["results"].items():
+        print(f"{name:34} | {result['calls']:6} | {result['ops_per_sec']:10,.1f} | "
+              f"{result['p50_ms']:9.2f} | {result['p95_ms']:9.2f} | {result['rows']:10,}")
+    load = report["results"]["bulk_load_songs"]
+    print(f"\nLoaded {load['rows']:,} rows at {load['rows_per_sec']:,.0f} rows/sec.")
+    for name, result in report["results"].items():
+        if "recall" in result:
+            print(f"{name} found the misspelled song in {result['recall']:.0%} of searches.")
+
+
+def main():
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the playlist DatabaseOperations.")
+    parser.add_argument("--rows", type=int, default=100000, help="songs in the synthetic catalog")
+    parser.add_argument("--operations", type=int, default=200,
+                        help="calls timed per lookup, search, update and delete benchmark")
+    parser.add_argument("--seed", type=int, default=408, help="random seed for the catalog")
+    parser.add_argument("--profile", default="default", choices=list(CONNECTION_PROFILES),
+                        help="connection profile for the suite")
+    parser.add_argument("--full-text-search", action="store_true", help="enable the FTS5 index")
+    parser.add_argument("--group-stats", action="store_true", help="enable the summary tables")
+    parser.add_argument("--cache-size", type=int, default=0, help="query cache entries")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before --compare fails")
+    parser.add_argument("--compare-profiles", action="store_true",
+                        help="compare connection profiles instead of running the suite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, "songs.csv")
+        generate_songs_csv(csv_path, args.rows, args.seed)
+
+        if args.compare_profiles:
+            compare_profiles(csv_path, args.rows, args.operations)
+            return
+
+        db_options = {
+            "profile": args.profile,
+            "full_text_search": args.full_text_search,
+            "group_stats": args.group_stats,
+            "cache_size": args.cache_size,
+        }
+        results = run_suite(csv_path, os.path.join(temp_dir, "bench.db"), args.rows,
+                            args.operations, args.seed, db_options)
+
+    report = {
+        "meta": {
+            "rows": args.rows,
+            "operations": args.operations,
+            "seed": args.seed,
+            "options": db_options,
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = find_regressions(baseline, report, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+CPSC 408 Assignment 04 - Test Fixtures
+Shared pytest fixtures: small song CSV files and fresh databases.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import csv
+
+import pytest
+
+from db_operations import DatabaseOperations
+
+
+def song_row(number: int, song_name: str = None, artist_name: str = "Artist",
+             album_name: str = "Album", **features) -> list:
+    """Return the 13 CSV fields of a test song; features override the numeric columns."""
+    values = {"duration_ms": 200000 + number, "danceability": 0.5, "energy": 0.5,
+              "valence": 0.5, "tempo": 120.0, "loudness": -8.0}
+    values.update(features)
+    return [f"song{number:04d}", song_name or f"Song {number}", artist_name, album_name,
+            "2001-01-01", "rock", "False"] + [str(values[column]) for column in
+                                             ("duration_ms", "danceability", "energy",
+                                              "valence", "tempo", "loudness")]
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Write rows to a CSV file in tmp_path and return its path."""
+    def write(name: str, rows) -> str:
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            csv.writer(file).writerows(rows)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A DatabaseOperations instance on a new database file."""
+    db_ops = DatabaseOperations(str(tmp_path / "playlist.db"))
+    yield db_ops
+    db_ops.close()
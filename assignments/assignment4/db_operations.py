@@ -9,31 +9,449 @@ Date: [Current Date]
 
 import sqlite3
 import csv
+import contextlib
+import functools
+import hashlib
+import inspect
+import math
 import os
-from typing import List, Tuple, Optional
+import pathlib
+import re
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
+
+from dedupe import DEDUPE_MODES, DuplicateIndex, song_match_key
+from query_cache import QueryCache
+from records import NUMERIC_COLUMNS, SONG_COLUMNS, Song, SongColumns
+from query_stats import DEFAULT_SLOW_QUERY_MS, InstrumentedConnection, QueryStats
+
+
+# Songs deleted per transaction by delete_songs_with_null_values()
+NULL_CLEANUP_BATCH_SIZE = 5000
+
+# Number of CSV rows parsed and written per executemany() call when streaming
+DEFAULT_CHUNK_SIZE = 10000
+
+# PRAGMA settings applied by connect() for each connection profile. They are
+# applied in this order; page_size comes first because it can only change
+# before the database file is created (or on VACUUM outside WAL mode).
+CONNECTION_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, 2 MB page cache
+    "default": {},
+    # Large imports: no fsync at all, big cache, temp B-trees in memory.
+    # Safe if only the application crashes (SQLite has handed every write
+    # to the OS). An OS crash or power loss can lose recent transactions
+    # and corrupt the database file, so keep a copy of the source CSV and
+    # reload from scratch after one; use "durable" for data that matters.
+    "bulk_load": {
+        "page_size": 8192,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,  # 256 MB
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+    # Search-heavy sessions: readers never block on the writer, pages are
+    # served from the memory map and a large cache
+    "read_heavy": {
+        "page_size": 4096,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072,  # 128 MB
+        "mmap_size": 1073741824,  # 1 GB
+        "temp_store": "MEMORY",
+    },
+    # Every committed transaction survives power loss
+    "durable": {
+        "page_size": 4096,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,  # 16 MB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+
+# PRAGMAs stored in the database file; read-only connections leave them to the writer
+DATABASE_PRAGMAS = ("page_size", "journal_mode")
+
+# Running totals kept per group in song_group_stats: column -> expression over
+# a songs row ({row} is "new" or "old" inside the triggers)
+GROUP_STAT_TOTALS = {
+    "track_count": "1",
+    "duration_total": "COALESCE({row}.duration_ms, 0)",
+    "energy_total": "COALESCE({row}.energy, 0)",
+    "energy_count": "({row}.energy IS NOT NULL)",
+    "tempo_total": "COALESCE({row}.tempo, 0)",
+    "tempo_count": "({row}.tempo IS NOT NULL)",
+    "explicit_count": "(COALESCE({row}.explicit, 0) != 0)",
+}
+
+# Number of songs fetched per query by iter_songs()
+DEFAULT_PAGE_SIZE = 500
+
+# Distance between the positions of appended playlist entries; an entry
+# inserted between two others takes the midpoint, so about log2(gap)
+# inserts fit into one gap before its neighbours are respaced
+PLAYLIST_POSITION_GAP = 1024
+
+# Entries on each side of a full gap considered by the first respacing pass
+PLAYLIST_RESPACE_WINDOW = 16
+
+# Columns covered by the optional FTS5 index, keyed by search criteria
+FTS_CRITERIA_COLUMNS = {
+    "name": "song_name",
+    "artist": "artist_name",
+    "album": "album_name",
+    "genre": "genre",
+}
+
+# Audio features indexed by the optional R*Tree (an R*Tree has at most five
+# dimensions, so duration_ms ranges are checked against the table instead)
+FEATURE_INDEX_COLUMNS = ("danceability", "energy", "valence", "tempo", "loudness")
+
+# Bounds stored for a NULL feature: the song's box spans the whole axis, so
+# it is a candidate for every range and the exact recheck rejects it
+FEATURE_NULL_BOUND = 1e38
+
+# Defaults for fuzzy_search_songs(): minimum trigram similarity, result limit,
+# and how many bm25 candidates are scored per requested result. At 0.2 every
+# one-edit typo of a word of 5 or more letters (and most 4-letter ones) still
+# matches, while under 1% of pairs of unrelated words do.
+DEFAULT_FUZZY_THRESHOLD = 0.2
+DEFAULT_FUZZY_LIMIT = 10
+FUZZY_CANDIDATE_FACTOR = 20
+
+# Index postings a fuzzy search may read to collect candidates; bounds the
+# cost of queries made of common trigrams whatever the catalog size
+FUZZY_PROBE_BUDGET = 15000
+
+
+def song_trigrams(text: str) -> set:
+    """Return the set of lowercase 3-character sequences in text (FTS5 trigram style)."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(words: List[str]) -> set:
+    """
+    Return the trigrams of lowercase words, each padded as "  word ".
+    
+    The padding gives every word trigrams for its first letters and its end,
+    so a typo in a short word still leaves most of its trigrams intact
+    ("brethe" shares 5 of 10 with "breathe", against 2 of 7 unpadded).
+    """
+    trigrams = set()
+    for word in words:
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def trigram_similarity(search_value: str, candidate: str) -> float:
+    """
+    Trigram Jaccard similarity between a search value and a stored name.
+    
+    Both are compared word by word (see word_trigrams()), ignoring case and
+    punctuation. The search value is compared with the whole name and with
+    every run of the same number of words inside it, and the best score
+    wins, so a short query such as "great gig" still scores well against a
+    long title.
+    """
+    query_words = re.findall(r"\w+", search_value.lower())
+    query_trigrams = word_trigrams(query_words)
+    if not query_trigrams:
+        return 0.0
+    
+    words = re.findall(r"\w+", candidate.lower())
+    window = max(1, len(query_words))
+    texts = [words] + [words[i:i + window] for i in range(len(words) - window + 1)]
+    
+    best = 0.0
+    for text in texts:
+        text_trigrams = word_trigrams(text)
+        shared = len(query_trigrams & text_trigrams)
+        if shared:
+            best = max(best, shared / len(query_trigrams | text_trigrams))
+    return best
+
+
+def parse_song_fields(row: List[str]) -> Tuple:
+    """
+    Parse a CSV row into song data tuple.
+    
+    Raises:
+        ValueError, IndexError: If a numeric field is invalid or fields are missing
+    """
+    song_id = row[0].strip()
+    song_name = row[1].strip()
+    artist_name = row[2].strip()
+    album_name = row[3].strip()
+    release_date = row[4].strip()
+    genre = row[5].strip()
+    explicit = row[6].strip().lower() == 'true'
+    duration_ms = float(row[7]) if row[7] else None
+    danceability = float(row[8]) if row[8] else None
+    energy = float(row[9]) if row[9] else None
+    valence = float(row[10]) if row[10] else None
+    tempo = float(row[11]) if row[11] else None
+    loudness = float(row[12]) if row[12] else None
+    
+    return (song_id, song_name, artist_name, album_name, release_date, 
+           genre, explicit, duration_ms, danceability, energy, 
+           valence, tempo, loudness)
+
+
+def parse_song_row(row: List[str]) -> Optional[Tuple]:
+    """
+    Parse a CSV row into song data tuple, printing the error for a bad row.
+    
+    Kept at module level so worker processes can parse rows without opening
+    a database connection.
+    """
+    try:
+        return parse_song_fields(row)
+    except (ValueError, IndexError) as e:
+        print(f"Error parsing row: {e}")
+        return None
+
+
+def check_song_row(row: List[str]) -> Tuple[Optional[Tuple], Optional[str]]:
+    """
+    Parse a non-empty CSV row without printing anything.
+    
+    Returns:
+        (song_data, None) for a valid row, or (None, reason) for a row that
+        cannot be loaded
+    """
+    if len(row) < 13:
+        return None, f"expected 13 fields, found {len(row)}"
+    if not row[0].strip():
+        return None, "missing songID"
+    try:
+        return parse_song_fields(row), None
+    except (ValueError, IndexError) as e:
+        return None, str(e)
+
+
+def parse_song_rows(rows: List[List[str]]) -> List[Tuple]:
+    """Parse a chunk of CSV rows, dropping empty, incomplete or invalid ones."""
+    parsed = []
+    for row in rows:
+        if not row or len(row) < 13 or not row[0].strip():
+            continue
+        song_data = parse_song_row(row)
+        if song_data:
+            parsed.append(song_data)
+    return parsed
+
+
+def song_content_hash(song_data: Tuple) -> int:
+    """
+    Hash every field of a parsed song except its ID.
+
+    Used by sync_songs() to tell changed rows from unchanged ones; the
+    64-bit digest is stored as a signed SQLite INTEGER.
+    """
+    digest = hashlib.blake2b(repr(song_data[1:]).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+# Position of each search criteria's column in a song tuple
+CRITERIA_POSITIONS = {"artist": 2, "album": 3, "genre": 5}
+
+
+@functools.lru_cache(maxsize=1024)
+def like_regex(search_value: str) -> "re.Pattern":
+    """
+    Compile the regex equivalent of LOWER(column) LIKE LOWER('%search_value%').
+    
+    '%' and '_' are LIKE wildcards, so a plain substring test would miss
+    songs the SQL matches. Use search() on the stored value.
+    """
+    pattern = "".join(".*" if char == "%" else "." if char == "_" else re.escape(char)
+                      for char in search_value)
+    return re.compile(pattern, re.IGNORECASE | re.DOTALL)
+
+
+def search_may_match(search_value: str, value) -> bool:
+    """
+    Conservative test of whether a name or criteria search could match value.
+    
+    True whenever the LIKE substring search for search_value (or the FTS
+    search standing in for it) could return a song holding value; it may
+    also be true when it would not.
+    """
+    if value is None:
+        return False
+    value = str(value)
+    return (like_regex(search_value).search(value) is not None
+            or all(word in value.lower() for word in re.findall(r"\w+", search_value.lower())))
+
+
+class BatchAborted(Exception):
+    """Raised when a write fails inside batch_transaction(); the batch is rolled back."""
+
+
+def cached_read(kind: str):
+    """
+    Serve a read method from the instance's query cache when one is enabled.
+    
+    Results are stored under (kind, *arguments), with the arguments bound
+    to the method's parameters in order, so a call passing keywords shares
+    its entry and _invalidate_cache() finds the search value at key[-1].
+    The write methods drop the entries they may have made stale.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.query_cache is None:
+                return method(self, *args, **kwargs)
+            
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            key = (kind,) + tuple(arguments.arguments.values())[1:]
+            found, value = self.query_cache.get(key)
+            if not found:
+                value = method(self, *args, **kwargs)
+                self.query_cache.put(key, value)
+            # Hand out copies so callers cannot modify the cached list
+            return list(value) if isinstance(value, list) else value
+        return wrapper
+    return decorator
+
 
 class DatabaseOperations:
     """Handles all database operations for the playlist application."""
     
-    def __init__(self, db_path: str = "playlist.db"):
-        """Initialize database connection."""
+    # Table that the write methods modify; reads always go through "songs"
+    songs_table = "songs"
+    
+    def __init__(self, db_path: str = "playlist.db", full_text_search: bool = False,
+                 group_stats: bool = False,
+                 feature_index: bool = False, profile: str = "default", cache_size: int = 0,
+                 cache_ttl: Optional[float] = None, read_only: bool = False,
+                 check_same_thread: bool = True, instrument: bool = False,
+                 slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+                 slow_query_log: Optional[str] = None):
+        """
+        Initialize database connection.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            read_only: Open an existing database read-only. No tables are
+                created; the optional indexes are used if they exist.
+            check_same_thread: Passed to sqlite3.connect(); False lets a pool
+                hand the connection to other threads (one at a time)
+            instrument: Time every public method and SQL statement and capture
+                query plans (see get_query_stats())
+            slow_query_ms: With instrument, statements slower than this are
+                added to the slow-query log
+            slow_query_log: Optional file the slow-query log is appended to
+            profile: Name of the CONNECTION_PROFILES entry used to tune the
+                connection ("default", "bulk_load", "read_heavy", "durable")
+            cache_size: Number of lookup and search results kept in an LRU
+                cache in front of get_song_by_id() and the search methods
+                (0 disables the cache)
+            cache_ttl: Optional number of seconds a cached result stays valid
+            full_text_search: Serve name, criteria and fuzzy searches from an
+                FTS5 trigram index kept in sync with the songs table by triggers
+            group_stats: Maintain the per-artist, per-album and per-genre
+                summary table read by get_group_stats()
+            feature_index: Maintain the R*Tree over the audio features used
+                by search_songs_by_features()
+        """
         self.db_path = db_path
         self.connection = None
         self.cursor = None
+        self.song_cursor = None
+        self.full_text_search = full_text_search
+        self.group_stats = group_stats
+        self.feature_index = feature_index
+        if profile not in CONNECTION_PROFILES:
+            raise ValueError(f"Unknown connection profile: {profile}")
+        self.profile = profile
+        self.read_only = read_only
+        self.check_same_thread = check_same_thread
+        # Built on first use by find_similar_songs()
+        self.similarity_index = None
+        # True inside batch_transaction(), which defers every commit
+        self.in_batch = False
+        # Set when a write failed inside batch_transaction()
+        self.batch_failed = False
+        # Cleanups run once the batch's transaction ends (see call_after_batch())
+        self.after_batch = []
+        # Near-duplicates found by the last bulk_load_songs(dedupe=...)
+        self.last_load_duplicates = 0
+        self.query_cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.query_stats = QueryStats(slow_query_ms, slow_query_log) if instrument else None
         self.connect()
-        self.create_table()
+        if read_only:
+            self.detect_indexes()
+        else:
+            self.create_table()
+        if self.query_stats is not None:
+            self.query_stats.instrument(self)
     
     def connect(self):
         """Establish database connection."""
+        # Instrumented connections hand out timing cursors
+        factory = InstrumentedConnection if self.query_stats is not None else sqlite3.Connection
         try:
-            self.connection = sqlite3.connect(self.db_path)
+            if self.read_only:
+                uri = f"{pathlib.Path(self.db_path).resolve().as_uri()}?mode=ro"
+                self.connection = sqlite3.connect(uri, uri=True, factory=factory,
+                                                  check_same_thread=self.check_same_thread)
+            else:
+                self.connection = sqlite3.connect(self.db_path, factory=factory,
+                                                  check_same_thread=self.check_same_thread)
+            if self.query_stats is not None:
+                self.connection.query_stats = self.query_stats
             self.cursor = self.connection.cursor()
+            # Song queries return Song records; self.cursor keeps plain tuples
+            # for counts, PRAGMAs and internal lookups
+            self.song_cursor = self.connection.cursor()
+            self.song_cursor.row_factory = Song.from_row
             # Enable foreign key constraints
             self.cursor.execute("PRAGMA foreign_keys = ON")
+            self.apply_profile(self.profile)
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
             raise
     
+    def apply_profile(self, profile: str):
+        """
+        Apply the PRAGMA settings of a connection profile.
+        
+        Args:
+            profile: Name of an entry in CONNECTION_PROFILES
+        """
+        for pragma, value in CONNECTION_PROFILES[profile].items():
+            if self.read_only and pragma in DATABASE_PRAGMAS:
+                continue
+            self.cursor.execute(f"PRAGMA {pragma} = {value}")
+            # journal_mode reports the resulting mode as a row
+            self.cursor.fetchall()
+    
+    def detect_indexes(self):
+        """
+        Use the optional indexes that already exist in the database.
+        
+        Read-only connections cannot create them, so the full-text and
+        group-stats flags follow what the writer has built.
+        """
+        self.cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE name IN ('songs_fts', 'song_group_stats', 'songs_features')
+        """)
+        names = {row[0] for row in self.cursor.fetchall()}
+        self.full_text_search = "songs_fts" in names
+        self.group_stats = "song_group_stats" in names
+        self.feature_index = "songs_features" in names
+    
     def create_table(self):
         """Create the songs table if it doesn't exist."""
         create_table_query = """
@@ -53,25 +471,672 @@ class DatabaseOperations:
             loudness REAL
         );
         """
+        # Supports keyset pagination in iter_songs() and ORDER BY song_name
+        create_index_query = """
+        CREATE INDEX IF NOT EXISTS idx_songs_name_id ON songs (song_name, songID);
+        """
         
         try:
             self.cursor.execute(create_table_query)
-            self.connection.commit()
+            self.cursor.execute(create_index_query)
+            self.drop_trigram_index()
+            self.create_quality_index()
+            self.create_playlist_tables()
             print("Songs table created successfully.")
         except sqlite3.Error as e:
             print(f"Error creating table: {e}")
             raise
+        
+        if self.full_text_search:
+            self.full_text_search = self.create_search_index()
+        if self.group_stats:
+            self.group_stats = self.create_group_stats()
+        if self.feature_index:
+            self.feature_index = self.create_feature_index()
+    
+    def create_search_index(self) -> bool:
+        """
+        Create the FTS5 index over song, artist, album and genre names.
+        
+        The index is an external-content table that stores only the search
+        terms; triggers on songs keep it in sync with every insert, update
+        and delete. Existing rows are indexed the first time it is created.
+        It uses the trigram tokenizer, so a MATCH on a phrase finds the same
+        substrings as the LIKE searches and bulk updates do. It is the only
+        trigram index: fuzzy_search_songs() draws its candidates from it too.
+        
+        Returns:
+            True if the index is available, False if FTS5 is not supported
+        """
+        try:
+            self._create_fts_table("songs_fts", ["song_name", "artist_name", "album_name", "genre"],
+                                   "tokenize='trigram'")
+            return True
+        except sqlite3.Error as e:
+            print(f"Full-text search unavailable, using LIKE searches: {e}")
+            self.rollback()
+            return False
+    
+    def drop_trigram_index(self):
+        """
+        Drop the songs_trigram index built by earlier versions.
+        
+        fuzzy_search_songs() now reads songs_fts, so its separate trigram
+        index only doubled the work of every write.
+        """
+        for trigger in ("insert", "delete", "update"):
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS songs_trigram_{trigger}")
+        self.cursor.execute("DROP TABLE IF EXISTS songs_trigram")
+    
+    def _create_fts_table(self, table_name: str, columns: List[str], options: str = ""):
+        """
+        Create an external-content FTS5 table over songs plus its sync triggers.
+        
+        Existing rows are indexed when the table is first created; later runs
+        only make sure the triggers exist. A table built with other options
+        (e.g. the word tokenizer used by earlier versions) is rebuilt.
+        """
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        extra_options = f", {options}" if options else ""
+        
+        statements = [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_insert AFTER INSERT ON songs BEGIN
+                INSERT INTO {table_name}(rowid, {column_list})
+                VALUES (new.rowid, {new_values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_delete AFTER DELETE ON songs BEGIN
+                INSERT INTO {table_name}({table_name}, rowid, {column_list})
+                VALUES ('delete', old.rowid, {old_values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_update
+            AFTER UPDATE OF {column_list} ON songs BEGIN
+                INSERT INTO {table_name}({table_name}, rowid, {column_list})
+                VALUES ('delete', old.rowid, {old_values});
+                INSERT INTO {table_name}(rowid, {column_list})
+                VALUES (new.rowid, {new_values});
+            END
+            """,
+        ]
+        
+        self.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                            (table_name,))
+        row = self.cursor.fetchone()
+        if row is not None and options not in row[0]:
+            for trigger in ("insert", "delete", "update"):
+                self.cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_{trigger}")
+            self.cursor.execute(f"DROP TABLE {table_name}")
+            row = None
+        if row is None:
+            self.cursor.execute(f"""
+            CREATE VIRTUAL TABLE {table_name} USING fts5(
+                {column_list},
+                content='songs', content_rowid='rowid'{extra_options}
+            )
+            """)
+            self.cursor.execute(f"INSERT INTO {table_name}({table_name}) VALUES ('rebuild')")
+        for statement in statements:
+            self.cursor.execute(statement)
+        self.commit()
+    
+    def _fts_search(self, column: str, search_value: str) -> Optional[List[Song]]:
+        """
+        Run a ranked substring search against one column of the FTS5 index.
+        
+        The trigram index matches a phrase wherever it occurs in the column,
+        case-insensitively, so the songs found are those of the LIKE search
+        on '%search_value%'. Results are ordered by bm25 relevance.
+        
+        Returns:
+            Matching songs, or None if the caller should fall back to a LIKE
+            search: trigrams need at least 3 characters, and '%' or '_' are
+            LIKE wildcards with no MATCH equivalent
+        """
+        if len(search_value) < 3 or "%" in search_value or "_" in search_value:
+            return None
+        
+        phrase = search_value.replace('"', '""')
+        match_expression = f'{column} : "{phrase}"'
+        query = """
+        SELECT songs.* FROM songs_fts
+        JOIN songs ON songs.rowid = songs_fts.rowid
+        WHERE songs_fts MATCH ?
+        ORDER BY bm25(songs_fts), songs.song_name
+        """
+        self.song_cursor.execute(query, (match_expression,))
+        return self.song_cursor.fetchall()
+    
+    def fuzzy_search_songs(self, search_value: str, criteria_type: str = "name",
+                           threshold: float = DEFAULT_FUZZY_THRESHOLD,
+                           limit: int = DEFAULT_FUZZY_LIMIT) -> List[Tuple[Song, float]]:
+        """
+        Typo-tolerant search on song, artist or album names.
+        
+        The songs_fts trigram index, filtered to the searched column, returns
+        the best bm25 candidates sharing the rarest trigrams of the search
+        value; only that bounded pool is scored in Python with trigram
+        Jaccard similarity (see trigram_similarity()).
+        Probe trigrams are added from the rarest up until FUZZY_PROBE_BUDGET
+        index postings would be exceeded; when even the rarest is too common
+        to rank, the first songs containing all of them are scored instead.
+        Either way the cost does not grow with the catalog.
+        
+        Args:
+            search_value: Possibly misspelled name to look for
+            criteria_type: "name", "artist" or "album"
+            threshold: Minimum similarity (0-1) for a song to be returned
+            limit: Maximum number of songs to return
+            
+        Returns:
+            List of (song, similarity) pairs, most similar first
+        """
+        column_positions = {"name": 1, "artist": 2, "album": 3}
+        if not self.full_text_search or criteria_type not in column_positions:
+            return []
+        column = FTS_CRITERIA_COLUMNS[criteria_type]
+        column_index = column_positions[criteria_type]
+        
+        query_trigrams = song_trigrams(search_value)
+        if not query_trigrams:
+            return []
+        
+        # Prefix filter: a song sharing at least ceil(threshold * n) of the n
+        # query trigrams contains one of the n - ceil(threshold * n) + 1
+        # rarest ones, so more probes than that find nothing new. Fewer are
+        # used when they would read more than FUZZY_PROBE_BUDGET postings;
+        # the rarest trigrams, typos included, are the most selective.
+        required = max(1, math.ceil(threshold * len(query_trigrams)))
+        frequencies = self._trigram_frequencies(query_trigrams, column)
+        probe_trigrams = []
+        postings = 0
+        for frequency, trigram in frequencies:
+            if len(probe_trigrams) > len(query_trigrams) - required:
+                break
+            if postings + frequency > FUZZY_PROBE_BUDGET:
+                break
+            probe_trigrams.append(trigram)
+            postings += frequency
+        
+        if postings:
+            operator = " OR "
+            order_by = "ORDER BY bm25(songs_fts)"
+        else:
+            # Every trigram found is too common to rank (a typo in a name
+            # shared by many songs): take the first songs containing all of
+            # them, which stops reading as soon as the pool is full
+            probe_trigrams = [trigram for frequency, trigram in frequencies if frequency]
+            if not probe_trigrams:
+                return []
+            operator = " AND "
+            order_by = ""
+        
+        match_expression = f"{column} : (" + operator.join(
+            '"' + trigram.replace('"', '""') + '"' for trigram in probe_trigrams) + ")"
+        query = f"""
+        SELECT songs.* FROM songs_fts
+        JOIN songs ON songs.rowid = songs_fts.rowid
+        WHERE songs_fts MATCH ?
+        {order_by}
+        LIMIT ?
+        """
+        try:
+            self.song_cursor.execute(query, (match_expression, limit * FUZZY_CANDIDATE_FACTOR))
+            candidates = self.song_cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error running fuzzy search: {e}")
+            return []
+        
+        matches = []
+        for song in candidates:
+            similarity = trigram_similarity(search_value, song[column_index] or "")
+            if similarity >= threshold:
+                matches.append((song, similarity))
+        
+        matches.sort(key=lambda match: (-match[1], match[0][1]))
+        return matches[:limit]
+    
+    def _trigram_frequencies(self, trigrams: set, column: str) -> List[Tuple[int, str]]:
+        """
+        Return (songs containing it in column, trigram) pairs, rarest first.
+        
+        Counts stop at FUZZY_PROBE_BUDGET + 1, since a trigram past the budget
+        is never probed; exact counts (fts5vocab) would read the whole index
+        entry of trigrams such as "art" that occur in nearly every song.
+        """
+        frequencies = []
+        for trigram in trigrams:
+            self.cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT rowid FROM songs_fts WHERE songs_fts MATCH ? LIMIT ?
+            )
+            """, (f'{column} : "' + trigram.replace('"', '""') + '"', FUZZY_PROBE_BUDGET + 1))
+            frequencies.append((self.cursor.fetchone()[0], trigram))
+        frequencies.sort()
+        return frequencies
+    
+    def _group_columns(self) -> dict:
+        """Columns of songs_table that song_group_stats groups by, keyed by group type."""
+        return {"artist": "artist_name", "album": "album_name", "genre": "genre"}
+    
+    def create_group_stats(self):
+        """
+        Create the per-artist, per-album and per-genre summary table.
+        
+        song_group_stats holds running totals (track count, total duration,
+        energy and tempo sums, explicit count) for every group. Triggers on
+        the songs table add a song's values to its groups on insert, subtract
+        them on delete, and do both when an update changes a grouped or
+        summarized column, so reports read one row per group instead of
+        scanning every song. Existing songs are summarized on first creation.
+        """
+        totals = list(GROUP_STAT_TOTALS)
+        group_columns = self._group_columns()
+        
+        def add_row(row: str) -> str:
+            statements = []
+            for group_type, column in group_columns.items():
+                values = ", ".join(GROUP_STAT_TOTALS[total].format(row=row) for total in totals)
+                updates = ", ".join(f"{total} = {total} + excluded.{total}" for total in totals)
+                statements.append(f"""
+                INSERT INTO song_group_stats (group_type, group_key, {", ".join(totals)})
+                SELECT '{group_type}', {row}.{column}, {values}
+                WHERE {row}.{column} IS NOT NULL
+                ON CONFLICT (group_type, group_key) DO UPDATE SET {updates};""")
+            return "".join(statements)
+        
+        def subtract_row(row: str) -> str:
+            statements = []
+            for group_type, column in group_columns.items():
+                updates = ", ".join(f"{total} = {total} - {GROUP_STAT_TOTALS[total].format(row=row)}"
+                                    for total in totals)
+                statements.append(f"""
+                UPDATE song_group_stats SET {updates}
+                WHERE group_type = '{group_type}' AND group_key = {row}.{column};
+                DELETE FROM song_group_stats
+                WHERE group_type = '{group_type}' AND group_key = {row}.{column} AND track_count <= 0;""")
+            return "".join(statements)
+        
+        watched_columns = ", ".join(list(group_columns.values())
+                                    + ["duration_ms", "energy", "tempo", "explicit"])
+        total_columns = ", ".join(f"{total} REAL NOT NULL DEFAULT 0" for total in totals)
+        statements = [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_group_stats_insert
+            AFTER INSERT ON {self.songs_table} BEGIN {add_row("new")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_group_stats_delete
+            AFTER DELETE ON {self.songs_table} BEGIN {subtract_row("old")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_group_stats_update
+            AFTER UPDATE OF {watched_columns} ON {self.songs_table} BEGIN
+            {subtract_row("old")}{add_row("new")}
+            END
+            """,
+        ]
+        
+        try:
+            self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'song_group_stats'")
+            if self.cursor.fetchone() is None:
+                self.cursor.execute(f"""
+                CREATE TABLE song_group_stats (
+                    group_type TEXT NOT NULL,
+                    group_key NOT NULL,
+                    {total_columns},
+                    PRIMARY KEY (group_type, group_key)
+                )
+                """)
+                for group_type, column in group_columns.items():
+                    sums = ", ".join(f"SUM({GROUP_STAT_TOTALS[total].format(row='s')})"
+                                     for total in totals)
+                    self.cursor.execute(f"""
+                    INSERT INTO song_group_stats (group_type, group_key, {", ".join(totals)})
+                    SELECT '{group_type}', s.{column}, {sums}
+                    FROM {self.songs_table} s
+                    WHERE s.{column} IS NOT NULL
+                    GROUP BY s.{column}
+                    """)
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error creating summary tables: {e}")
+            self.rollback()
+            return False
+    
+    def _group_name_sql(self, group_type: str) -> str:
+        """SQL expression giving the display name of a song_group_stats row."""
+        return "s.group_key"
+    
+    def create_feature_index(self) -> bool:
+        """
+        Create the R*Tree index over the audio features.
+        
+        songs_features stores every song as a point (min = max) in the
+        FEATURE_INDEX_COLUMNS space, keyed by the song's rowid; triggers on
+        the songs table keep it in sync with every insert, update and delete.
+        Existing songs are indexed the first time it is created.
+        
+        Returns:
+            True if the index is available, False if R*Tree is not supported
+        """
+        def bounds(row: str) -> str:
+            return ", ".join(f"coalesce({row}.{column}, {bound}{FEATURE_NULL_BOUND})"
+                             for column in FEATURE_INDEX_COLUMNS for bound in "-+")
+        
+        dimensions = ", ".join(f"{column}_min, {column}_max" for column in FEATURE_INDEX_COLUMNS)
+        statements = [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS songs_features_insert
+            AFTER INSERT ON {self.songs_table} BEGIN
+                INSERT INTO songs_features VALUES (new.rowid, {bounds("new")});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS songs_features_delete
+            AFTER DELETE ON {self.songs_table} BEGIN
+                DELETE FROM songs_features WHERE id = old.rowid;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS songs_features_update
+            AFTER UPDATE OF {", ".join(FEATURE_INDEX_COLUMNS)} ON {self.songs_table} BEGIN
+                DELETE FROM songs_features WHERE id = old.rowid;
+                INSERT INTO songs_features VALUES (new.rowid, {bounds("new")});
+            END
+            """,
+        ]
+        
+        try:
+            self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs_features'")
+            if self.cursor.fetchone() is None:
+                self.cursor.execute(
+                    f"CREATE VIRTUAL TABLE songs_features USING rtree(id, {dimensions})")
+                self.cursor.execute(f"""
+                INSERT INTO songs_features SELECT s.rowid, {bounds("s")} FROM {self.songs_table} s
+                """)
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Feature index unavailable, using table scans: {e}")
+            self.rollback()
+            return False
+    
+    def search_songs_by_features(self, ranges: Dict[str, Tuple[Optional[float], Optional[float]]]) -> List[Song]:
+        """
+        Find songs whose numeric features all fall in the given ranges.
+        
+        With feature_index=True, the ranges on the indexed audio features
+        select candidates from the R*Tree, and only those rows are read and
+        rechecked exactly (the R*Tree stores 32-bit floats). Otherwise the
+        ranges are a WHERE clause over the songs table.
+        
+        Args:
+            ranges: {column: (low, high)} with inclusive bounds; either bound
+                may be None, e.g. {"tempo": (120, 130), "energy": (0.7, None)}
+            
+        Returns:
+            Matching songs ordered by song name
+            
+        Raises:
+            ValueError: If a column is not one of NUMERIC_COLUMNS
+        """
+        unknown = set(ranges) - set(NUMERIC_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot search by {', '.join(sorted(unknown))}; "
+                             f"use {', '.join(NUMERIC_COLUMNS)}")
+        
+        song_filters, index_filters, params, index_params = [], [], [], []
+        for column, (low, high) in ranges.items():
+            for bound, operator, index_column in ((low, ">=", "max"), (high, "<=", "min")):
+                if bound is None:
+                    continue
+                song_filters.append(f"{{alias}}.{column} {operator} ?")
+                params.append(bound)
+                if self.feature_index and column in FEATURE_INDEX_COLUMNS:
+                    index_filters.append(f"f.{column}_{index_column} {operator} ?")
+                    index_params.append(bound)
+        
+        try:
+            self.song_cursor.execute(self._feature_search_query(index_filters, song_filters),
+                                     index_params + params)
+            return self.song_cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error searching songs by features: {e}")
+            return []
+    
+    def _feature_search_query(self, index_filters: List[str], song_filters: List[str]) -> str:
+        """
+        Build the search_songs_by_features() query.
+        
+        song_filters use an {alias} placeholder for the songs row; with
+        index_filters the R*Tree is scanned first (CROSS JOIN keeps that
+        order) and songs are looked up by rowid.
+        """
+        if not index_filters:
+            where = " AND ".join(song_filters).format(alias="songs") or "1"
+            return f"SELECT * FROM songs WHERE {where} ORDER BY song_name"
+        where = " AND ".join(index_filters + [f.format(alias="s") for f in song_filters])
+        return f"""
+        SELECT s.* FROM songs_features f CROSS JOIN songs s ON s.rowid = f.id
+        WHERE {where}
+        ORDER BY s.song_name
+        """
+    
+    def get_group_stats(self, group_type: str, limit: Optional[int] = None,
+                        name: Optional[str] = None) -> List[Tuple]:
+        """
+        Read per-group summaries from song_group_stats.
+        
+        Args:
+            group_type: "artist", "album" or "genre"
+            limit: Optional maximum number of groups, largest first
+            name: Optional exact group name to report on
+            
+        Returns:
+            List of (name, track_count, avg_energy, avg_tempo,
+            total_duration_ms, explicit_ratio) tuples ordered by track count
+        """
+        if group_type not in self._group_columns():
+            return []
+        
+        name_sql = self._group_name_sql(group_type)
+        query = f"""
+        SELECT {name_sql} AS name,
+               CAST(s.track_count AS INTEGER),
+               s.energy_total / NULLIF(s.energy_count, 0),
+               s.tempo_total / NULLIF(s.tempo_count, 0),
+               s.duration_total,
+               s.explicit_count / s.track_count
+        FROM song_group_stats s
+        WHERE s.group_type = ?
+        """
+        parameters = [group_type]
+        if name is not None:
+            query += f" AND {name_sql} = ?"
+            parameters.append(name)
+        query += " ORDER BY s.track_count DESC, name"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        
+        try:
+            self.cursor.execute(query, parameters)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error retrieving {group_type} statistics: {e}")
+            return []
+    
+    def create_change_log(self):
+        """
+        Track which songs change, for caches that refresh incrementally.
+        
+        Triggers on the songs table record the ID of every inserted, updated
+        or deleted song in song_changes with an increasing change_seq. Only
+        the latest change per song is kept, so the log never grows beyond one
+        row per song ID ever written.
+        """
+        # An UPSERT rather than INSERT OR REPLACE: inside a trigger, an OR
+        # clause is overridden by the conflict policy of the statement that
+        # fired it (e.g. the UPSERT in upsert_song_batch())
+        log_change = """
+            INSERT INTO song_changes (songID, change_seq)
+            VALUES ({song_id}, (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM song_changes))
+            ON CONFLICT (songID) DO UPDATE SET change_seq = excluded.change_seq;
+        """
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS song_changes (
+                songID TEXT PRIMARY KEY,
+                change_seq INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_song_changes_seq ON song_changes (change_seq)",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_changes_insert AFTER INSERT ON {self.songs_table} BEGIN
+                {log_change.format(song_id="new.songID")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_changes_update AFTER UPDATE ON {self.songs_table} BEGIN
+                {log_change.format(song_id="old.songID")}
+                {log_change.format(song_id="new.songID")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_changes_delete AFTER DELETE ON {self.songs_table} BEGIN
+                {log_change.format(song_id="old.songID")}
+            END
+            """,
+        ]
+        
+        try:
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.commit()
+        except sqlite3.Error as e:
+            print(f"Error creating change log: {e}")
+            self.rollback()
+            raise
+    
+    def get_change_watermark(self) -> int:
+        """Return the change_seq of the most recent change in song_changes."""
+        self.cursor.execute("SELECT COALESCE(MAX(change_seq), 0) FROM song_changes")
+        return self.cursor.fetchone()[0]
+    
+    def get_changed_song_ids(self, since_seq: int) -> Tuple[List[str], int]:
+        """
+        List songs inserted, updated or deleted after a change watermark.
+        
+        Args:
+            since_seq: Watermark returned by an earlier call (0 for everything)
+            
+        Returns:
+            Tuple of (changed song IDs, new watermark)
+        """
+        query = """
+        SELECT songID, change_seq FROM song_changes
+        WHERE change_seq > ?
+        ORDER BY change_seq
+        """
+        self.cursor.execute(query, (since_seq,))
+        changes = self.cursor.fetchall()
+        if not changes:
+            return [], since_seq
+        return [song_id for song_id, _ in changes], changes[-1][1]
     
-    def bulk_load_songs(self, csv_file_path: str) -> Tuple[int, int]:
+    def find_similar_songs(self, song_id: str, k: int = 10) -> List[Tuple[Song, float]]:
+        """
+        Find the songs whose audio features are closest to a given song.
+        
+        The feature matrix is loaded into a SimilarityIndex on first use and
+        refreshed from the change log before every query. Requires NumPy.
+        
+        Args:
+            song_id: ID of the song to find neighbours for
+            k: Number of similar songs to return
+            
+        Returns:
+            List of (song, distance) pairs, closest first
+        """
+        # Imported here so NumPy is only needed when this feature is used
+        from similarity import SimilarityIndex
+        
+        if self.similarity_index is None:
+            self.similarity_index = SimilarityIndex(self)
+        else:
+            self.similarity_index.refresh()
+        
+        matches = []
+        for similar_id, distance in self.similarity_index.nearest(song_id, k):
+            song = self.get_song_by_id(similar_id)
+            if song:
+                matches.append((song, distance))
+        return matches
+
+    def export_features(self, directory: str, full: bool = False) -> int:
+        """
+        Export the numeric audio features to memory-mapped .npy files.
+
+        An existing export in the directory is refreshed with the songs
+        changed since it was written. Requires NumPy.
+
+        Args:
+            directory: Directory for the .npy files and manifest
+            full: Rewrite the export instead of refreshing it
+
+        Returns:
+            Number of songs exported (full) or changed songs applied (refresh)
+        """
+        # Imported here so NumPy is only needed when this feature is used
+        from feature_store import export_feature_store, refresh_feature_store
+
+        if full:
+            return export_feature_store(self, directory)
+        return refresh_feature_store(self, directory)
+
+    def bulk_load_songs(self, csv_file_path: str, streaming: bool = True,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        dedupe: Optional[str] = None) -> Tuple[int, int]:
         """
         Load songs from CSV file with duplicate checking.
         
         Args:
             csv_file_path: Path to the CSV file
+            streaming: Read the file in chunks and write each chunk with one
+                executemany() call (default). When False, every row is checked
+                with song_exists() and inserted on its own.
+            chunk_size: Number of rows per chunk in streaming mode
+            dedupe: Also catch re-releases stored under a new song ID (same
+                normalized name and artist, similar duration). "flag" loads
+                them and records them in song_duplicates; "merge" records
+                them without loading them. Streaming mode only.
             
         Returns:
-            Tuple of (songs_loaded, duplicates_skipped)
+            Tuple of (songs_loaded, duplicates_skipped); merged near-duplicates
+            count as skipped
         """
+        if dedupe is not None and dedupe not in DEDUPE_MODES:
+            raise ValueError(f"Unknown dedupe mode: {dedupe}")
+        if streaming:
+            return self._stream_load_songs(csv_file_path, chunk_size, dedupe)
+        if dedupe is not None:
+            raise ValueError("dedupe requires streaming mode")
+        
         songs_loaded = 0
         duplicates_skipped = 0
         
@@ -100,130 +1165,815 @@ class DatabaseOperations:
                         else:
                             print(f"Failed to insert song: {song_data[1]}")
             
-            self.connection.commit()
+            self.commit()
             return songs_loaded, duplicates_skipped
             
         except Exception as e:
             print(f"Error loading songs from CSV: {e}")
-            self.connection.rollback()
+            self.rollback()
             raise
     
-    def _parse_csv_row(self, row: List[str]) -> Optional[Tuple]:
-        """Parse a CSV row into song data tuple."""
-        try:
-            song_id = row[0].strip()
-            song_name = row[1].strip()
-            artist_name = row[2].strip()
-            album_name = row[3].strip()
-            release_date = row[4].strip()
-            genre = row[5].strip()
-            explicit = row[6].strip().lower() == 'true'
-            duration_ms = float(row[7]) if row[7] else None
-            danceability = float(row[8]) if row[8] else None
-            energy = float(row[9]) if row[9] else None
-            valence = float(row[10]) if row[10] else None
-            tempo = float(row[11]) if row[11] else None
-            loudness = float(row[12]) if row[12] else None
-            
-            return (song_id, song_name, artist_name, album_name, release_date, 
-                   genre, explicit, duration_ms, danceability, energy, 
-                   valence, tempo, loudness)
-        except (ValueError, IndexError) as e:
-            print(f"Error parsing row: {e}")
-            return None
-    
-    def song_exists(self, song_id: str) -> bool:
-        """Check if a song with the given ID already exists."""
-        query = "SELECT COUNT(*) FROM songs WHERE songID = ?"
-        try:
-            self.cursor.execute(query, (song_id,))
-            count = self.cursor.fetchone()[0]
-            return count > 0
-        except sqlite3.Error as e:
-            print(f"Error checking if song exists: {e}")
-            return False
-    
-    def insert_song(self, song_data: Tuple) -> bool:
-        """Insert a single song into the database."""
-        insert_query = """
-        INSERT INTO songs (songID, song_name, artist_name, album_name, release_date,
-                          genre, explicit, duration_ms, danceability, energy,
-                          valence, tempo, loudness)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    def _stream_load_songs(self, csv_file_path: str, chunk_size: int,
+                           dedupe: Optional[str] = None) -> Tuple[int, int]:
         """
+        Stream songs from a CSV file into the database in fixed-size chunks.
         
-        try:
+        Duplicate IDs (already stored or repeated in the file) are skipped by
+        the ON CONFLICT clause, so no per-row lookup is needed. The whole load
+        runs in a single transaction.
+        
+        Args:
+            csv_file_path: Path to the CSV file
+            chunk_size: Number of CSV rows read and written per batch
+            dedupe: None, "flag" or "merge" (see bulk_load_songs())
+            
+        Returns:
+            Tuple of (songs_loaded, duplicates_skipped)
+        """
+        songs_loaded = 0
+        duplicates_skipped = 0
+        self.last_load_duplicates = 0
+        start_time = time.perf_counter()
+        
+        try:
+            duplicate_index = self.load_duplicate_index() if dedupe else None
+            with open(csv_file_path, 'r', encoding='utf-8', newline='') as file:
+                csv_reader = csv.reader(file)
+                
+                while True:
+                    chunk = list(islice(csv_reader, chunk_size))
+                    if not chunk:
+                        break
+                    
+                    batch = self._parse_csv_rows(chunk)
+                    if not batch:
+                        continue
+                    
+                    parsed = len(batch)
+                    if duplicate_index is not None:
+                        batch = self._dedupe_batch(batch, duplicate_index, merge=dedupe == "merge")
+                    inserted = self.insert_song_batch(batch) if batch else 0
+                    songs_loaded += inserted
+                    duplicates_skipped += parsed - inserted
+            
+            self.commit()
+        except Exception as e:
+            print(f"Error loading songs from CSV: {e}")
+            self.rollback()
+            raise
+        
+        self.report_load_rate(songs_loaded + duplicates_skipped,
+                              time.perf_counter() - start_time)
+        if self.last_load_duplicates:
+            action = "merged" if dedupe == "merge" else "flagged"
+            print(f"{self.last_load_duplicates} near-duplicate songs {action}.")
+        return songs_loaded, duplicates_skipped
+    
+    def create_import_progress(self):
+        """Create the table that records how far each import_songs() run got."""
+        try:
+            self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_progress (
+                file_path TEXT PRIMARY KEY,
+                file_size INTEGER NOT NULL,
+                file_mtime REAL NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                row_number INTEGER NOT NULL,
+                songs_loaded INTEGER NOT NULL,
+                duplicates_skipped INTEGER NOT NULL,
+                rows_rejected INTEGER NOT NULL,
+                reject_offset INTEGER NOT NULL,
+                completed BOOLEAN NOT NULL,
+                updated TEXT NOT NULL
+            )
+            """)
+            self.commit()
+        except sqlite3.Error as e:
+            print(f"Error creating import progress table: {e}")
+            self.rollback()
+            raise
+    
+    def get_import_progress(self, csv_file_path: str) -> Optional[Dict]:
+        """
+        Return the last checkpoint of import_songs() for a file.
+        
+        Returns:
+            Dict of the import_progress columns, or None if the file has not
+            been imported
+        """
+        self.create_import_progress()
+        self.cursor.execute("SELECT * FROM import_progress WHERE file_path = ?",
+                            (os.path.abspath(csv_file_path),))
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((column[0] for column in self.cursor.description), row))
+    
+    def import_songs(self, csv_file_path: str, reject_path: Optional[str] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     restart: bool = False) -> Dict[str, int]:
+        """
+        Import a very large CSV file with a checkpoint after every chunk.
+        
+        Each chunk is committed together with its import_progress row (byte
+        offset and row number of the next unread row), so a crash loses at
+        most one chunk and a rerun seeks straight to the checkpoint. Rows
+        that cannot be parsed or inserted are appended to a reject file as
+        (row_number, reason, original fields) instead of aborting the run.
+        
+        Args:
+            csv_file_path: Path to the CSV file
+            reject_path: CSV file for rejected rows (default: the input path
+                with ".rejects.csv" appended)
+            chunk_size: Rows per committed chunk
+            restart: Ignore an existing checkpoint and start from the top
+            
+        Returns:
+            Dict with "loaded", "skipped" (existing IDs), "rejected" and
+            "rows" totals for the whole file, and "resumed_from" (the row the
+            run started at; 0 for a fresh import)
+        """
+        file_path = os.path.abspath(csv_file_path)
+        reject_path = reject_path or file_path + ".rejects.csv"
+        stat = os.stat(file_path)
+        # Created before the first chunk, outside its savepoint, so that
+        # rolling a chunk back never drops the table
+        self.create_import_progress()
+        progress = None if restart else self.get_import_progress(file_path)
+        if progress and (progress["file_size"], progress["file_mtime"]) != (stat.st_size, stat.st_mtime):
+            print("The file changed since its last checkpoint; importing it from the start.")
+            progress = None
+        if progress is None:
+            progress = {"byte_offset": 0, "row_number": 0, "songs_loaded": 0,
+                        "duplicates_skipped": 0, "rows_rejected": 0,
+                        "reject_offset": 0, "completed": False}
+        elif progress["completed"]:
+            print(f"{csv_file_path} was already imported; pass restart=True to import it again.")
+        else:
+            print(f"Resuming {csv_file_path} at row {progress['row_number']}.")
+        
+        resumed_from = progress["row_number"]
+        start_time = time.perf_counter()
+        
+        with open(file_path, 'rb') as file, open(reject_path, 'a+', encoding='utf-8', newline='') as rejects:
+            # Drop rejects written after the checkpoint by a run that crashed
+            rejects.truncate(progress["reject_offset"])
+            reject_writer = csv.writer(rejects)
+            file.seek(progress["byte_offset"])
+            position = [progress["byte_offset"]]
+            
+            def read_lines():
+                # Count bytes as csv.reader pulls lines, so position[0] is the
+                # offset of the next row whenever a row is returned
+                for line in file:
+                    position[0] += len(line)
+                    yield line.decode('utf-8', errors='replace')
+            
+            csv_reader = csv.reader(read_lines())
+            while not progress["completed"]:
+                batch = []
+                rejected = []
+                row_number = progress["row_number"]
+                for row in islice(csv_reader, chunk_size):
+                    row_number += 1
+                    if not row:
+                        continue
+                    song_data, reason = check_song_row(row)
+                    if song_data is None:
+                        rejected.append((row_number, reason, row))
+                    else:
+                        batch.append((row_number, song_data, row))
+                
+                inserted, failed = self._insert_checkpoint_batch(batch)
+                rejected.extend(failed)
+                for number, reason, row in sorted(rejected, key=lambda reject: reject[0]):
+                    reject_writer.writerow([number, reason] + list(row))
+                rejects.flush()
+                
+                progress.update(
+                    byte_offset=position[0], row_number=row_number,
+                    songs_loaded=progress["songs_loaded"] + inserted,
+                    duplicates_skipped=progress["duplicates_skipped"] + len(batch) - len(failed) - inserted,
+                    rows_rejected=progress["rows_rejected"] + len(rejected),
+                    reject_offset=rejects.tell(),
+                    completed=row_number == progress["row_number"])
+                self._save_import_progress(file_path, stat, progress)
+        
+        if progress["row_number"] > resumed_from:
+            self.report_load_rate(progress["row_number"] - resumed_from,
+                                  time.perf_counter() - start_time)
+        if progress["rows_rejected"]:
+            print(f"{progress['rows_rejected']} rows rejected; see {reject_path}.")
+        return {"loaded": progress["songs_loaded"], "skipped": progress["duplicates_skipped"],
+                "rejected": progress["rows_rejected"], "rows": progress["row_number"],
+                "resumed_from": resumed_from}
+    
+    def _insert_checkpoint_batch(self, batch: List[Tuple[int, Tuple, List[str]]]) -> Tuple[int, List[Tuple]]:
+        """
+        Insert one import_songs() chunk of (row_number, song_data, fields).
+        
+        If the chunk fails as a whole, only the chunk is rolled back (to a
+        savepoint) and its rows are retried one at a time, so that only the
+        failing rows are rejected. Writes made before the chunk, such as the
+        import_progress table or, inside batch_transaction(), the earlier
+        commands of the batch, are kept.
+        
+        Returns:
+            Tuple of (songs inserted, [(row_number, reason, fields), ...])
+        """
+        if not batch:
+            return 0, []
+        if not self.connection.in_transaction:
+            # An explicit transaction, so releasing a savepoint does not
+            # commit the chunk before its checkpoint is written
+            self.cursor.execute("BEGIN")
+        self.cursor.execute("SAVEPOINT import_chunk")
+        try:
+            inserted = self.insert_song_batch([song_data for _, song_data, _ in batch])
+            self.cursor.execute("RELEASE import_chunk")
+            return inserted, []
+        except sqlite3.Error:
+            self.cursor.execute("ROLLBACK TO import_chunk")
+        
+        inserted = 0
+        failed = []
+        for row_number, song_data, row in batch:
+            self.cursor.execute("SAVEPOINT import_row")
+            try:
+                inserted += self.insert_song_batch([song_data])
+                self.cursor.execute("RELEASE import_row")
+            except sqlite3.Error as e:
+                self.cursor.execute("ROLLBACK TO import_row")
+                self.cursor.execute("RELEASE import_row")
+                failed.append((row_number, f"insert failed: {e}", row))
+        self.cursor.execute("RELEASE import_chunk")
+        return inserted, failed
+    
+    def _save_import_progress(self, file_path: str, stat: os.stat_result, progress: Dict):
+        """Write the checkpoint and commit it together with the chunk it covers."""
+        self.cursor.execute("""
+        INSERT INTO import_progress VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(file_path) DO UPDATE SET
+            file_size = excluded.file_size, file_mtime = excluded.file_mtime,
+            byte_offset = excluded.byte_offset, row_number = excluded.row_number,
+            songs_loaded = excluded.songs_loaded,
+            duplicates_skipped = excluded.duplicates_skipped,
+            rows_rejected = excluded.rows_rejected, reject_offset = excluded.reject_offset,
+            completed = excluded.completed, updated = excluded.updated
+        """, (file_path, stat.st_size, stat.st_mtime, progress["byte_offset"],
+              progress["row_number"], progress["songs_loaded"], progress["duplicates_skipped"],
+              progress["rows_rejected"], progress["reject_offset"], progress["completed"]))
+        self.commit()
+    
+    def insert_song_batch(self, batch: List[Tuple]) -> int:
+        """
+        Insert a batch of parsed song tuples, skipping IDs that already exist.
+        
+        The caller owns the transaction; nothing is committed here.
+        
+        Args:
+            batch: Song tuples as produced by parse_song_row()
+            
+        Returns:
+            Number of songs actually inserted
+        """
+        insert_query = """
+        INSERT INTO songs (songID, song_name, artist_name, album_name, release_date,
+                          genre, explicit, duration_ms, danceability, energy,
+                          valence, tempo, loudness)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(songID) DO NOTHING
+        """
+        self.cursor.executemany(insert_query, batch)
+        # rowcount counts the INSERTs only; total_changes would also count
+        # rows written by the FTS, change-log and summary triggers
+        inserted = self.cursor.rowcount
+        if inserted:
+            self._invalidate_cache(inserted_ids={song[0] for song in batch}, drop_searches=True)
+        return inserted
+    
+    def _to_record(self, song_data: Tuple) -> Tuple:
+        """Convert a 13-column song tuple into a songs_table row."""
+        return song_data
+    
+    def merge_staged_songs(self, staged_query: str) -> int:
+        """
+        Insert the songs returned by a SELECT in one INSERT ... SELECT.
+        
+        Used to merge staging databases (see parallel_ingest). Songs whose ID
+        is already stored, or appeared earlier in the query's rows, are
+        skipped. The caller owns the transaction.
+        
+        Args:
+            staged_query: SELECT returning the 13 song columns in order
+            
+        Returns:
+            Number of songs inserted
+        """
+        columns = ", ".join(SONG_COLUMNS)
+        # "WHERE true" lets the parser tell the ON CONFLICT clause from a join
+        self.cursor.execute(f"""
+        INSERT INTO songs ({columns})
+        SELECT {columns} FROM ({staged_query}) WHERE true
+        ON CONFLICT(songID) DO NOTHING
+        """)
+        inserted = self.cursor.rowcount
+        if inserted and self.query_cache is not None:
+            self.query_cache.clear()
+        return inserted
+    
+    def upsert_song_batch(self, batch: List[Tuple]) -> int:
+        """
+        Insert new songs and overwrite stored songs whose fields differ.
+        
+        Songs identical to the stored row are left untouched, so they fire
+        no triggers. The caller owns the transaction.
+        
+        Args:
+            batch: Song tuples as produced by parse_song_row()
+            
+        Returns:
+            Number of songs inserted or updated
+        """
+        columns = self._storage_columns()
+        fields = columns[1:]
+        upsert_query = f"""
+        INSERT INTO {self.songs_table} ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+        ON CONFLICT(songID) DO UPDATE SET
+            {", ".join(f"{field} = excluded.{field}" for field in fields)}
+        WHERE ({", ".join(fields)}) IS NOT ({", ".join(f"excluded.{field}" for field in fields)})
+        """
+        self.cursor.executemany(upsert_query, [self._to_record(song) for song in batch])
+        written = self.cursor.rowcount
+        if written:
+            song_ids = {song[0] for song in batch}
+            self._invalidate_cache(changed_row=lambda song: song[0] in song_ids,
+                                   inserted_ids=song_ids, drop_searches=True)
+        return written
+    
+    def create_sync_state(self):
+        """
+        Create the per-song content hash table used by sync_songs().
+        
+        Triggers drop a song's hash when anything else updates or deletes the
+        song, so the next sync compares that song field by field instead of
+        trusting a stale hash.
+        """
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS song_hashes (
+                songID TEXT PRIMARY KEY,
+                content_hash INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_hashes_update AFTER UPDATE ON {self.songs_table} BEGIN
+                DELETE FROM song_hashes WHERE songID IN (old.songID, new.songID);
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_hashes_delete AFTER DELETE ON {self.songs_table} BEGIN
+                DELETE FROM song_hashes WHERE songID = old.songID;
+            END
+            """,
+            """
+            CREATE TEMP TABLE IF NOT EXISTS sync_incoming (
+                songID TEXT PRIMARY KEY,
+                content_hash INTEGER NOT NULL
+            )
+            """,
+            "CREATE TEMP TABLE IF NOT EXISTS sync_seen (songID TEXT PRIMARY KEY)",
+        ]
+        
+        try:
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.commit()
+        except sqlite3.Error as e:
+            print(f"Error creating sync state: {e}")
+            self.rollback()
+            raise
+    
+    def sync_songs(self, csv_file_path: str, full_snapshot: bool = False,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Apply an update CSV, writing only the songs whose content changed.
+        
+        Every row is hashed and compared with the hash stored by the previous
+        sync, so re-importing an unchanged catalog writes no song rows. New
+        and changed songs are upserted. The whole sync runs in a single
+        transaction.
+        
+        Args:
+            csv_file_path: Path to the CSV file
+            full_snapshot: The file lists the whole catalog; stored songs
+                whose ID is missing from it are deleted (a row that fails
+                to parse still keeps its song)
+            chunk_size: Number of CSV rows read and compared per batch
+            
+        Returns:
+            Dict with the inserted, updated, unchanged and deleted counts
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+        rows_processed = 0
+        valid_songs = 0
+        start_time = time.perf_counter()
+        # Songs with no stored hash (never synced, or edited since) are
+        # candidates too; the upsert skips those whose fields still match
+        changed_query = f"""
+        SELECT i.songID, s.songID IS NOT NULL
+        FROM temp.sync_incoming i
+        LEFT JOIN song_hashes h ON h.songID = i.songID
+        LEFT JOIN {self.songs_table} s ON s.songID = i.songID
+        WHERE h.content_hash IS NOT i.content_hash OR s.songID IS NULL
+        """
+        
+        self.create_sync_state()
+        try:
+            self.cursor.execute("DELETE FROM temp.sync_seen")
+            with open(csv_file_path, 'r', encoding='utf-8', newline='') as file:
+                csv_reader = csv.reader(file)
+                
+                while True:
+                    chunk = list(islice(csv_reader, chunk_size))
+                    if not chunk:
+                        break
+                    rows_processed += len(chunk)
+                    if full_snapshot:
+                        # Every listed ID is kept, even if its row fails to
+                        # parse: one bad cell must not delete the stored song
+                        self.cursor.executemany(
+                            "INSERT OR IGNORE INTO temp.sync_seen VALUES (?)",
+                            ((row[0].strip(),) for row in chunk if row and row[0].strip()))
+                    
+                    # A later row for the same ID wins, as in a load
+                    songs = {song[0]: song for song in self._parse_csv_rows(chunk)}
+                    if not songs:
+                        continue
+                    valid_songs += len(songs)
+                    hashes = {song_id: song_content_hash(song) for song_id, song in songs.items()}
+                    
+                    self.cursor.execute("DELETE FROM temp.sync_incoming")
+                    self.cursor.executemany("INSERT INTO temp.sync_incoming VALUES (?, ?)",
+                                            hashes.items())
+                    self.cursor.execute(changed_query)
+                    changed = self.cursor.fetchall()
+                    written = 0
+                    if changed:
+                        written = self.upsert_song_batch([songs[song_id] for song_id, _ in changed])
+                        # Stored after the upsert, whose update trigger clears them
+                        self.cursor.executemany("INSERT OR REPLACE INTO song_hashes VALUES (?, ?)",
+                                                ((song_id, hashes[song_id]) for song_id, _ in changed))
+                    
+                    inserted = sum(1 for _, exists in changed if not exists)
+                    counts["inserted"] += inserted
+                    counts["updated"] += written - inserted
+                    counts["unchanged"] += len(songs) - written
+            
+            if full_snapshot:
+                counts["deleted"] = self._delete_unseen_songs(valid_songs)
+            self.cursor.execute("DELETE FROM temp.sync_incoming")
+            self.cursor.execute("DELETE FROM temp.sync_seen")
+            self.commit()
+        except Exception as e:
+            print(f"Error syncing songs from CSV: {e}")
+            self.rollback()
+            raise
+        
+        self.report_load_rate(rows_processed, time.perf_counter() - start_time)
+        return counts
+    
+    def _delete_unseen_songs(self, valid_songs: int) -> int:
+        """
+        Delete stored songs missing from temp.sync_seen; returns the count.
+        
+        temp.sync_seen holds the ID of every row of the snapshot, valid or
+        not; valid_songs is how many of them parsed.
+        """
+        if not valid_songs:
+            # Most likely the wrong file; never empty the catalog because of it
+            print("The snapshot contained no valid songs; nothing was deleted.")
+            return 0
+        
+        self.cursor.execute(f"""
+        DELETE FROM {self.songs_table}
+        WHERE songID NOT IN (SELECT songID FROM temp.sync_seen)
+        """)
+        deleted = self.cursor.rowcount
+        if deleted:
+            self._invalidate_cache(changed_row=lambda song: True)
+        return deleted
+    
+    def create_duplicate_index(self):
+        """
+        Create the tables used by bulk_load_songs(dedupe=...).
+        
+        song_match_keys holds the match key and duration bucket of each
+        song; triggers drop a song's key when it is updated or deleted, and
+        load_duplicate_index() recomputes missing keys. song_duplicates
+        records each near-duplicate and the song it duplicates.
+        """
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS song_match_keys (
+                songID TEXT PRIMARY KEY,
+                match_key INTEGER NOT NULL,
+                duration_bucket INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS song_duplicates (
+                songID TEXT PRIMARY KEY,
+                duplicate_of TEXT NOT NULL,
+                merged BOOLEAN NOT NULL
+            ) WITHOUT ROWID
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_match_keys_update AFTER UPDATE ON {self.songs_table} BEGIN
+                DELETE FROM song_match_keys WHERE songID IN (old.songID, new.songID);
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS song_match_keys_delete AFTER DELETE ON {self.songs_table} BEGIN
+                DELETE FROM song_match_keys WHERE songID = old.songID;
+                DELETE FROM song_duplicates WHERE songID = old.songID AND NOT merged;
+            END
+            """,
+        ]
+        
+        try:
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.commit()
+        except sqlite3.Error as e:
+            print(f"Error creating duplicate index: {e}")
+            self.rollback()
+            raise
+    
+    def load_duplicate_index(self) -> DuplicateIndex:
+        """
+        Return an in-memory DuplicateIndex of every stored song.
+        
+        Keys are computed only for songs added or changed since they were
+        last stored, so this reads song_match_keys rather than rehashing the
+        catalog. The caller owns the transaction.
+        """
+        self.create_duplicate_index()
+        self.cursor.execute("""
+        SELECT s.songID, s.song_name, s.artist_name, s.duration_ms FROM songs s
+        WHERE NOT EXISTS (SELECT 1 FROM song_match_keys k WHERE k.songID = s.songID)
+        """)
+        while True:
+            rows = self.cursor.fetchmany(DEFAULT_CHUNK_SIZE)
+            if not rows:
+                break
+            keys = []
+            for song_id, song_name, artist_name, duration_ms in rows:
+                match_key, bucket = song_match_key(song_name, artist_name, duration_ms)
+                keys.append((song_id, match_key, bucket))
+            self.connection.executemany("INSERT INTO song_match_keys VALUES (?, ?, ?)", keys)
+        
+        duplicate_index = DuplicateIndex()
+        self.cursor.execute("SELECT songID, match_key, duration_bucket FROM song_match_keys")
+        for song_id, match_key, bucket in self.cursor:
+            duplicate_index.add(song_id, match_key, bucket)
+        return duplicate_index
+    
+    def _dedupe_batch(self, batch: List[Tuple], duplicate_index: DuplicateIndex,
+                      merge: bool) -> List[Tuple]:
+        """
+        Check a parsed batch against the duplicate index.
+        
+        Near-duplicates are written to song_duplicates and, when merging,
+        left out of the returned batch. Every song that is kept gets a match
+        key, so later rows (in this file or a later load) can match it.
+        """
+        kept = []
+        keys = []
+        duplicates = []
+        for song_data in batch:
+            match_key, bucket = song_match_key(song_data[1], song_data[2], song_data[7])
+            original = duplicate_index.find(song_data[0], match_key, bucket)
+            if original is not None:
+                duplicates.append((song_data[0], original, merge))
+                if merge:
+                    continue
+            kept.append(song_data)
+            keys.append((song_data[0], match_key, bucket))
+            duplicate_index.add(song_data[0], match_key, bucket)
+        
+        # Keys of IDs that are already stored keep their stored value
+        self.cursor.executemany("""
+        INSERT INTO song_match_keys VALUES (?, ?, ?) ON CONFLICT(songID) DO NOTHING
+        """, keys)
+        if duplicates:
+            self.cursor.executemany("""
+            INSERT INTO song_duplicates (songID, duplicate_of, merged) VALUES (?, ?, ?)
+            ON CONFLICT(songID) DO UPDATE SET
+                duplicate_of = excluded.duplicate_of, merged = excluded.merged
+            """, duplicates)
+            self.last_load_duplicates += len(duplicates)
+        return kept
+    
+    def get_duplicate_songs(self, limit: Optional[int] = None) -> List[Tuple[str, str, bool]]:
+        """
+        Return near-duplicates found by bulk_load_songs(dedupe=...).
+        
+        Args:
+            limit: Optional maximum number of rows
+            
+        Returns:
+            List of (songID, duplicate_of, merged) tuples; merged songs were
+            not loaded
+        """
+        self.cursor.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'song_duplicates'
+        """)
+        if not self.cursor.fetchone():
+            return []
+        query = "SELECT songID, duplicate_of, merged FROM song_duplicates ORDER BY duplicate_of, songID"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        self.cursor.execute(query)
+        return [(song_id, original, bool(merged)) for song_id, original, merged in self.cursor.fetchall()]
+    
+    def report_load_rate(self, rows_processed: int, elapsed: float):
+        """Print how many rows a load processed and its throughput."""
+        rate = rows_processed / elapsed if elapsed > 0 else float(rows_processed)
+        print(f"Processed {rows_processed} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+    
+    def _parse_csv_rows(self, rows: List[List[str]]) -> List[Tuple]:
+        """Parse a chunk of CSV rows, dropping empty, incomplete or invalid ones."""
+        return parse_song_rows(rows)
+    
+    def _parse_csv_row(self, row: List[str]) -> Optional[Tuple]:
+        """Parse a CSV row into song data tuple."""
+        return parse_song_row(row)
+    
+    def song_exists(self, song_id: str) -> bool:
+        """Check if a song with the given ID already exists."""
+        query = "SELECT COUNT(*) FROM songs WHERE songID = ?"
+        try:
+            self.cursor.execute(query, (song_id,))
+            count = self.cursor.fetchone()[0]
+            return count > 0
+        except sqlite3.Error as e:
+            print(f"Error checking if song exists: {e}")
+            return False
+    
+    def insert_song(self, song_data: Tuple) -> bool:
+        """Insert a single song into the database."""
+        insert_query = """
+        INSERT INTO songs (songID, song_name, artist_name, album_name, release_date,
+                          genre, explicit, duration_ms, danceability, energy,
+                          valence, tempo, loudness)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        
+        try:
             self.cursor.execute(insert_query, song_data)
+            self._invalidate_cache(new_values=dict(zip(SONG_COLUMNS, song_data)),
+                                   inserted_ids={song_data[0]})
             return True
         except sqlite3.Error as e:
             print(f"Error inserting song: {e}")
             return False
     
-    def get_all_songs(self) -> List[Tuple]:
+    def get_all_songs(self) -> List[Song]:
         """Retrieve all songs from the database."""
         query = "SELECT * FROM songs ORDER BY song_name"
         try:
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            self.song_cursor.execute(query)
+            return self.song_cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error retrieving all songs: {e}")
             return []
     
-    def search_songs_by_name(self, song_name: str) -> List[Tuple]:
-        """Search for songs by name (case-insensitive partial match)."""
+    def iter_songs(self, page_size: int = DEFAULT_PAGE_SIZE,
+                   after: Optional[Tuple[str, str]] = None) -> Iterator[Song]:
+        """
+        Stream all songs ordered by song name, one page at a time.
+        
+        Pages are fetched with keyset pagination on (song_name, songID), so
+        each page is an index range scan and only one page is held in memory.
+        
+        Args:
+            page_size: Number of songs fetched per query
+            after: Optional (song_name, songID) key; iteration starts with
+                the first song after it
+            
+        Yields:
+            Songs in (song_name, songID) order
+        """
+        first_page_query = "SELECT * FROM songs ORDER BY song_name, songID LIMIT ?"
+        next_page_query = """
+        SELECT * FROM songs
+        WHERE (song_name, songID) > (?, ?)
+        ORDER BY song_name, songID
+        LIMIT ?
+        """
+        # A private cursor keeps the generator independent of the shared
+        # cursors, which other calls may reuse between pages.
+        cursor = self.connection.cursor()
+        cursor.row_factory = Song.from_row
+        try:
+            while True:
+                if after is None:
+                    cursor.execute(first_page_query, (page_size,))
+                else:
+                    cursor.execute(next_page_query, (after[0], after[1], page_size))
+                page = cursor.fetchall()
+                
+                yield from page
+                if len(page) < page_size:
+                    return
+                after = (page[-1][1], page[-1][0])
+        except sqlite3.Error as e:
+            print(f"Error retrieving songs: {e}")
+        finally:
+            cursor.close()
+    
+    def get_song_columns(self, batch_size: int = DEFAULT_CHUNK_SIZE) -> SongColumns:
+        """
+        Load every song into a columnar result set, ordered by song name.
+        
+        Rows are fetched as plain tuples in batches and packed straight into
+        typed arrays, so no per-song object is kept. Use this instead of
+        get_all_songs() for large listings and exports.
+        
+        Args:
+            batch_size: Number of rows fetched per batch
+        """
+        columns = SongColumns()
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT * FROM songs ORDER BY song_name, songID")
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                columns.extend(batch)
+        except sqlite3.Error as e:
+            print(f"Error retrieving songs: {e}")
+        finally:
+            cursor.close()
+        return columns
+    
+    @cached_read("name")
+    def search_songs_by_name(self, song_name: str) -> List[Song]:
+        """
+        Search for songs by name (case-insensitive partial match).
+        
+        With full_text_search enabled the same songs are found through the
+        FTS5 trigram index instead of a table scan, ranked by bm25.
+        """
         query = "SELECT * FROM songs WHERE LOWER(song_name) LIKE LOWER(?) ORDER BY song_name"
         try:
-            self.cursor.execute(query, (f"%{song_name}%",))
-            return self.cursor.fetchall()
+            if self.full_text_search:
+                songs = self._fts_search(FTS_CRITERIA_COLUMNS["name"], song_name)
+                if songs is not None:
+                    return songs
+            self.song_cursor.execute(query, (f"%{song_name}%",))
+            return self.song_cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error searching songs by name: {e}")
             return []
     
-    def get_song_by_id(self, song_id: str) -> Optional[Tuple]:
+    @cached_read("song")
+    def get_song_by_id(self, song_id: str) -> Optional[Song]:
         """Get a specific song by its ID."""
         query = "SELECT * FROM songs WHERE songID = ?"
         try:
-            self.cursor.execute(query, (song_id,))
-            return self.cursor.fetchone()
+            self.song_cursor.execute(query, (song_id,))
+            return self.song_cursor.fetchone()
         except sqlite3.Error as e:
             print(f"Error retrieving song by ID: {e}")
             return None
     
     def update_song_field(self, song_id: str, field_choice: str, new_value: str) -> bool:
         """Update a specific field of a song."""
-        field_mapping = {
-            "1": "song_name",
-            "2": "album_name", 
-            "3": "artist_name",
-            "4": "release_date",
-            "5": "explicit"
-        }
-        
-        field_name = field_mapping.get(field_choice)
-        if not field_name:
+        update = self._parse_update(field_choice, new_value)
+        if not update:
             return False
+        field_name, new_value = update
         
-        # Handle explicit field conversion
-        if field_name == "explicit":
-            if new_value.lower() in ['true', '1', 'yes', 'y']:
-                new_value = 1
-            elif new_value.lower() in ['false', '0', 'no', 'n']:
-                new_value = 0
-            else:
-                print("Invalid value for explicit field. Use true/false, yes/no, or 1/0.")
-                return False
-        
-        query = f"UPDATE songs SET {field_name} = ? WHERE songID = ?"
         try:
-            self.cursor.execute(query, (new_value, song_id))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            column, stored_value = self._storage_value(field_name, new_value)
+            query = f"UPDATE {self.songs_table} SET {column} = ? WHERE songID = ?"
+            self.cursor.execute(query, (stored_value, song_id))
+            updated = self.cursor.rowcount
+            self.commit()
+            self._invalidate_cache(changed_row=lambda song: song[0] == song_id,
+                                   new_values={field_name: new_value})
+            return updated > 0
         except sqlite3.Error as e:
             print(f"Error updating song field: {e}")
-            self.connection.rollback()
+            self.rollback()
             return False
     
-    def search_songs_by_criteria(self, criteria_type: str, search_value: str) -> List[Tuple]:
+    @cached_read("criteria")
+    def search_songs_by_criteria(self, criteria_type: str, search_value: str) -> List[Song]:
         """Search songs by album, artist, or genre."""
         if criteria_type == "album":
             query = "SELECT * FROM songs WHERE LOWER(album_name) LIKE LOWER(?) ORDER BY song_name"
@@ -235,25 +1985,35 @@ class DatabaseOperations:
             return []
         
         try:
-            self.cursor.execute(query, (f"%{search_value}%",))
-            return self.cursor.fetchall()
+            if self.full_text_search:
+                songs = self._fts_search(FTS_CRITERIA_COLUMNS[criteria_type], search_value)
+                if songs is not None:
+                    return songs
+            self.song_cursor.execute(query, (f"%{search_value}%",))
+            return self.song_cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error searching songs by {criteria_type}: {e}")
             return []
     
-    def bulk_update_songs(self, songs: List[Tuple], field_choice: str, new_value: str) -> bool:
-        """Bulk update multiple songs."""
+    def _parse_update(self, field_choice: str, new_value: str) -> Optional[Tuple[str, object]]:
+        """
+        Translate an update menu choice and raw value into (field_name, value).
+        
+        Returns:
+            The field and converted value, or None if the choice or the
+            explicit value is invalid
+        """
         field_mapping = {
             "1": "song_name",
-            "2": "album_name",
-            "3": "artist_name", 
+            "2": "album_name", 
+            "3": "artist_name",
             "4": "release_date",
             "5": "explicit"
         }
         
         field_name = field_mapping.get(field_choice)
         if not field_name:
-            return False
+            return None
         
         # Handle explicit field conversion
         if field_name == "explicit":
@@ -263,72 +2023,733 @@ class DatabaseOperations:
                 new_value = 0
             else:
                 print("Invalid value for explicit field. Use true/false, yes/no, or 1/0.")
-                return False
+                return None
+        
+        return field_name, new_value
+    
+    def bulk_update_songs(self, songs: List[Tuple], field_choice: str, new_value: str) -> bool:
+        """
+        Bulk update multiple songs.
+        
+        The song IDs are staged in a temporary table and joined by the UPDATE,
+        so any number of songs can be updated without hitting SQLite's limit
+        on host parameters.
+        """
+        update = self._parse_update(field_choice, new_value)
+        if not update:
+            return False
+        field_name, new_value = update
         
         try:
-            song_ids = [song[0] for song in songs]  # songID is the first column
-            placeholders = ','.join(['?' for _ in song_ids])
-            query = f"UPDATE songs SET {field_name} = ? WHERE songID IN ({placeholders})"
+            self.cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS bulk_update_ids (songID TEXT PRIMARY KEY)")
+            self.cursor.execute("DELETE FROM temp.bulk_update_ids")
+            # songID is the first column
+            self.cursor.executemany("INSERT OR IGNORE INTO temp.bulk_update_ids VALUES (?)",
+                                    ((song[0],) for song in songs))
             
-            self.cursor.execute(query, [new_value] + song_ids)
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            column, stored_value = self._storage_value(field_name, new_value)
+            query = f"""
+            UPDATE {self.songs_table} SET {column} = ?
+            WHERE songID IN (SELECT songID FROM temp.bulk_update_ids)
+            """
+            self.cursor.execute(query, (stored_value,))
+            updated = self.cursor.rowcount
+            self.cursor.execute("DELETE FROM temp.bulk_update_ids")
+            self.commit()
+            
+            song_ids = {song[0] for song in songs}
+            self._invalidate_cache(changed_row=lambda song: song[0] in song_ids,
+                                   new_values={field_name: new_value})
+            return updated > 0
         except sqlite3.Error as e:
             print(f"Error bulk updating songs: {e}")
-            self.connection.rollback()
+            self.rollback()
             return False
     
+    def _criteria_predicate(self, criteria_type: str) -> Optional[str]:
+        """WHERE clause over songs_table matching album, artist or genre with one LIKE parameter."""
+        columns = {"album": "album_name", "artist": "artist_name", "genre": "genre"}
+        column = columns.get(criteria_type)
+        if not column:
+            return None
+        return f"LOWER({column}) LIKE LOWER(?)"
+    
+    def count_songs_by_criteria(self, criteria_type: str, search_value: str) -> int:
+        """
+        Count songs matching album, artist, or genre without fetching them.
+        
+        Uses the same predicate as bulk_update_by_criteria(), so it previews
+        exactly the rows that update would touch.
+        """
+        predicate = self._criteria_predicate(criteria_type)
+        if not predicate:
+            return 0
+        
+        query = f"SELECT COUNT(*) FROM {self.songs_table} WHERE {predicate}"
+        try:
+            self.cursor.execute(query, (f"%{search_value}%",))
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error counting songs by {criteria_type}: {e}")
+            return 0
+    
+    def bulk_update_by_criteria(self, criteria_type: str, search_value: str,
+                                field_choice: str, new_value: str) -> int:
+        """
+        Update every song matching album, artist, or genre in one statement.
+        
+        Matching rows are never fetched into Python; the criteria become the
+        WHERE clause of a single UPDATE.
+        
+        Args:
+            criteria_type: "album", "artist" or "genre"
+            search_value: Partial, case-insensitive value to match
+            field_choice: Update menu choice ("1"-"5")
+            new_value: New value for the chosen field
+            
+        Returns:
+            Number of songs updated (0 if nothing matched or on error)
+        """
+        predicate = self._criteria_predicate(criteria_type)
+        update = self._parse_update(field_choice, new_value)
+        if not predicate or not update:
+            return 0
+        field_name, new_value = update
+        
+        try:
+            column, stored_value = self._storage_value(field_name, new_value)
+            query = f"UPDATE {self.songs_table} SET {column} = ? WHERE {predicate}"
+            self.cursor.execute(query, (stored_value, f"%{search_value}%"))
+            updated = self.cursor.rowcount
+            self.commit()
+            
+            position = CRITERIA_POSITIONS[criteria_type]
+            pattern = like_regex(search_value)
+            self._invalidate_cache(
+                changed_row=lambda song: (song[position] is not None
+                                          and pattern.search(str(song[position])) is not None),
+                new_values={field_name: new_value})
+            return updated
+        except sqlite3.Error as e:
+            print(f"Error bulk updating songs by {criteria_type}: {e}")
+            self.rollback()
+            return 0
+    
     def delete_song(self, song_id: str) -> bool:
         """Delete a song by its ID."""
-        query = "DELETE FROM songs WHERE songID = ?"
+        query = f"DELETE FROM {self.songs_table} WHERE songID = ?"
         try:
             self.cursor.execute(query, (song_id,))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            deleted = self.cursor.rowcount
+            self.commit()
+            self._invalidate_cache(changed_row=lambda song: song[0] == song_id)
+            return deleted > 0
         except sqlite3.Error as e:
             print(f"Error deleting song: {e}")
-            self.connection.rollback()
+            self.rollback()
+            return False
+    
+    def create_playlist_tables(self):
+        """
+        Create the playlists and playlist_entries tables.
+        
+        Entries are ordered by a sparse integer position (appends leave
+        PLAYLIST_POSITION_GAP between entries), so inserting, moving or
+        removing an entry writes one row instead of renumbering the playlist.
+        Entries are deleted with their playlist or their song.
+        """
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS playlists (
+                playlist_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                created TEXT NOT NULL DEFAULT (datetime('now'))
+            )
+            """,
+            f"""
+            CREATE TABLE IF NOT EXISTS playlist_entries (
+                entry_id INTEGER PRIMARY KEY,
+                playlist_id INTEGER NOT NULL REFERENCES playlists (playlist_id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                songID TEXT NOT NULL REFERENCES {self.songs_table} (songID) ON DELETE CASCADE
+            )
+            """,
+            # Ordered retrieval, neighbour lookups and keyset pagination
+            """
+            CREATE INDEX IF NOT EXISTS idx_playlist_entries_position
+            ON playlist_entries (playlist_id, position, entry_id)
+            """,
+            # Lets song deletes find the entries to cascade to
+            "CREATE INDEX IF NOT EXISTS idx_playlist_entries_song ON playlist_entries (songID)",
+        ]
+        for statement in statements:
+            self.cursor.execute(statement)
+    
+    def create_playlist(self, name: str) -> Optional[int]:
+        """
+        Create an empty playlist.
+        
+        Returns:
+            The new playlist's ID, or None if the name is taken
+        """
+        try:
+            self.cursor.execute("INSERT INTO playlists (name) VALUES (?)", (name,))
+            playlist_id = self.cursor.lastrowid
+            self.commit()
+            return playlist_id
+        except sqlite3.Error as e:
+            print(f"Error creating playlist: {e}")
+            self.rollback()
+            return None
+    
+    def get_playlist_id(self, name: str) -> Optional[int]:
+        """Return the ID of the playlist with this name, or None."""
+        self.cursor.execute("SELECT playlist_id FROM playlists WHERE name = ?", (name,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+    
+    def get_playlists(self) -> List[Tuple[int, str, int]]:
+        """Return (playlist_id, name, entry_count) for every playlist, by name."""
+        self.cursor.execute("""
+        SELECT p.playlist_id, p.name,
+               (SELECT COUNT(*) FROM playlist_entries e WHERE e.playlist_id = p.playlist_id)
+        FROM playlists p
+        ORDER BY p.name
+        """)
+        return self.cursor.fetchall()
+    
+    def delete_playlist(self, playlist_id: int) -> bool:
+        """Delete a playlist and all of its entries."""
+        try:
+            self.cursor.execute("DELETE FROM playlists WHERE playlist_id = ?", (playlist_id,))
+            deleted = self.cursor.rowcount
+            self.commit()
+            return deleted > 0
+        except sqlite3.Error as e:
+            print(f"Error deleting playlist: {e}")
+            self.rollback()
             return False
     
-    def get_songs_with_null_values(self) -> List[Tuple]:
-        """Get all songs that have at least one NULL value."""
+    def append_to_playlist(self, playlist_id: int, song_ids: Iterable[str]) -> int:
+        """
+        Append songs to the end of a playlist in one statement batch.
+        
+        Args:
+            playlist_id: Playlist to extend
+            song_ids: Song IDs in the order they should be played; IDs that
+                are not in the catalog are skipped
+            
+        Returns:
+            Number of entries appended
+        """
+        append_query = f"""
+        INSERT INTO playlist_entries (playlist_id, position, songID)
+        SELECT ?, ?, songID FROM {self.songs_table} WHERE songID = ?
+        """
+        try:
+            last = self._last_position(playlist_id)
+            # Positions are numbered lazily, so song_ids may be a generator
+            entries = ((playlist_id, last + PLAYLIST_POSITION_GAP * number, song_id)
+                       for number, song_id in enumerate(song_ids, 1))
+            self.cursor.executemany(append_query, entries)
+            appended = self.cursor.rowcount
+            self.commit()
+            return appended
+        except sqlite3.Error as e:
+            print(f"Error appending to playlist: {e}")
+            self.rollback()
+            return 0
+    
+    def insert_into_playlist(self, playlist_id: int, song_id: str,
+                             before_entry_id: Optional[int] = None) -> Optional[int]:
+        """
+        Insert one song into a playlist.
+        
+        Args:
+            playlist_id: Playlist to change
+            song_id: Song to insert
+            before_entry_id: Entry the song is placed in front of; None
+                appends it
+            
+        Returns:
+            The new entry's ID, or None if the song or entry does not exist
+        """
+        try:
+            position = self._free_position(playlist_id, before_entry_id)
+            if position is None or not self.song_exists(song_id):
+                return None
+            self.cursor.execute("""
+            INSERT INTO playlist_entries (playlist_id, position, songID) VALUES (?, ?, ?)
+            """, (playlist_id, position, song_id))
+            entry_id = self.cursor.lastrowid
+            self.commit()
+            return entry_id
+        except sqlite3.Error as e:
+            print(f"Error inserting into playlist: {e}")
+            self.rollback()
+            return None
+    
+    def move_playlist_entry(self, entry_id: int, before_entry_id: Optional[int] = None) -> bool:
+        """
+        Move an entry in front of another entry of the same playlist.
+        
+        Args:
+            entry_id: Entry to move
+            before_entry_id: Entry to move it in front of; None moves it to
+                the end
+            
+        Returns:
+            True if the entry was moved
+        """
+        if entry_id == before_entry_id:
+            return False
+        try:
+            self.cursor.execute("SELECT playlist_id FROM playlist_entries WHERE entry_id = ?",
+                                (entry_id,))
+            row = self.cursor.fetchone()
+            if row is None:
+                return False
+            position = self._free_position(row[0], before_entry_id, moving_entry_id=entry_id)
+            if position is None:
+                return False
+            self.cursor.execute("UPDATE playlist_entries SET position = ? WHERE entry_id = ?",
+                                (position, entry_id))
+            self.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error moving playlist entry: {e}")
+            self.rollback()
+            return False
+    
+    def remove_from_playlist(self, entry_id: int) -> bool:
+        """Remove one entry from its playlist; the others keep their positions."""
+        try:
+            self.cursor.execute("DELETE FROM playlist_entries WHERE entry_id = ?", (entry_id,))
+            deleted = self.cursor.rowcount
+            self.commit()
+            return deleted > 0
+        except sqlite3.Error as e:
+            print(f"Error removing playlist entry: {e}")
+            self.rollback()
+            return False
+    
+    def get_playlist_songs(self, playlist_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                           after: Optional[Tuple[int, int]] = None) -> List[Tuple[int, int, Song]]:
+        """
+        Return one page of a playlist in play order.
+        
+        Pages use keyset pagination on (position, entry_id), so every page is
+        an index range scan however deep into the playlist it starts.
+        
+        Args:
+            playlist_id: Playlist to read
+            limit: Maximum number of entries
+            after: (position, entry_id) of the last entry of the previous
+                page; None starts at the beginning
+            
+        Returns:
+            List of (entry_id, position, song) tuples
+        """
         query = """
-        SELECT * FROM songs 
-        WHERE songID IS NULL OR song_name IS NULL OR artist_name IS NULL 
-           OR album_name IS NULL OR release_date IS NULL OR genre IS NULL 
-           OR explicit IS NULL OR duration_ms IS NULL OR danceability IS NULL 
-           OR energy IS NULL OR valence IS NULL OR tempo IS NULL OR loudness IS NULL
+        SELECT e.entry_id, e.position, s.*
+        FROM playlist_entries e JOIN songs s ON s.songID = e.songID
+        WHERE e.playlist_id = ? AND (e.position, e.entry_id) > (?, ?)
+        ORDER BY e.position, e.entry_id
+        LIMIT ?
+        """
+        # Positions can become negative when entries are respaced at the front
+        position, entry_id = after if after is not None else (-(1 << 63), 0)
+        try:
+            self.cursor.execute(query, (playlist_id, position, entry_id, limit))
+            return [(row[0], row[1], Song(*row[2:])) for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error retrieving playlist: {e}")
+            return []
+    
+    def iter_playlist_songs(self, playlist_id: int,
+                            page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Tuple[int, int, Song]]:
+        """Yield every (entry_id, position, song) of a playlist, page by page."""
+        after = None
+        while True:
+            page = self.get_playlist_songs(playlist_id, page_size, after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1][1], page[-1][0]
+    
+    def _last_position(self, playlist_id: int) -> int:
+        """Position of the last entry of a playlist (0 if it is empty)."""
+        self.cursor.execute("""
+        SELECT MAX(position) FROM playlist_entries WHERE playlist_id = ?
+        """, (playlist_id,))
+        last = self.cursor.fetchone()[0]
+        return 0 if last is None else last
+    
+    def _free_position(self, playlist_id: int, before_entry_id: Optional[int],
+                       moving_entry_id: Optional[int] = None) -> Optional[int]:
+        """
+        Return an unused position just in front of before_entry_id.
+        
+        If its neighbours are adjacent integers, the entries around them are
+        respaced first. The entry being moved (if any) is ignored as a
+        neighbour, since its old position becomes free. The caller owns the
+        transaction.
+        
+        Returns:
+            The position, or None if before_entry_id is not in the playlist
+        """
+        if before_entry_id is None:
+            return self._last_position(playlist_id) + PLAYLIST_POSITION_GAP
+        
+        while True:
+            self.cursor.execute("""
+            SELECT position FROM playlist_entries WHERE entry_id = ? AND playlist_id = ?
+            """, (before_entry_id, playlist_id))
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            next_position = row[0]
+            
+            self.cursor.execute("""
+            SELECT position FROM playlist_entries
+            WHERE playlist_id = ? AND (position, entry_id) < (?, ?) AND entry_id IS NOT ?
+            ORDER BY position DESC, entry_id DESC
+            LIMIT 1
+            """, (playlist_id, next_position, before_entry_id, moving_entry_id))
+            row = self.cursor.fetchone()
+            if row is None:
+                return next_position - PLAYLIST_POSITION_GAP
+            if next_position - row[0] >= 2:
+                return (row[0] + next_position) // 2
+            self._respace_playlist(playlist_id, row[0])
+    
+    def _respace_playlist(self, playlist_id: int, position: int):
+        """
+        Spread out the entries around a position that has no free neighbour.
+        
+        Takes PLAYLIST_RESPACE_WINDOW entries on each side and doubles the
+        window until its span leaves at least PLAYLIST_RESPACE_WINDOW free
+        positions between entries (or the window covers the whole playlist,
+        which may then grow past its ends). Only the entries in the window
+        are rewritten, so respacing stays local and rare.
+        """
+        window = PLAYLIST_RESPACE_WINDOW
+        while True:
+            self.cursor.execute("""
+            SELECT entry_id, position FROM playlist_entries
+            WHERE playlist_id = ? AND position <= ?
+            ORDER BY position DESC, entry_id DESC LIMIT ?
+            """, (playlist_id, position, window))
+            before = self.cursor.fetchall()[::-1]
+            self.cursor.execute("""
+            SELECT entry_id, position FROM playlist_entries
+            WHERE playlist_id = ? AND position > ?
+            ORDER BY position, entry_id LIMIT ?
+            """, (playlist_id, position, window))
+            after = self.cursor.fetchall()
+            
+            entries = before + after
+            low, high = entries[0][1], entries[-1][1]
+            needed = (len(entries) - 1) * PLAYLIST_RESPACE_WINDOW
+            if len(after) < window:
+                # Nothing follows the window: its last entry can move up
+                high = max(high, low + (len(entries) - 1) * PLAYLIST_POSITION_GAP)
+            elif len(before) < window:
+                # Nothing precedes the window: its first entry can move down
+                low = min(low, high - (len(entries) - 1) * PLAYLIST_POSITION_GAP)
+            if high - low >= needed:
+                break
+            window *= 2
+        
+        step = (high - low) / (len(entries) - 1)
+        self.cursor.executemany("UPDATE playlist_entries SET position = ? WHERE entry_id = ?",
+                                [(low + round(step * number), entry_id)
+                                 for number, (entry_id, _) in enumerate(entries)])
+    
+    def _storage_columns(self) -> Tuple[str, ...]:
+        """Columns of songs_table holding each SONG_COLUMNS field, in the same order."""
+        return SONG_COLUMNS
+    
+    def _missing_mask_sql(self) -> str:
+        """
+        SQL expression for a row's missing-field bitmask.
+        
+        Bit i is set when the i-th field of SONG_COLUMNS is NULL, so the value
+        is 0 exactly for complete songs.
+        """
+        return " | ".join(f"(({column} IS NULL) << {bit})"
+                          for bit, column in enumerate(self._storage_columns()))
+    
+    def create_quality_index(self):
+        """
+        Create the partial index over the missing-field bitmask.
+        
+        Only incomplete songs are stored in the index, so finding, counting
+        and deleting them is an index lookup rather than a 13-column scan.
+        """
+        mask = self._missing_mask_sql()
+        self.cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{self.songs_table}_missing
+        ON {self.songs_table} (({mask})) WHERE ({mask}) != 0
+        """)
+        self.commit()
+    
+    def get_songs_with_null_values(self, limit: Optional[int] = None) -> List[Song]:
+        """
+        Get all songs that have at least one NULL value.
+        
+        Args:
+            limit: Optional maximum number of songs to return
+        """
+        mask = self._missing_mask_sql()
+        query = f"""
+        SELECT * FROM songs
+        WHERE songID IN (SELECT songID FROM {self.songs_table} WHERE ({mask}) != 0)
         ORDER BY song_name
         """
+        parameters = []
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
         try:
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            self.song_cursor.execute(query, parameters)
+            return self.song_cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Error retrieving songs with NULL values: {e}")
             return []
     
-    def delete_songs_with_null_values(self) -> bool:
-        """Delete all songs that have at least one NULL value."""
-        query = """
-        DELETE FROM songs 
-        WHERE songID IS NULL OR song_name IS NULL OR artist_name IS NULL 
-           OR album_name IS NULL OR release_date IS NULL OR genre IS NULL 
-           OR explicit IS NULL OR duration_ms IS NULL OR danceability IS NULL 
-           OR energy IS NULL OR valence IS NULL OR tempo IS NULL OR loudness IS NULL
+    def count_songs_with_null_values(self) -> int:
+        """Count songs that have at least one NULL value (answered from the index)."""
+        mask = self._missing_mask_sql()
+        query = f"SELECT COUNT(*) FROM {self.songs_table} WHERE ({mask}) != 0"
+        try:
+            self.cursor.execute(query)
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error counting songs with NULL values: {e}")
+            return 0
+    
+    def get_missing_field_counts(self) -> List[Tuple[str, int]]:
         """
+        Report how many incomplete songs are missing each field.
+        
+        Returns:
+            List of (field name, number of songs where it is NULL) for every
+            field that is missing somewhere, most frequently missing first
+        """
+        mask = self._missing_mask_sql()
+        sums = ", ".join(f"SUM({column} IS NULL)" for column in self._storage_columns())
+        query = f"SELECT {sums} FROM {self.songs_table} WHERE ({mask}) != 0"
         try:
             self.cursor.execute(query)
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            counts = self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"Error counting missing fields: {e}")
+            return []
+        
+        missing = [(field, count) for field, count in zip(SONG_COLUMNS, counts) if count]
+        return sorted(missing, key=lambda item: -item[1])
+    
+    def delete_songs_with_null_values(self, batch_size: int = NULL_CLEANUP_BATCH_SIZE) -> int:
+        """
+        Delete all songs that have at least one NULL value.
+        
+        Songs are located through the missing-field index and deleted in
+        transactions of at most batch_size rows, so a large cleanup never
+        holds one huge write transaction.
+        
+        Args:
+            batch_size: Maximum number of songs deleted per transaction
+            
+        Returns:
+            Number of songs deleted
+        """
+        mask = self._missing_mask_sql()
+        query = f"""
+        DELETE FROM {self.songs_table} WHERE rowid IN (
+            SELECT rowid FROM {self.songs_table} WHERE ({mask}) != 0 LIMIT ?
+        )
+        """
+        deleted = 0
+        try:
+            while True:
+                self.cursor.execute(query, (batch_size,))
+                batch_deleted = self.cursor.rowcount
+                self.commit()
+                if batch_deleted:
+                    self._invalidate_cache(changed_row=lambda song: None in song)
+                deleted += batch_deleted
+                if batch_deleted < batch_size:
+                    return deleted
         except sqlite3.Error as e:
             print(f"Error deleting songs with NULL values: {e}")
-            self.connection.rollback()
+            self.rollback()
+            return deleted
+    
+    def _invalidate_cache(self, changed_row: Optional[Callable[[Tuple], bool]] = None,
+                          new_values: Optional[dict] = None,
+                          inserted_ids: Optional[set] = None,
+                          drop_searches: bool = False):
+        """
+        Drop cached results that a write may have made stale.
+        
+        Args:
+            changed_row: Predicate that is true for song tuples the write
+                updated or deleted; entries holding such a song are dropped
+            new_values: {field: value} stored by the write; searches that
+                could now match one of the values are dropped
+            inserted_ids: IDs of inserted songs; cached "not found" lookups
+                for them are dropped
+            drop_searches: Drop every cached search (used for batch inserts)
+        """
+        if self.query_cache is None:
+            return
+        
+        def is_stale(key: Tuple, value) -> bool:
+            kind = key[0]
+            if kind == "song":
+                if value is None:
+                    return inserted_ids is not None and key[1] in inserted_ids
+                return changed_row is not None and changed_row(value)
+            
+            if drop_searches:
+                return True
+            if changed_row is not None and any(changed_row(song) for song in value):
+                return True
+            if new_values:
+                field_name = "song_name" if kind == "name" else FTS_CRITERIA_COLUMNS.get(key[1])
+                return field_name in new_values and search_may_match(key[-1], new_values[field_name])
             return False
+        
+        self.query_cache.invalidate(is_stale)
+    
+    def get_query_stats(self) -> dict:
+        """
+        Return the instrumentation report (empty unless instrument=True).
+        
+        Returns:
+            Dict with per-method latency summaries, per-statement timings and
+            query plans (table scans under "full_scans", whole-index walks
+            under "index_scans") and the slow-query log
+        """
+        return self.query_stats.report() if self.query_stats else {}
+    
+    def reset_query_stats(self):
+        """Clear the recorded method and statement timings."""
+        if self.query_stats:
+            self.query_stats.reset()
+    
+    def get_cache_stats(self) -> dict:
+        """Return the query cache counters (empty if the cache is disabled)."""
+        return self.query_cache.stats() if self.query_cache else {}
+    
+    def _storage_value(self, field_name: str, value):
+        """Map an updatable songs field and value to the stored column and value."""
+        return field_name, value
+    
+    def commit(self):
+        """Commit the current transaction, unless batch_transaction() is deferring it."""
+        if not self.in_batch:
+            self.connection.commit()
+    
+    @contextlib.contextmanager
+    def batch_transaction(self):
+        """
+        Run several write methods as one transaction.
+        
+        Their commits are deferred until the block exits; an exception rolls
+        back every write made inside the block. A write method that fails
+        inside the block raises BatchAborted from rollback() instead of
+        returning False, and the block is rolled back even if the caller
+        swallowed that exception.
+        
+        Raises:
+            BatchAborted: If a write failed inside the block
+        """
+        self.in_batch = True
+        self.batch_failed = False
+        try:
+            yield self
+        except BaseException:
+            self.in_batch = False
+            try:
+                self.rollback()
+            finally:
+                self._run_after_batch()
+            raise
+        self.in_batch = False
+        try:
+            if self.batch_failed:
+                self.rollback()
+                raise BatchAborted("a write failed inside the batch; all of its changes were rolled back")
+            self.connection.commit()
+        finally:
+            self._run_after_batch()
+    
+    def call_after_batch(self, callback: Callable[[], None]):
+        """
+        Run callback once the current batch_transaction() commits or rolls
+        back, or right away outside a batch.
+        
+        For cleanups that cannot run while the transaction is open, such as
+        detaching a database the transaction has read.
+        """
+        if self.in_batch:
+            self.after_batch.append(callback)
+        else:
+            callback()
+    
+    def _run_after_batch(self):
+        """Run the call_after_batch() callbacks; the first error is raised after all ran."""
+        callbacks, self.after_batch = self.after_batch, []
+        error = None
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+    
+    def rollback(self):
+        """
+        Roll back the current transaction and drop results it may have cached.
+        
+        Inside batch_transaction() a rollback would silently undo the earlier
+        writes of the batch while the later ones are committed, so the batch
+        is marked failed and BatchAborted is raised instead.
+        """
+        if self.in_batch:
+            self.batch_failed = True
+            raise BatchAborted("a write failed inside batch_transaction()")
+        self.connection.rollback()
+        if self.query_cache is not None:
+            self.query_cache.clear()
+    
+    def copy_from(self, source: sqlite3.Connection, pages: int = -1):
+        """
+        Replace this database with a copy of another one (sqlite3 backup API).
+        
+        Used to fill an in-memory replica. Caches built from the old contents
+        are dropped and the optional index flags follow the copied schema.
+        
+        Args:
+            source: Connection to the database to copy
+            pages: Pages copied per backup step (-1 copies everything in one
+                step); smaller steps let other connections write in between
+        """
+        source.backup(self.connection, pages=pages)
+        self.detect_indexes()
+        self.similarity_index = None
+        if self.query_cache is not None:
+            self.query_cache.clear()
     
     def close(self):
         """Close database connection."""
         if self.cursor:
             self.cursor.close()
+            self.song_cursor.close()
         if self.connection:
             self.connection.close()
     
@@ -338,3 +2759,350 @@ class DatabaseOperations:
             self.close()
         except:
             pass  # Ignore errors during cleanup
+
+
+
+# Lookup tables used by NormalizedDatabaseOperations:
+# songs field -> (table, integer key column)
+NORMALIZED_DIMENSIONS = {
+    "artist_name": ("artists", "artist_id"),
+    "album_name": ("albums", "album_id"),
+    "genre": ("genres", "genre_id"),
+}
+
+# Select list and joins that rebuild the 13-column song tuple from song_records
+NORMALIZED_SELECT_COLUMNS = """
+    r.songID, r.song_name, a.artist_name, al.album_name, r.release_date,
+    g.genre, r.explicit, r.duration_ms, r.danceability, r.energy,
+    r.valence, r.tempo, r.loudness
+"""
+NORMALIZED_JOINS = """
+    JOIN artists a ON a.artist_id = r.artist_id
+    JOIN albums al ON al.album_id = r.album_id
+    LEFT JOIN genres g ON g.genre_id = r.genre_id
+"""
+
+
+class NormalizedDatabaseOperations(DatabaseOperations):
+    """
+    DatabaseOperations with artist, album and genre stored in lookup tables.
+    
+    Songs live in song_records with INTEGER keys into artists, albums and
+    genres. A "songs" view joins them back into the usual 13-column tuple, so
+    every read method and Helper work unchanged. Write methods resolve names
+    to keys through an in-memory cache and modify song_records directly.
+    
+    The layout must be chosen when the database is created. The FTS5 and
+    trigram indexes are not available, since they are built on the flat
+    songs table.
+    """
+    
+    songs_table = "song_records"
+    
+    def __init__(self, db_path: str = "playlist.db", **options):
+        """Initialize database connection with normalized storage."""
+        # name -> key caches, loaded per lookup table on first use
+        self._id_cache = {}
+        super().__init__(db_path, **options)
+    
+    def create_table(self):
+        """Create the lookup tables, song_records and the songs view."""
+        self.cursor.execute("SELECT type FROM sqlite_master WHERE name = 'songs'")
+        existing = self.cursor.fetchone()
+        if existing and existing[0] != "view":
+            raise sqlite3.OperationalError(
+                f"{self.db_path} already stores songs in a flat table; "
+                "normalized storage must be used with a new database")
+        
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS artists (
+                artist_id INTEGER PRIMARY KEY,
+                artist_name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS albums (
+                album_id INTEGER PRIMARY KEY,
+                album_name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS genres (
+                genre_id INTEGER PRIMARY KEY,
+                genre TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS song_records (
+                songID TEXT PRIMARY KEY,
+                song_name TEXT NOT NULL,
+                artist_id INTEGER NOT NULL REFERENCES artists (artist_id),
+                album_id INTEGER NOT NULL REFERENCES albums (album_id),
+                release_date TEXT,
+                genre_id INTEGER REFERENCES genres (genre_id),
+                explicit BOOLEAN,
+                duration_ms REAL,
+                danceability REAL,
+                energy REAL,
+                valence REAL,
+                tempo REAL,
+                loudness REAL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_song_records_artist ON song_records (artist_id)",
+            "CREATE INDEX IF NOT EXISTS idx_song_records_album ON song_records (album_id)",
+            "CREATE INDEX IF NOT EXISTS idx_song_records_genre ON song_records (genre_id)",
+            "CREATE INDEX IF NOT EXISTS idx_song_records_name_id ON song_records (song_name, songID)",
+            """
+            CREATE VIEW IF NOT EXISTS songs AS
+            SELECT {columns}
+            FROM song_records r {joins}
+            """.format(columns=NORMALIZED_SELECT_COLUMNS, joins=NORMALIZED_JOINS),
+            # Keep plain SQL written against the view working
+            """
+            CREATE TRIGGER IF NOT EXISTS songs_view_insert INSTEAD OF INSERT ON songs BEGIN
+                INSERT OR IGNORE INTO artists (artist_name) VALUES (new.artist_name);
+                INSERT OR IGNORE INTO albums (album_name) VALUES (new.album_name);
+                INSERT OR IGNORE INTO genres (genre) SELECT new.genre WHERE new.genre IS NOT NULL;
+                INSERT INTO song_records VALUES (
+                    new.songID, new.song_name,
+                    (SELECT artist_id FROM artists WHERE artist_name = new.artist_name),
+                    (SELECT album_id FROM albums WHERE album_name = new.album_name),
+                    new.release_date,
+                    (SELECT genre_id FROM genres WHERE genre = new.genre),
+                    new.explicit, new.duration_ms, new.danceability, new.energy,
+                    new.valence, new.tempo, new.loudness);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS songs_view_update INSTEAD OF UPDATE ON songs BEGIN
+                INSERT OR IGNORE INTO artists (artist_name) VALUES (new.artist_name);
+                INSERT OR IGNORE INTO albums (album_name) VALUES (new.album_name);
+                INSERT OR IGNORE INTO genres (genre) SELECT new.genre WHERE new.genre IS NOT NULL;
+                UPDATE song_records SET
+                    songID = new.songID, song_name = new.song_name,
+                    artist_id = (SELECT artist_id FROM artists WHERE artist_name = new.artist_name),
+                    album_id = (SELECT album_id FROM albums WHERE album_name = new.album_name),
+                    release_date = new.release_date,
+                    genre_id = (SELECT genre_id FROM genres WHERE genre = new.genre),
+                    explicit = new.explicit, duration_ms = new.duration_ms,
+                    danceability = new.danceability, energy = new.energy,
+                    valence = new.valence, tempo = new.tempo, loudness = new.loudness
+                WHERE songID = old.songID;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS songs_view_delete INSTEAD OF DELETE ON songs BEGIN
+                DELETE FROM song_records WHERE songID = old.songID;
+            END
+            """,
+        ]
+        
+        try:
+            for statement in statements:
+                self.cursor.execute(statement)
+            self.create_quality_index()
+            self.create_playlist_tables()
+            print("Normalized songs tables created successfully.")
+        except sqlite3.Error as e:
+            print(f"Error creating table: {e}")
+            raise
+        
+        if self.full_text_search:
+            self.full_text_search = self.create_search_index()
+        if self.group_stats:
+            self.group_stats = self.create_group_stats()
+        if self.feature_index:
+            self.feature_index = self.create_feature_index()
+    
+    def create_search_index(self) -> bool:
+        """Full-text search is not available with normalized storage."""
+        print("Full-text search is not available with normalized storage, using LIKE searches.")
+        return False
+    
+    def lookup_id(self, field_name: str, name: Optional[str]) -> Optional[int]:
+        """
+        Resolve an artist, album or genre name to its integer key.
+        
+        Names missing from the lookup table are inserted. The caller owns the
+        transaction.
+        
+        Args:
+            field_name: "artist_name", "album_name" or "genre"
+            name: Value to resolve; None stays None
+            
+        Returns:
+            Integer key for the name, or None
+        """
+        if name is None:
+            return None
+        
+        table, key_column = NORMALIZED_DIMENSIONS[field_name]
+        cache = self._id_cache.get(field_name)
+        if cache is None:
+            self.cursor.execute(f"SELECT {field_name}, {key_column} FROM {table}")
+            cache = self._id_cache[field_name] = dict(self.cursor.fetchall())
+        
+        key = cache.get(name)
+        if key is None:
+            self.cursor.execute(f"INSERT OR IGNORE INTO {table} ({field_name}) VALUES (?)", (name,))
+            self.cursor.execute(f"SELECT {key_column} FROM {table} WHERE {field_name} = ?", (name,))
+            key = cache[name] = self.cursor.fetchone()[0]
+        return key
+    
+    def merge_staged_songs(self, staged_query: str) -> int:
+        """
+        Insert the songs returned by a SELECT, resolving names set-wise.
+        
+        New artist, album and genre names are added to the lookup tables
+        first; the songs are then inserted with their keys joined in. CROSS
+        JOIN keeps the staged rows as the outer loop, so the first row of a
+        repeated songID wins, as in the flat layout.
+        """
+        for field_name, (table, _) in NORMALIZED_DIMENSIONS.items():
+            self.cursor.execute(f"""
+            INSERT OR IGNORE INTO {table} ({field_name})
+            SELECT DISTINCT {field_name} FROM ({staged_query}) WHERE {field_name} IS NOT NULL
+            """)
+        self._id_cache.clear()
+        
+        self.cursor.execute(f"""
+        INSERT INTO song_records
+        SELECT s.songID, s.song_name, a.artist_id, al.album_id, s.release_date,
+               g.genre_id, s.explicit, s.duration_ms, s.danceability, s.energy,
+               s.valence, s.tempo, s.loudness
+        FROM ({staged_query}) s
+        CROSS JOIN artists a ON a.artist_name = s.artist_name
+        CROSS JOIN albums al ON al.album_name = s.album_name
+        LEFT JOIN genres g ON g.genre = s.genre
+        WHERE true
+        ON CONFLICT(songID) DO NOTHING
+        """)
+        inserted = self.cursor.rowcount
+        if inserted and self.query_cache is not None:
+            self.query_cache.clear()
+        return inserted
+    
+    def _to_record(self, song_data: Tuple) -> Tuple:
+        """Convert a 13-column song tuple into a song_records row."""
+        return (song_data[:2]
+                + (self.lookup_id("artist_name", song_data[2]),
+                   self.lookup_id("album_name", song_data[3]),
+                   song_data[4],
+                   self.lookup_id("genre", song_data[5]))
+                + tuple(song_data[6:]))
+    
+    def insert_song(self, song_data: Tuple) -> bool:
+        """Insert a single song into the database."""
+        try:
+            record = self._to_record(song_data)
+            self.cursor.execute(
+                "INSERT INTO song_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", record)
+            self._invalidate_cache(new_values=dict(zip(SONG_COLUMNS, song_data)),
+                                   inserted_ids={song_data[0]})
+            return True
+        except sqlite3.Error as e:
+            print(f"Error inserting song: {e}")
+            return False
+    
+    def insert_song_batch(self, batch: List[Tuple]) -> int:
+        """
+        Insert a batch of parsed song tuples, skipping IDs that already exist.
+        
+        Names are resolved to keys before the insert, so the returned count
+        covers song rows only. The caller owns the transaction.
+        """
+        records = [self._to_record(song_data) for song_data in batch]
+        insert_query = """
+        INSERT INTO song_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(songID) DO NOTHING
+        """
+        self.cursor.executemany(insert_query, records)
+        inserted = self.cursor.rowcount
+        if inserted:
+            self._invalidate_cache(inserted_ids={song[0] for song in batch}, drop_searches=True)
+        return inserted
+    
+    @cached_read("criteria")
+    def search_songs_by_criteria(self, criteria_type: str, search_value: str) -> List[Song]:
+        """
+        Search songs by album, artist, or genre.
+        
+        The LIKE filter runs over the small lookup table only; matching keys
+        are then joined to song_records through its integer key index.
+        """
+        field_names = {"album": "album_name", "artist": "artist_name", "genre": "genre"}
+        field_name = field_names.get(criteria_type)
+        if not field_name:
+            return []
+        
+        table, key_column = NORMALIZED_DIMENSIONS[field_name]
+        # CROSS JOIN makes SQLite scan the lookup table first
+        query = f"""
+        SELECT {NORMALIZED_SELECT_COLUMNS}
+        FROM {table} d CROSS JOIN song_records r ON r.{key_column} = d.{key_column}
+        {NORMALIZED_JOINS}
+        WHERE LOWER(d.{field_name}) LIKE LOWER(?)
+        ORDER BY r.song_name
+        """
+        try:
+            self.song_cursor.execute(query, (f"%{search_value}%",))
+            return self.song_cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error searching songs by {criteria_type}: {e}")
+            return []
+    
+    def _group_columns(self) -> dict:
+        """song_group_stats groups song_records by the integer lookup keys."""
+        return {"artist": "artist_id", "album": "album_id", "genre": "genre_id"}
+    
+    def _group_name_sql(self, group_type: str) -> str:
+        """Resolve a song_group_stats key back to its name through the lookup table."""
+        field_name = {"artist": "artist_name", "album": "album_name", "genre": "genre"}[group_type]
+        table, key_column = NORMALIZED_DIMENSIONS[field_name]
+        return f"(SELECT {field_name} FROM {table} WHERE {key_column} = s.group_key)"
+
+    def _feature_search_query(self, index_filters: List[str], song_filters: List[str]) -> str:
+        """Feature search over song_records, whose rowids the R*Tree holds."""
+        if not index_filters:
+            return super()._feature_search_query(index_filters, song_filters)
+        where = " AND ".join(index_filters + [f.format(alias="r") for f in song_filters])
+        return f"""
+        SELECT {NORMALIZED_SELECT_COLUMNS}
+        FROM songs_features f CROSS JOIN song_records r ON r.rowid = f.id
+        {NORMALIZED_JOINS}
+        WHERE {where}
+        ORDER BY r.song_name
+        """
+
+    def _criteria_predicate(self, criteria_type: str) -> Optional[str]:
+        """WHERE clause over song_records that filters the lookup table and matches by key."""
+        field_names = {"album": "album_name", "artist": "artist_name", "genre": "genre"}
+        field_name = field_names.get(criteria_type)
+        if not field_name:
+            return None
+        table, key_column = NORMALIZED_DIMENSIONS[field_name]
+        return (f"{key_column} IN (SELECT {key_column} FROM {table} "
+                f"WHERE LOWER({field_name}) LIKE LOWER(?))")
+    
+    def _storage_columns(self) -> Tuple[str, ...]:
+        """song_records stores artist, album and genre as lookup keys."""
+        return tuple(NORMALIZED_DIMENSIONS[column][1] if column in NORMALIZED_DIMENSIONS
+                     else column for column in SONG_COLUMNS)
+    
+    def _storage_value(self, field_name: str, value):
+        """Map artist and album names to their lookup keys."""
+        if field_name in NORMALIZED_DIMENSIONS:
+            return NORMALIZED_DIMENSIONS[field_name][1], self.lookup_id(field_name, value)
+        return field_name, value
+    
+    def rollback(self):
+        """Roll back the current transaction and forget keys it may have created."""
+        super().rollback()
+        self._id_cache.clear()
+    
+    def copy_from(self, source: sqlite3.Connection, pages: int = -1):
+        """Replace this database with a copy of another and forget cached keys."""
+        super().copy_from(source, pages)
+        self._id_cache.clear()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Feature Store
+Columnar export of the songs' numeric audio features.
+
+Each feature column is written to its own .npy file, with the song IDs in a
+parallel songID.npy file and a manifest.json describing the export. Readers
+memory-map the files, so batch jobs get NumPy arrays without going through
+SQLite or building a tuple per row. The manifest records the change-log
+watermark of the export, so later refreshes only apply songs changed since.
+
+Usage:
+    python feature_store.py features/
+    python feature_store.py features/ --db playlist.db --full
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the feature store
+    np = None
+
+# Columns of the songs table exported, one .npy file each
+FEATURE_STORE_COLUMNS = ("duration_ms", "danceability", "energy", "valence",
+                         "tempo", "loudness", "explicit")
+
+MANIFEST_FILE = "manifest.json"
+SONG_ID_FILE = "songID.npy"
+
+# Rows fetched from SQLite per batch during a full export
+EXPORT_BATCH_SIZE = 10000
+
+# Song IDs looked up per query during a refresh
+REFRESH_BATCH_SIZE = 500
+
+# Smallest number of rows the files are allocated for
+MIN_CAPACITY = 1024
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The feature store requires NumPy (pip install numpy)")
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """Return the manifest of an export, or None if the directory has none."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(directory: str, manifest: Dict):
+    """Replace the manifest atomically, so readers never see a partial file."""
+    manifest["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    temp_path = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temp_path, os.path.join(directory, MANIFEST_FILE))
+
+
+def _column_file(column: str) -> str:
+    return f"{column}.npy"
+
+
+def _allocate(directory: str, capacity: int, id_width: int, suffix: str = "") -> Dict:
+    """Create empty memory-mapped files for every column and the song IDs."""
+    arrays = {
+        column: np.lib.format.open_memmap(os.path.join(directory, _column_file(column) + suffix),
+                                          mode='w+', dtype=np.float64, shape=(capacity,))
+        for column in FEATURE_STORE_COLUMNS
+    }
+    arrays["songID"] = np.lib.format.open_memmap(os.path.join(directory, SONG_ID_FILE + suffix),
+                                                 mode='w+', dtype=f"S{id_width}",
+                                                 shape=(capacity,))
+    return arrays
+
+
+def _publish(directory: str, arrays: Dict, suffix: str):
+    """Flush freshly written files and move them over the current export."""
+    for name, array in arrays.items():
+        array.flush()
+        file_name = SONG_ID_FILE if name == "songID" else _column_file(name)
+        os.replace(os.path.join(directory, file_name + suffix),
+                   os.path.join(directory, file_name))
+
+
+def _open(directory: str, mode: str = 'r') -> Dict:
+    """Memory-map every file of an existing export."""
+    arrays = {column: np.load(os.path.join(directory, _column_file(column)), mmap_mode=mode)
+              for column in FEATURE_STORE_COLUMNS}
+    arrays["songID"] = np.load(os.path.join(directory, SONG_ID_FILE), mmap_mode=mode)
+    return arrays
+
+
+def _store_rows(arrays: Dict, position: int, rows: List):
+    """Write (songID, *features) rows starting at position."""
+    end = position + len(rows)
+    arrays["songID"][position:end] = [row[0].encode('utf-8') for row in rows]
+    # None (a missing value) becomes NaN
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, len(FEATURE_STORE_COLUMNS))
+    for i, column in enumerate(FEATURE_STORE_COLUMNS):
+        arrays[column][position:end] = values[:, i]
+
+
+def export_feature_store(db_ops, directory: str) -> int:
+    """
+    Write every song's features to a new export in directory.
+
+    The files are written under temporary names and renamed into place, so
+    readers that already have the old files mapped keep a consistent view.
+
+    Args:
+        db_ops: DatabaseOperations instance to read songs from
+        directory: Directory for the .npy files and manifest
+
+    Returns:
+        Number of songs exported
+    """
+    _require_numpy()
+    os.makedirs(directory, exist_ok=True)
+    db_ops.create_change_log()
+    # Take the watermark first; changes made while exporting are replayed by
+    # the next refresh.
+    watermark = db_ops.get_change_watermark()
+
+    cursor = db_ops.connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*), MAX(LENGTH(CAST(songID AS BLOB))) FROM songs")
+        count, id_width = cursor.fetchone()
+        capacity = max(MIN_CAPACITY, count)
+        id_width = id_width or 1
+        arrays = _allocate(directory, capacity, id_width, suffix=".tmp")
+
+        cursor.execute(f"SELECT songID, {', '.join(FEATURE_STORE_COLUMNS)} FROM songs")
+        rows = 0
+        while True:
+            batch = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            # Songs inserted since the COUNT(*) are left to the next refresh
+            batch = batch[:capacity - rows]
+            _store_rows(arrays, rows, batch)
+            rows += len(batch)
+    finally:
+        cursor.close()
+
+    _publish(directory, arrays, ".tmp")
+    _write_manifest(directory, {
+        "columns": list(FEATURE_STORE_COLUMNS),
+        "rows": rows,
+        "capacity": capacity,
+        "id_width": id_width,
+        "watermark": watermark,
+        "database": os.path.abspath(db_ops.db_path),
+    })
+    return rows
+
+
+def refresh_feature_store(db_ops, directory: str) -> int:
+    """
+    Bring an export up to date with the songs changed since its watermark.
+
+    Updated songs are overwritten in place, deleted songs are replaced by the
+    last row, and new songs are appended. Falls back to a full export when
+    there is no usable export or the change set is large. Readers should
+    reopen the store after a refresh.
+
+    Args:
+        db_ops: DatabaseOperations instance to read songs and changes from
+        directory: Directory of an earlier export
+
+    Returns:
+        Number of changed songs applied
+    """
+    _require_numpy()
+    manifest = read_manifest(directory)
+    if (manifest is None or manifest["columns"] != list(FEATURE_STORE_COLUMNS)
+            or manifest.get("database") != os.path.abspath(db_ops.db_path)):
+        return export_feature_store(db_ops, directory)
+
+    db_ops.create_change_log()
+    changed_ids, watermark = db_ops.get_changed_song_ids(manifest["watermark"])
+    if not changed_ids:
+        return 0
+
+    rows = manifest["rows"]
+    # Large change sets (e.g. a bulk load) are cheaper to export in full, and
+    # IDs wider than the songID column need a new file anyway
+    if (len(changed_ids) > max(1000, rows // 10)
+            or max(len(song_id.encode('utf-8')) for song_id in changed_ids) > manifest["id_width"]):
+        export_feature_store(db_ops, directory)
+        return len(changed_ids)
+
+    current = {}
+    columns = ", ".join(FEATURE_STORE_COLUMNS)
+    for start in range(0, len(changed_ids), REFRESH_BATCH_SIZE):
+        batch = changed_ids[start:start + REFRESH_BATCH_SIZE]
+        placeholders = ",".join("?" for _ in batch)
+        query = f"SELECT songID, {columns} FROM songs WHERE songID IN ({placeholders})"
+        db_ops.cursor.execute(query, batch)
+        current.update((row[0], row) for row in db_ops.cursor.fetchall())
+
+    arrays = _open(directory, mode='r+')
+    song_ids = arrays["songID"]
+    # One vectorized scan finds where the changed songs currently live
+    wanted = np.array([song_id.encode('utf-8') for song_id in changed_ids], dtype=song_ids.dtype)
+    found = np.nonzero(np.isin(song_ids[:rows], wanted))[0]
+    positions = {song_ids[i].decode('utf-8'): int(i) for i in found}
+
+    # Deleted songs: move the last row into the freed slot, highest slot first
+    # so the moved row is never one that is still waiting to be deleted
+    deleted = sorted((positions.pop(song_id) for song_id in changed_ids
+                      if song_id not in current and song_id in positions), reverse=True)
+    for position in deleted:
+        last = rows - 1
+        if position != last:
+            for array in arrays.values():
+                array[position] = array[last]
+            moved_id = song_ids[position].decode('utf-8')
+            if moved_id in positions:
+                positions[moved_id] = position
+        rows -= 1
+
+    updates = [(positions[song_id], current[song_id]) for song_id in current if song_id in positions]
+    for position, row in updates:
+        _store_rows(arrays, position, [row])
+
+    inserts = [current[song_id] for song_id in current if song_id not in positions]
+    capacity = manifest["capacity"]
+    if rows + len(inserts) > capacity:
+        capacity = max(2 * capacity, rows + len(inserts))
+        grown = _allocate(directory, capacity, manifest["id_width"], suffix=".tmp")
+        for name, array in arrays.items():
+            grown[name][:rows] = array[:rows]
+        del arrays
+        arrays = grown
+    if inserts:
+        _store_rows(arrays, rows, inserts)
+        rows += len(inserts)
+
+    if capacity != manifest["capacity"]:
+        _publish(directory, arrays, ".tmp")
+    else:
+        for array in arrays.values():
+            array.flush()
+
+    manifest.update(rows=rows, capacity=capacity, watermark=watermark)
+    _write_manifest(directory, manifest)
+    return len(changed_ids)
+
+
+class FeatureStore:
+    """Read-only, memory-mapped view of a feature store export."""
+
+    def __init__(self, directory: str):
+        """
+        Map the files of an export; no data is copied.
+
+        Args:
+            directory: Directory written by export_feature_store()
+        """
+        _require_numpy()
+        manifest = read_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No feature store manifest in {directory}")
+
+        self.directory = directory
+        self.manifest = manifest
+        self.watermark = manifest["watermark"]
+        self.rows = manifest["rows"]
+        arrays = _open(directory)
+        self.song_ids = arrays.pop("songID")[:self.rows]
+        self.columns = {column: array[:self.rows] for column, array in arrays.items()}
+        # Built on first use by position()
+        self._positions = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, column: str):
+        """Return one feature column as a read-only memory-mapped array."""
+        return self.columns[column]
+
+    def matrix(self, columns=FEATURE_STORE_COLUMNS):
+        """Return the given columns stacked into a (rows, columns) array (copies)."""
+        return np.column_stack([self.columns[column] for column in columns])
+
+    def position(self, song_id: str) -> Optional[int]:
+        """Return the row of a song in every column, or None if not exported."""
+        if self._positions is None:
+            self._positions = {song_id.decode('utf-8'): i for i, song_id in enumerate(self.song_ids)}
+        return self._positions.get(song_id)
+
+
+def main():
+    """Export or refresh a feature store from the command line."""
+    from db_operations import DatabaseOperations
+
+    parser = argparse.ArgumentParser(description="Export song features to memory-mapped .npy files.")
+    parser.add_argument("directory", help="directory for the .npy files and manifest")
+    parser.add_argument("--db", default="playlist.db", help="SQLite database to export")
+    parser.add_argument("--full", action="store_true", help="rewrite the export instead of refreshing")
+    args = parser.parse_args()
+
+    db_ops = DatabaseOperations(args.db)
+    try:
+        start = time.perf_counter()
+        if args.full or read_manifest(args.directory) is None:
+            count = export_feature_store(db_ops, args.directory)
+            print(f"Exported {count:,} songs", end="")
+        else:
+            count = refresh_feature_store(db_ops, args.directory)
+            print(f"Applied {count:,} changed songs", end="")
+        print(f" to {args.directory} in {time.perf_counter() - start:.2f}s.")
+    finally:
+        db_ops.close()
+
+
+if __name__ == "__main__":
+    main()
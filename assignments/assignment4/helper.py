@@ -7,7 +7,8 @@ Author: [Your Name]
 Date: [Current Date]
 """
 
-from typing import List, Tuple
+from itertools import chain, islice
+from typing import Iterable, Tuple
 
 class Helper:
     """Helper class containing utility functions for the playlist application."""
@@ -16,14 +17,21 @@ class Helper:
         """Initialize the helper class."""
         pass
     
-    def display_songs_table(self, songs: List[Tuple]):
+    def display_songs_table(self, songs: Iterable[Tuple], sample_size: int = 100):
         """
         Display a formatted table of songs.
         
+        Column widths are sized from the first sample_size songs, after which
+        the remaining songs are printed as they arrive, so a generator such as
+        DatabaseOperations.iter_songs() is never held in memory.
+        
         Args:
-            songs: List of song tuples from the database
+            songs: Song tuples from the database (a list or any iterable)
+            sample_size: Number of songs used to size the columns
         """
-        if not songs:
+        songs = iter(songs)
+        sample = list(islice(songs, sample_size))
+        if not sample:
             print("No songs to display.")
             return
         
@@ -37,8 +45,8 @@ class Helper:
         # Calculate column widths
         col_widths = [len(header) for header in headers]
         
-        # Adjust widths based on data
-        for song in songs:
+        # Adjust widths based on the sampled data
+        for song in sample:
             for i, value in enumerate(song):
                 if value is not None:
                     col_widths[i] = max(col_widths[i], len(str(value)))
@@ -53,7 +61,7 @@ class Helper:
         print("-" * len(header_row))
         
         # Print data rows
-        for song in songs:
+        for song in chain(sample, songs):
             row_data = []
             for i, value in enumerate(song):
                 if value is None:
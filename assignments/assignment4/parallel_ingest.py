@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Parallel CSV Ingest
+Multi-process CSV parsing pipeline for the playlist management system.
+
+Worker processes parse byte-range shards of a songs CSV and send batches of
+ready-to-insert tuples over a bounded queue. The calling process is the only
+writer and owns the DatabaseOperations connection.
+
+parallel_load_files() loads a directory or glob of song files instead: each
+worker stages its files in a private SQLite database, and the staging
+databases are merged into songs with a single INSERT ... SELECT.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import csv
+import glob
+import itertools
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import multiprocessing
+from itertools import islice
+from queue import Empty
+from typing import List, Tuple, Optional
+
+from db_operations import DatabaseOperations, parse_song_rows
+from records import SONG_COLUMNS
+
+# Rows per batch sent from a parser process to the writer
+DEFAULT_BATCH_SIZE = 5000
+
+# Batches that may wait in the queue before parsers block
+DEFAULT_QUEUE_SIZE = 16
+
+# Seconds the writer waits for a batch before checking that the parsers
+# are still running
+QUEUE_POLL_SECONDS = 1.0
+
+
+def compute_shards(file_path: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into roughly equal byte ranges.
+
+    The ranges are not aligned to line boundaries; each parser skips to the
+    first line that starts inside its range (see read_shard_lines()).
+
+    Args:
+        file_path: Path to the CSV file
+        num_shards: Number of ranges to produce
+
+    Returns:
+        List of (start, end) byte offsets
+    """
+    file_size = os.path.getsize(file_path)
+    num_shards = max(1, min(num_shards, file_size or 1))
+    shard_size = file_size // num_shards
+
+    shards = []
+    for i in range(num_shards):
+        start = i * shard_size
+        end = file_size if i == num_shards - 1 else (i + 1) * shard_size
+        shards.append((start, end))
+    return shards
+
+
+def read_shard_lines(file_path: str, start: int, end: int):
+    """
+    Yield the decoded lines that start inside the byte range [start, end).
+
+    Fields containing embedded newlines are not supported, since a shard
+    boundary can fall inside a quoted field.
+    """
+    with open(file_path, 'rb') as file:
+        if start > 0:
+            # Finish the line that straddles the boundary; it belongs to the
+            # previous shard.
+            file.seek(start - 1)
+            file.readline()
+        position = file.tell()
+
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8')
+
+
+def _parse_shard(file_path: str, start: int, end: int, batch_size: int, queue):
+    """Worker entry point: parse one shard and stream its batches to the writer."""
+    try:
+        csv_reader = csv.reader(read_shard_lines(file_path, start, end))
+        batch_rows = []
+        for row in csv_reader:
+            batch_rows.append(row)
+            if len(batch_rows) >= batch_size:
+                queue.put(("batch", parse_song_rows(batch_rows)))
+                batch_rows = []
+        if batch_rows:
+            queue.put(("batch", parse_song_rows(batch_rows)))
+        queue.put(("done", os.getpid()))
+    except Exception as e:
+        queue.put(("error", f"shard {start}-{end}: {e}"))
+
+
+def parallel_load_songs(db_ops: DatabaseOperations, csv_file_path: str,
+                        workers: Optional[int] = None,
+                        batch_size: int = DEFAULT_BATCH_SIZE,
+                        queue_size: int = DEFAULT_QUEUE_SIZE) -> Tuple[int, int]:
+    """
+    Load songs from a large CSV file using several parser processes.
+
+    All batches are written by this process through db_ops in a single
+    transaction, so the result matches bulk_load_songs().
+
+    Args:
+        db_ops: Open DatabaseOperations instance that performs every write
+        csv_file_path: Path to the CSV file
+        workers: Number of parser processes (defaults to the CPU count)
+        batch_size: Rows per batch sent to the writer
+        queue_size: Maximum number of batches waiting to be written
+
+    Returns:
+        Tuple of (songs_loaded, duplicates_skipped)
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = compute_shards(csv_file_path, workers)
+    queue = multiprocessing.Queue(maxsize=queue_size)
+    processes = [
+        multiprocessing.Process(target=_parse_shard,
+                                args=(csv_file_path, start, end, batch_size, queue),
+                                daemon=True)
+        for start, end in shards
+    ]
+
+    songs_loaded = 0
+    duplicates_skipped = 0
+    start_time = time.perf_counter()
+
+    for process in processes:
+        process.start()
+
+    try:
+        finished = set()
+        while len(finished) < len(processes):
+            try:
+                kind, payload = queue.get(timeout=QUEUE_POLL_SECONDS)
+            except Empty:
+                # A parser killed by a signal or os._exit() never sends its
+                # "done" marker; without this check the load waits forever
+                for process in processes:
+                    if not process.is_alive() and process.pid not in finished:
+                        raise RuntimeError(f"Parser process {process.pid} exited with code "
+                                           f"{process.exitcode} before finishing its shard")
+                continue
+            if kind == "batch":
+                if payload:
+                    inserted = db_ops.insert_song_batch(payload)
+                    songs_loaded += inserted
+                    duplicates_skipped += len(payload) - inserted
+            elif kind == "done":
+                finished.add(payload)
+            else:
+                raise RuntimeError(f"Parser process failed on {payload}")
+
+        db_ops.commit()
+    except Exception as e:
+        print(f"Error loading songs from CSV: {e}")
+        # Stop the parsers first: inside batch_transaction() rollback() raises
+        for process in processes:
+            process.terminate()
+        db_ops.rollback()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    db_ops.report_load_rate(songs_loaded + duplicates_skipped,
+                            time.perf_counter() - start_time)
+    return songs_loaded, duplicates_skipped
+
+
+# Staging databases are ATTACHed together for the final merge, and SQLite
+# allows at most 10 attached databases by default
+MAX_ATTACHED_DATABASES = 10
+MAX_STAGING_WORKERS = 8
+
+# Numbers each parallel_load_files() call, so its staging schema names
+# differ from those of loads still attached in the same batch
+_staging_calls = itertools.count()
+
+# Columns of the staging table, in song tuple order
+STAGING_COLUMNS = SONG_COLUMNS
+
+
+def expand_song_files(path: str) -> List[str]:
+    """
+    Resolve a file, a directory of .csv files or a glob pattern.
+
+    Returns:
+        Sorted list of file paths; the order decides which file wins when
+        several contain the same songID
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.csv")))
+    if is_file_pattern(path):
+        return sorted(file for file in glob.glob(path) if os.path.isfile(file))
+    return [path] if os.path.isfile(path) else []
+
+
+def is_file_pattern(path: str) -> bool:
+    """True for a directory or a glob pattern, i.e. a set of song files."""
+    return os.path.isdir(path) or any(char in path for char in "*?[")
+
+
+def assign_files(files: List[str], workers: int) -> List[List[str]]:
+    """
+    Split the sorted file list into contiguous groups of similar total size.
+
+    Groups stay in file order, so merging them one after another keeps the
+    first occurrence of every songID.
+    """
+    target = sum(os.path.getsize(file) for file in files) / workers
+    groups = [[]]
+    group_size = 0
+    for file in files:
+        if group_size >= target and len(groups) < workers:
+            groups.append([])
+            group_size = 0
+        groups[-1].append(file)
+        group_size += os.path.getsize(file)
+    return groups
+
+
+def _stage_files(files: List[str], staging_path: str, batch_size: int) -> int:
+    """
+    Worker entry point: parse files into a private staging database.
+
+    Repeated songIDs within the worker's files are dropped here (the first
+    one is kept). Returns the number of valid rows parsed.
+    """
+    connection = sqlite3.connect(staging_path)
+    try:
+        # Throwaway file: no journal and no fsync
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute(f"""
+        CREATE TABLE staged_songs (
+            {", ".join(STAGING_COLUMNS)},
+            PRIMARY KEY (songID)
+        )
+        """)
+        insert_query = f"""
+        INSERT INTO staged_songs VALUES ({", ".join("?" for _ in STAGING_COLUMNS)})
+        ON CONFLICT(songID) DO NOTHING
+        """
+        parsed = 0
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8', newline='') as file:
+                csv_reader = csv.reader(file)
+                while True:
+                    chunk = list(islice(csv_reader, batch_size))
+                    if not chunk:
+                        break
+                    batch = parse_song_rows(chunk)
+                    parsed += len(batch)
+                    connection.executemany(insert_query, batch)
+        connection.commit()
+        return parsed
+    finally:
+        connection.close()
+
+
+def attached_databases(db_ops: DatabaseOperations) -> List[str]:
+    """Names of the databases ATTACHed to the db_ops connection."""
+    db_ops.cursor.execute("PRAGMA database_list")
+    return [row[1] for row in db_ops.cursor.fetchall() if row[1] not in ("main", "temp")]
+
+
+def _drop_staging(db_ops: DatabaseOperations, schemas: List[str], directory: str):
+    """Detach a load's staging databases and delete their directory."""
+    try:
+        for schema in schemas:
+            db_ops.cursor.execute("DETACH DATABASE " + schema)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def parallel_load_files(db_ops: DatabaseOperations, path: str,
+                        workers: Optional[int] = None,
+                        batch_size: int = DEFAULT_BATCH_SIZE,
+                        staging_dir: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Load every song file in a directory or glob pattern in parallel.
+
+    Worker processes each parse a contiguous group of the files into their
+    own staging database. The staging databases are then attached to the
+    db_ops connection and merged into the songs table with one
+    INSERT ... SELECT, which skips songIDs already stored or seen in an
+    earlier file. Inside batch_transaction() they stay attached, under
+    names unique to this call, until the batch commits or rolls back;
+    the attach limit then caps the workers of later loads in the batch.
+
+    Args:
+        db_ops: Open DatabaseOperations instance that performs the merge
+        path: Directory of .csv files, glob pattern or single file
+        workers: Number of parser processes (defaults to the CPU count,
+            at most MAX_STAGING_WORKERS and the number of files)
+        batch_size: Rows parsed and staged per executemany() call
+        staging_dir: Directory in which the temporary staging databases are
+            created (defaults to the system temp directory)
+
+    Returns:
+        Tuple of (songs_loaded, duplicates_skipped)
+    """
+    files = expand_song_files(path)
+    if not files:
+        raise FileNotFoundError(f"No song files match {path}")
+    free_slots = MAX_ATTACHED_DATABASES - len(attached_databases(db_ops))
+    if free_slots < 1:
+        raise RuntimeError("Too many directory loads in one batch transaction; "
+                           "commit before loading more")
+    workers = max(1, min(workers or os.cpu_count() or 1, MAX_STAGING_WORKERS, len(files),
+                         free_slots))
+    groups = assign_files(files, workers)
+    start_time = time.perf_counter()
+
+    directory = tempfile.mkdtemp(prefix="playlist-staging-", dir=staging_dir)
+    call = next(_staging_calls)
+    schemas = []
+    try:
+        staging_paths = [os.path.join(directory, f"stage{i}.db") for i in range(len(groups))]
+        with multiprocessing.Pool(len(groups)) as pool:
+            parsed = sum(pool.starmap(_stage_files, [
+                (group, staging_path, batch_size)
+                for group, staging_path in zip(groups, staging_paths)
+            ]))
+
+        try:
+            for i, staging_path in enumerate(staging_paths):
+                schema = f"stage{call}_{i}"
+                db_ops.cursor.execute("ATTACH DATABASE ? AS " + schema, (staging_path,))
+                schemas.append(schema)
+            staged = " UNION ALL ".join(
+                f"SELECT {', '.join(STAGING_COLUMNS)} FROM {schema}.staged_songs"
+                for schema in schemas)
+            songs_loaded = db_ops.merge_staged_songs(staged)
+            db_ops.commit()
+        except Exception as e:
+            print(f"Error loading songs from {path}: {e}")
+            db_ops.rollback()
+            raise
+    finally:
+        # A staging database read by an open transaction cannot be detached,
+        # so inside batch_transaction() this waits until the batch ends
+        db_ops.call_after_batch(lambda: _drop_staging(db_ops, schemas, directory))
+
+    db_ops.report_load_rate(parsed, time.perf_counter() - start_time)
+    print(f"Loaded {len(files)} files with {len(groups)} workers.")
+    return songs_loaded, parsed - songs_loaded
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Query Cache
+Bounded LRU/TTL cache for song lookups in the playlist management system.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class QueryCache:
+    """Least-recently-used cache with an optional time-to-live per entry."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of cached results before the least
+                recently used one is evicted
+            ttl: Optional number of seconds after which an entry expires
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (value, time stored)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Tuple of (found, value); value is None when not found
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self.entries[key]
+            self.expirations += 1
+
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        """Store a result, evicting the least recently used entry if full."""
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, is_stale: Callable[[Tuple, Any], bool]) -> int:
+        """
+        Drop every entry for which is_stale(key, value) is true.
+
+        Returns:
+            Number of entries dropped
+        """
+        stale_keys = [key for key, (value, _) in self.entries.items() if is_stale(key, value)]
+        for key in stale_keys:
+            del self.entries[key]
+        self.invalidations += len(stale_keys)
+        return len(stale_keys)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss/eviction counters and current size."""
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Query Statistics
+Opt-in query instrumentation for the playlist management system.
+
+QueryStats records, for every public DatabaseOperations method, a latency
+histogram and the rows it returned, and for every distinct SQL statement its
+call count, time, rows and EXPLAIN QUERY PLAN (captured the first time the
+statement runs). Plans that scan a whole table are flagged, and statements
+slower than a threshold are kept in a slow-query log.
+
+Statements are timed by InstrumentedCursor, which the connection hands out
+when created with factory=InstrumentedConnection. A statement's time covers
+its execute() call and every fetch until its rows are exhausted.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import bisect
+import functools
+import inspect
+import itertools
+import json
+import re
+import sqlite3
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Statements slower than this (milliseconds) go to the slow-query log
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+# Slow queries kept in memory
+SLOW_LOG_SIZE = 1000
+
+# Public methods left unwrapped (batch_transaction returns a context manager)
+UNTIMED_METHODS = ("get_query_stats", "reset_query_stats", "batch_transaction")
+
+# Statements that have a query plan
+PLANNED_STATEMENT = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", re.IGNORECASE)
+
+# Plan steps that read a table row by row without an index: a bare
+# "SCAN songs", but not FTS/virtual-table lookups or "SCAN CONSTANT ROW"
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(?!.*VIRTUAL TABLE)(?!.*\bUSING\b.*\bINDEX\b)")
+
+# Plan steps that walk an index from end to end, e.g. "SCAN songs USING
+# INDEX idx_songs_name_id". Reported apart from full scans: a partial index
+# or a LIMITed keyset page walks only part of it, an ORDER BY with a filter
+# the index cannot serve reads every row.
+INDEX_SCAN = re.compile(r"^SCAN (?!.*VIRTUAL TABLE).*\bUSING\b.*\bINDEX\b")
+
+
+class LatencyHistogram:
+    """Call count, total, maximum and bucketed distribution of latencies."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int = 0):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the calls recorded by another histogram to this one."""
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.rows += other.rows
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS + (self.max_ms,), self.buckets):
+            seen += count
+            if seen >= target and count:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            "calls": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class QueryStats:
+    """Collects method and statement timings for one DatabaseOperations instance."""
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+                 slow_log_path: Optional[str] = None):
+        """
+        Initialize empty statistics.
+
+        Args:
+            slow_query_ms: Statements taking longer are added to the slow-query log
+            slow_log_path: Optional file that slow queries are appended to as JSON lines
+        """
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded timing and plan."""
+        self.methods = {}
+        self.statements = {}
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        # Public methods currently running, innermost last
+        self.method_stack = []
+
+    def merge(self, other: "QueryStats"):
+        """
+        Add the timings recorded by another QueryStats, e.g. the other
+        connection of an InMemoryReplica, to this one.
+        """
+        for name, histogram in other.methods.items():
+            self.methods.setdefault(name, LatencyHistogram()).merge(histogram)
+        for key, theirs in other.statements.items():
+            entry = self.statements.get(key)
+            if entry is None:
+                entry = self.statements[key] = {**theirs, "methods": set(),
+                                                "latency": LatencyHistogram()}
+            entry["methods"] |= theirs["methods"]
+            entry["latency"].merge(theirs["latency"])
+        self.slow_queries.extend(other.slow_queries)
+        self.slow_queries = deque(sorted(self.slow_queries, key=lambda query: query["time"]),
+                                  maxlen=SLOW_LOG_SIZE)
+
+    def instrument(self, db_ops):
+        """Wrap every public method of db_ops so its calls are timed."""
+        for name, member in inspect.getmembers(type(db_ops), callable):
+            if name.startswith("_") or name in UNTIMED_METHODS:
+                continue
+            bound = getattr(db_ops, name)
+            if inspect.isgeneratorfunction(inspect.unwrap(member)):
+                setattr(db_ops, name, self._wrap_generator(name, bound))
+            else:
+                setattr(db_ops, name, self._wrap_method(name, bound))
+
+    def _wrap_method(self, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.method_stack.append(name)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            finally:
+                self.method_stack.pop()
+                self.record_method(name, 1000 * (time.perf_counter() - start), result)
+        return wrapper
+
+    def _wrap_generator(self, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # Only the time spent producing items counts, not the consumer's
+            busy = 0.0
+            rows = 0
+            generator = method(*args, **kwargs)
+            try:
+                while True:
+                    self.method_stack.append(name)
+                    start = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        busy += time.perf_counter() - start
+                        self.method_stack.pop()
+                    rows += 1
+                    yield item
+            finally:
+                self.record_method(name, 1000 * busy, rows)
+        return wrapper
+
+    def record_method(self, name: str, elapsed_ms: float, result):
+        """Add one call of a public method; rows are taken from its result."""
+        if isinstance(result, int) and not isinstance(result, bool):
+            rows = result
+        elif isinstance(result, tuple) and result and isinstance(result[0], int):
+            # e.g. (songs_loaded, duplicates_skipped)
+            rows = result[0]
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1 if result else 0
+        self.methods.setdefault(name, LatencyHistogram()).add(elapsed_ms, rows)
+
+    def statement(self, connection, sql: str, parameters) -> Dict:
+        """Return the entry for a statement, capturing its plan on first use."""
+        key = " ".join(sql.split())
+        entry = self.statements.get(key)
+        if entry is None:
+            plan = []
+            if PLANNED_STATEMENT.match(key):
+                # A plain cursor, so the EXPLAIN itself is not recorded
+                cursor = sqlite3.Cursor(connection)
+                try:
+                    cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+                    plan = [row[3] for row in cursor.fetchall()]
+                except sqlite3.Error as e:
+                    plan = [f"unavailable: {e}"]
+                finally:
+                    cursor.close()
+            entry = self.statements[key] = {
+                "sql": key,
+                "plan": plan,
+                "full_scans": [step for step in plan if FULL_SCAN.match(step)],
+                "index_scans": [step for step in plan if INDEX_SCAN.match(step)],
+                "methods": set(),
+                "latency": LatencyHistogram(),
+            }
+        entry["methods"].add(self.method_stack[-1] if self.method_stack else "(direct)")
+        return entry
+
+    def record_statement(self, entry: Dict, elapsed_ms: float, rows: int, parameters):
+        """Add one finished run of a statement and log it if it was slow."""
+        entry["latency"].add(elapsed_ms, rows)
+        if elapsed_ms < self.slow_query_ms:
+            return
+
+        slow_query = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "method": self.method_stack[-1] if self.method_stack else "(direct)",
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "sql": entry["sql"],
+            "parameters": repr(parameters)[:200],
+            "full_scans": entry["full_scans"],
+        }
+        self.slow_queries.append(slow_query)
+        if self.slow_log_path:
+            with open(self.slow_log_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(slow_query) + "\n")
+
+    def report(self) -> Dict:
+        """Return every method, statement and slow query as plain data."""
+        statements = sorted(self.statements.values(),
+                            key=lambda entry: entry["latency"].total_ms, reverse=True)
+        return {
+            "methods": {name: histogram.summary()
+                        for name, histogram in sorted(self.methods.items())},
+            "statements": [
+                {"sql": entry["sql"], "methods": sorted(entry["methods"]),
+                 **entry["latency"].summary(),
+                 "plan": entry["plan"], "full_scans": entry["full_scans"],
+                 "index_scans": entry["index_scans"]}
+                for entry in statements
+            ],
+            # Statements whose plan reads a whole table, e.g. "SCAN songs"
+            "full_scans": [
+                {"sql": entry["sql"], "methods": sorted(entry["methods"]),
+                 "steps": entry["full_scans"]}
+                for entry in statements if entry["full_scans"]
+            ],
+            # Statements that walk a whole index, e.g. "SCAN songs USING INDEX ..."
+            "index_scans": [
+                {"sql": entry["sql"], "methods": sorted(entry["methods"]),
+                 "steps": entry["index_scans"]}
+                for entry in statements if entry["index_scans"]
+            ],
+            "slow_queries": list(self.slow_queries),
+        }
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to its connection's QueryStats."""
+
+    _entry = None
+
+    def execute(self, sql: str, parameters=()):
+        stats = self.connection.query_stats
+        if stats is None:
+            return super().execute(sql, parameters)
+
+        self._finish()
+        self._begin(stats, stats.statement(self.connection, sql, parameters), parameters)
+        try:
+            return self._timed(super().execute, sql, parameters)
+        finally:
+            if self.description is None:
+                self._finish(max(self.rowcount, 0))
+
+    def executemany(self, sql: str, seq_of_parameters):
+        stats = self.connection.query_stats
+        if stats is None:
+            return super().executemany(sql, seq_of_parameters)
+
+        # The first parameter set is needed to explain the statement
+        parameters = iter(seq_of_parameters)
+        first = next(parameters, None)
+        if first is None:
+            return super().executemany(sql, [])
+        self._finish()
+        self._begin(stats, stats.statement(self.connection, sql, first), first)
+        try:
+            return self._timed(super().executemany, sql, itertools.chain([first], parameters))
+        finally:
+            self._finish(max(self.rowcount, 0))
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _begin(self, stats: QueryStats, entry: Dict, parameters):
+        self._stats = stats
+        self._entry = entry
+        self._parameters = parameters
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _timed(self, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            if self._entry is not None:
+                self._elapsed += time.perf_counter() - start
+
+    def _finish(self, rows: Optional[int] = None):
+        """Record the current statement once it has no more rows to return."""
+        if self._entry is None:
+            return
+        entry, self._entry = self._entry, None
+        self._stats.record_statement(entry, 1000 * self._elapsed,
+                                     self._rows if rows is None else rows, self._parameters)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are InstrumentedCursors."""
+
+    # Set by DatabaseOperations; None turns the instrumentation off
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+def format_report(report: Dict, limit: int = 20) -> List[str]:
+    """Render a QueryStats report as text lines for the console."""
+    lines = [f"{'Method':32} | {'calls':>7} | {'mean ms':>9} | {'p95 ms':>9} | {'max ms':>9} | {'rows':>9}"]
+    lines.append("-" * len(lines[0]))
+    for name, summary in report["methods"].items():
+        lines.append(f"{name:32} | {summary['calls']:7} | {summary['mean_ms']:9.2f} | "
+                     f"{summary['p95_ms']:9.2f} | {summary['max_ms']:9.2f} | {summary['rows']:9}")
+
+    lines.append("")
+    lines.append(f"Top {limit} statements by total time:")
+    for statement in report["statements"][:limit]:
+        flag = ("  FULL SCAN" if statement["full_scans"]
+                else "  INDEX SCAN" if statement["index_scans"] else "")
+        lines.append(f"  {statement['total_ms']:10.2f} ms  {statement['calls']:6}x  "
+                     f"{', '.join(statement['methods'])}{flag}")
+        lines.append(f"      {statement['sql'][:120]}")
+        for step in statement["plan"]:
+            lines.append(f"        {step}")
+
+    lines.append("")
+    lines.append(f"{len(report['full_scans'])} statements scan a whole table:")
+    for statement in report["full_scans"]:
+        lines.append(f"  {', '.join(statement['methods'])}: {'; '.join(statement['steps'])}")
+        lines.append(f"      {statement['sql'][:120]}")
+
+    lines.append("")
+    lines.append(f"{len(report['index_scans'])} statements walk an index from end to end:")
+    for statement in report["index_scans"]:
+        lines.append(f"  {', '.join(statement['methods'])}: {'; '.join(statement['steps'])}")
+        lines.append(f"      {statement['sql'][:120]}")
+
+    lines.append("")
+    lines.append(f"{len(report['slow_queries'])} slow queries logged.")
+    return lines
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Read Pool
+Concurrent read serving for the playlist management system.
+
+A DatabaseOperations instance holds one connection and one shared cursor,
+so it can only run one query at a time. ReadPool opens several read-only
+connections to a WAL database and runs the search and lookup methods on a
+thread pool, one connection per thread at a time. All writes go through a
+single writer connection on its own one-thread executor, so they are
+serialized and never block the readers.
+
+Usage:
+    python read_pool.py --db playlist.db --port 8408
+    curl 'http://localhost:8408/search?name=money'
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Type
+from urllib.parse import parse_qs, urlparse
+
+from db_operations import DatabaseOperations, NormalizedDatabaseOperations
+
+# Methods that only read and may run on any reader connection
+READ_METHODS = {
+    "get_song_by_id", "get_all_songs", "search_songs_by_name", "search_songs_by_criteria",
+    "fuzzy_search_songs", "count_songs_by_criteria", "get_group_stats",
+    "get_songs_with_null_values", "count_songs_with_null_values", "get_missing_field_counts",
+    "get_duplicate_songs", "search_songs_by_features", "get_playlists", "get_playlist_id", "get_playlist_songs",
+}
+
+# Methods that modify the database and run on the writer connection
+WRITE_METHODS = {
+    "insert_song", "update_song_field", "delete_song", "bulk_update_songs",
+    "bulk_update_by_criteria", "bulk_load_songs", "sync_songs", "import_songs",
+    "delete_songs_with_null_values", "create_playlist", "delete_playlist",
+    "append_to_playlist", "insert_into_playlist", "move_playlist_entry", "remove_from_playlist",
+}
+
+
+class ReadPool:
+    """Pool of read-only connections plus one serialized writer."""
+
+    def __init__(self, db_path: str = "playlist.db", readers: Optional[int] = None,
+                 db_class: Type[DatabaseOperations] = DatabaseOperations,
+                 profile: str = "read_heavy", **db_options):
+        """
+        Open the writer and the reader connections.
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            readers: Number of reader connections and threads (defaults to
+                the CPU count)
+            db_class: DatabaseOperations or NormalizedDatabaseOperations
+            profile: Connection profile; it must use WAL for readers to run
+                alongside the writer
+            db_options: Other DatabaseOperations options for the writer
+                (e.g. full_text_search=True). Readers use whichever indexes
+                the writer created.
+        """
+        readers = readers or os.cpu_count() or 1
+        # The writer creates the schema, so it must be opened first
+        self.writer = db_class(db_path, profile=profile, check_same_thread=False, **db_options)
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-writer")
+
+        # Per-reader query caches would miss the writer's invalidations, so
+        # readers always go to the database
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(db_class(db_path, profile=profile, read_only=True,
+                                      check_same_thread=False))
+        self.read_executor = ThreadPoolExecutor(max_workers=readers,
+                                                thread_name_prefix="playlist-reader")
+        self.reader_count = readers
+
+    def _run_read(self, method: str, args, kwargs):
+        """Run a read method on a free reader connection."""
+        reader = self.readers.get()
+        try:
+            return getattr(reader, method)(*args, **kwargs)
+        finally:
+            self.readers.put(reader)
+
+    def read(self, method: str, *args, **kwargs) -> Future:
+        """
+        Schedule a read method on the reader pool.
+
+        Args:
+            method: Name of a method in READ_METHODS, e.g. "search_songs_by_name"
+            args, kwargs: Arguments for that method
+
+        Returns:
+            Future holding the method's result
+        """
+        if method not in READ_METHODS:
+            raise ValueError(f"{method} is not a read method")
+        return self.read_executor.submit(self._run_read, method, args, kwargs)
+
+    def write(self, method: str, *args, **kwargs) -> Future:
+        """
+        Schedule a write method on the single writer connection.
+
+        Writes run one at a time, in the order they were submitted.
+
+        Returns:
+            Future holding the method's result
+        """
+        if method not in WRITE_METHODS:
+            raise ValueError(f"{method} is not a write method")
+        return self.write_executor.submit(getattr(self.writer, method), *args, **kwargs)
+
+    async def aread(self, method: str, *args, **kwargs):
+        """Await a read method from asyncio code."""
+        return await asyncio.wrap_future(self.read(method, *args, **kwargs))
+
+    async def awrite(self, method: str, *args, **kwargs):
+        """Await a write method from asyncio code."""
+        return await asyncio.wrap_future(self.write(method, *args, **kwargs))
+
+    def close(self):
+        """Wait for queued work, then close every connection."""
+        self.read_executor.shutdown(wait=True)
+        self.write_executor.shutdown(wait=True)
+        while not self.readers.empty():
+            self.readers.get().close()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """
+    JSON search endpoint over a ReadPool.
+
+    GET /search?name=... | ?artist=... | ?album=... | ?genre=...
+    GET /song?id=...
+    """
+
+    pool = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/song" and "id" in params:
+            song = self.pool.read("get_song_by_id", params["id"]).result()
+            songs = [song] if song else []
+        elif url.path == "/search" and "name" in params:
+            songs = self.pool.read("search_songs_by_name", params["name"]).result()
+        elif url.path == "/search" and params.keys() & {"artist", "album", "genre"}:
+            criteria_type = next(key for key in ("artist", "album", "genre") if key in params)
+            songs = self.pool.read("search_songs_by_criteria", criteria_type,
+                                   params[criteria_type]).result()
+        else:
+            self.send_json(404, {"error": "use /search?name=|artist=|album=|genre= or /song?id="})
+            return
+
+        self.send_json(200, {"count": len(songs),
+                             "songs": [song.to_dict() for song in songs]})
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep per-request logging off the console
+        pass
+
+
+def main():
+    """Serve the search endpoint from the command line."""
+    parser = argparse.ArgumentParser(description="Serve playlist searches over HTTP.")
+    parser.add_argument("--db", default="playlist.db", help="SQLite database file")
+    parser.add_argument("--port", type=int, default=8408)
+    parser.add_argument("--readers", type=int, help="reader connections (default: CPU count)")
+    parser.add_argument("--full-text-search", action="store_true", help="build and use the FTS5 index")
+    parser.add_argument("--normalized", action="store_true",
+                        help="the database uses NormalizedDatabaseOperations storage")
+    args = parser.parse_args()
+
+    db_class = NormalizedDatabaseOperations if args.normalized else DatabaseOperations
+    with ReadPool(args.db, readers=args.readers, db_class=db_class,
+                  full_text_search=args.full_text_search) as pool:
+        SearchHandler.pool = pool
+        server = ThreadingHTTPServer(("", args.port), SearchHandler)
+        print(f"Serving {args.db} on port {args.port} with {pool.reader_count} readers.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Song Records
+Record types returned by the playlist database operations.
+
+Song is a slotted record used as the row factory for song queries, so
+fields are read by name instead of by column position. SongColumns holds a
+large result column by column in typed arrays, which takes a fraction of
+the memory of one object per row.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Columns of the songs table, in the order of every song row
+SONG_COLUMNS = (
+    "songID", "song_name", "artist_name", "album_name", "release_date", "genre",
+    "explicit", "duration_ms", "danceability", "energy", "valence", "tempo", "loudness",
+)
+
+# Stored in array('d'); NULL becomes NaN
+NUMERIC_COLUMNS = ("duration_ms", "danceability", "energy", "valence", "tempo", "loudness")
+
+# Few distinct values; stored as integer codes into a list of those values
+CATEGORY_COLUMNS = ("artist_name", "album_name", "release_date", "genre")
+
+# Mostly distinct values; stored as plain lists
+TEXT_COLUMNS = ("songID", "song_name")
+
+
+class Song:
+    """
+    One row of the songs table.
+
+    Fields are attributes named after SONG_COLUMNS (song.artist_name). Songs
+    also index, iterate and compare like the 13-tuples the database methods
+    used to return, so existing positional code keeps working.
+    """
+
+    __slots__ = SONG_COLUMNS
+
+    def __init__(self, songID, song_name, artist_name, album_name, release_date, genre,
+                 explicit, duration_ms, danceability, energy, valence, tempo, loudness):
+        self.songID = songID
+        self.song_name = song_name
+        self.artist_name = artist_name
+        self.album_name = album_name
+        self.release_date = release_date
+        self.genre = genre
+        self.explicit = explicit
+        self.duration_ms = duration_ms
+        self.danceability = danceability
+        self.energy = energy
+        self.valence = valence
+        self.tempo = tempo
+        self.loudness = loudness
+
+    @classmethod
+    def from_row(cls, cursor, row: Tuple) -> "Song":
+        """sqlite3 row factory: build a Song from a SELECT * row."""
+        return cls(*row)
+
+    def astuple(self) -> Tuple:
+        """Return the fields as a tuple in SONG_COLUMNS order."""
+        return (self.songID, self.song_name, self.artist_name, self.album_name,
+                self.release_date, self.genre, self.explicit, self.duration_ms,
+                self.danceability, self.energy, self.valence, self.tempo, self.loudness)
+
+    def to_dict(self) -> Dict:
+        """Return the fields as a {column: value} dict."""
+        return dict(zip(SONG_COLUMNS, self.astuple()))
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            return getattr(self, SONG_COLUMNS[index])
+        return self.astuple()[index]
+
+    def __len__(self) -> int:
+        return len(SONG_COLUMNS)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.astuple())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Song, tuple)):
+            return self.astuple() == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+
+    def __reduce__(self):
+        return Song, self.astuple()
+
+    def __repr__(self) -> str:
+        return f"Song{self.astuple()!r}"
+
+
+class SongColumns:
+    """
+    A song result set stored column by column.
+
+    Numeric features live in array('d') (NULL as NaN), explicit in
+    array('b') (NULL as -1), and artist, album, release date and genre as
+    array('l') codes into a list of distinct values. Rows are rebuilt as
+    Song objects only when indexed or iterated.
+    """
+
+    def __init__(self):
+        """Create an empty result set."""
+        self.text = {column: [] for column in TEXT_COLUMNS}
+        self.codes = {column: array('l') for column in CATEGORY_COLUMNS}
+        self.categories = {column: [] for column in CATEGORY_COLUMNS}
+        self.explicit = array('b')
+        self.numeric = {column: array('d') for column in NUMERIC_COLUMNS}
+        # value -> code, per category column
+        self._category_codes = {column: {} for column in CATEGORY_COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple]) -> "SongColumns":
+        """Build a result set from song tuples (or Song objects)."""
+        columns = cls()
+        columns.extend(rows)
+        return columns
+
+    def extend(self, rows: Iterable[Tuple]):
+        """Append song rows in SONG_COLUMNS order."""
+        song_ids, song_names = self.text["songID"], self.text["song_name"]
+        category_positions = [(SONG_COLUMNS.index(column), self.codes[column],
+                               self.categories[column], self._category_codes[column])
+                              for column in CATEGORY_COLUMNS]
+        numeric_positions = [(SONG_COLUMNS.index(column), self.numeric[column])
+                             for column in NUMERIC_COLUMNS]
+        nan = math.nan
+
+        for row in rows:
+            song_ids.append(row[0])
+            song_names.append(row[1])
+            for position, codes, values, lookup in category_positions:
+                value = row[position]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(values)
+                    values.append(value)
+                codes.append(code)
+            explicit = row[6]
+            self.explicit.append(-1 if explicit is None else int(explicit))
+            for position, values in numeric_positions:
+                value = row[position]
+                values.append(nan if value is None else value)
+
+    def column(self, name: str) -> List:
+        """
+        Return one column.
+
+        Numeric columns and explicit are returned as their arrays (no copy);
+        text and category columns as lists of values.
+        """
+        if name in self.numeric:
+            return self.numeric[name]
+        if name == "explicit":
+            return self.explicit
+        if name in self.codes:
+            values = self.categories[name]
+            return [values[code] for code in self.codes[name]]
+        return self.text[name]
+
+    def __len__(self) -> int:
+        return len(self.text["songID"])
+
+    def __getitem__(self, index: int) -> Song:
+        if index < 0:
+            index += len(self)
+        values = {column: self.text[column][index] for column in TEXT_COLUMNS}
+        for column in CATEGORY_COLUMNS:
+            values[column] = self.categories[column][self.codes[column][index]]
+        explicit = self.explicit[index]
+        values["explicit"] = None if explicit < 0 else explicit
+        for column in NUMERIC_COLUMNS:
+            value = self.numeric[column][index]
+            values[column] = None if math.isnan(value) else value
+        return Song(**values)
+
+    def __iter__(self) -> Iterator[Song]:
+        return (self[i] for i in range(len(self)))
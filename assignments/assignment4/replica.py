@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - In-Memory Replica
+Hot read-only copy of the playlist database for search-heavy sessions.
+
+InMemoryReplica copies the database file into a :memory: connection with the
+sqlite3 backup API and serves every read method from that copy, while all
+writes still go to the file, which stays the source of truth. The copy is
+kept current in one of two ways:
+
+- apply (default): small writes (single-song edits, bulk updates) are run
+  on the file and then replayed on the copy; loads, syncs, NULL cleanup and
+  commits made by other connections to the file mark the copy stale, and it
+  is re-copied before the next read
+- refresh_interval=N: writes are not replayed; the copy is re-copied, in
+  page-sized backup steps, at most every N seconds once the file changed
+
+With instrument=True, get_query_stats() reports the reads served by the
+copy and the writes run on the file together.
+
+Usage:
+    replica = InMemoryReplica("playlist.db", full_text_search=True)
+    songs = replica.search_songs_by_name("money")   # served from RAM
+    replica.update_song_field(song_id, "1", "New")  # file, then the copy
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import contextlib
+import io
+import time
+from typing import Optional, Type
+
+from db_operations import DatabaseOperations
+from query_stats import QueryStats
+from read_pool import READ_METHODS, WRITE_METHODS
+
+# Read methods served from the in-memory copy
+REPLICA_READ_METHODS = READ_METHODS | {
+    "iter_songs", "get_song_columns", "find_similar_songs", "song_exists", "get_cache_stats",
+    "iter_playlist_songs", "get_change_watermark", "get_changed_song_ids",
+}
+
+# Writes cheap enough to run twice; other writes re-copy the database instead.
+# append_to_playlist is not replayed since its song IDs may be a one-shot
+# generator, nor create_playlist, whose creation time could differ.
+REPLAYED_WRITE_METHODS = {
+    "insert_song", "update_song_field", "delete_song", "bulk_update_songs",
+    "bulk_update_by_criteria", "insert_into_playlist", "move_playlist_entry",
+    "remove_from_playlist", "delete_playlist",
+}
+
+# Pages copied per backup step when refreshing the copy
+REPLICA_BACKUP_PAGES = 4096
+
+
+class InMemoryReplica:
+    """DatabaseOperations facade that reads from RAM and writes to disk."""
+
+    def __init__(self, db_path: str = "playlist.db",
+                 db_class: Type[DatabaseOperations] = DatabaseOperations,
+                 refresh_interval: Optional[float] = None,
+                 backup_pages: int = REPLICA_BACKUP_PAGES, **db_options):
+        """
+        Open the database file and copy it into memory.
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            db_class: DatabaseOperations or NormalizedDatabaseOperations
+            refresh_interval: If set, refresh the copy by backup at most
+                every refresh_interval seconds instead of replaying writes
+            backup_pages: Pages copied per backup step
+            db_options: DatabaseOperations options (full_text_search=True,
+                cache_size=..., ...); the query cache lives on the copy
+        """
+        self.writer = db_class(db_path, **db_options)
+        # The copy's own table creation is replaced by the backup, so its
+        # messages are not worth printing twice
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.replica = db_class(":memory:", **db_options)
+        self.refresh_interval = refresh_interval
+        self.backup_pages = backup_pages
+        self.stale = False
+        self.refreshes = 0
+        self.refresh()
+
+    def refresh(self):
+        """Copy the database file into the in-memory replica now."""
+        self.replica.copy_from(self.writer.connection, pages=self.backup_pages)
+        self.data_version = self._data_version()
+        self.last_refresh = time.monotonic()
+        self.stale = False
+        self.refreshes += 1
+
+    def _data_version(self) -> int:
+        """Change counter of the file: other connections' commits and our own."""
+        self.writer.cursor.execute("PRAGMA data_version")
+        return self.writer.cursor.fetchone()[0] + self.writer.connection.total_changes
+
+    def _refresh_if_needed(self):
+        """Re-copy a stale replica before a read, once the writer has committed."""
+        if self.writer.connection.in_transaction:
+            # Uncommitted changes are not visible to readers of the file
+            # either; copy them once they are committed
+            return
+        if (self.refresh_interval is not None
+                and time.monotonic() - self.last_refresh < self.refresh_interval):
+            return
+        if self.stale or self._data_version() != self.data_version:
+            self.refresh()
+
+    def _write(self, name: str, method):
+        def write(*args, **kwargs):
+            # Replaying only keeps the copy current if nothing else (another
+            # connection's commit) changed the file since it was current
+            replay = (self.refresh_interval is None and name in REPLAYED_WRITE_METHODS
+                      and not self.stale and self._data_version() == self.data_version)
+            result = method(*args, **kwargs)
+            if replay:
+                self._replay(name, args, kwargs)
+                self.data_version = self._data_version()
+            else:
+                self.stale = True
+            return result
+        return write
+
+    def _replay(self, name: str, args, kwargs):
+        """Run a write on the copy, untimed, so query stats count each call once."""
+        connection = self.replica.connection
+        stats = self.replica.query_stats
+        if stats is not None:
+            connection.query_stats = None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                # The class's method, not the instance's timing wrapper
+                getattr(type(self.replica), name)(self.replica, *args, **kwargs)
+        finally:
+            if stats is not None:
+                connection.query_stats = stats
+
+    def _read(self, method):
+        def read(*args, **kwargs):
+            self._refresh_if_needed()
+            return method(*args, **kwargs)
+        return read
+
+    def __getattr__(self, name: str):
+        # Only called for names InMemoryReplica does not define itself
+        if name in REPLICA_READ_METHODS:
+            return self._read(getattr(self.replica, name))
+        attribute = getattr(self.writer, name)
+        if name in WRITE_METHODS or callable(getattr(type(self.writer), name, None)):
+            # Any other method (create_*, merge_staged_songs, ...) may change
+            # the file, so the copy is re-copied after it
+            return self._write(name, attribute)
+        return attribute
+
+    def get_query_stats(self) -> dict:
+        """
+        Return the instrumentation report of the file and the copy combined
+        (empty unless instrument=True); replayed writes are not counted.
+        """
+        if self.writer.query_stats is None:
+            return {}
+        combined = QueryStats(self.writer.query_stats.slow_query_ms)
+        combined.merge(self.writer.query_stats)
+        combined.merge(self.replica.query_stats)
+        return combined.report()
+
+    def reset_query_stats(self):
+        """Clear the recorded timings of both connections."""
+        self.writer.reset_query_stats()
+        self.replica.reset_query_stats()
+
+    @contextlib.contextmanager
+    def batch_transaction(self):
+        """
+        Run the writer's batch_transaction(); replayed writes are undone by
+        re-copying the file if it rolls back.
+        """
+        try:
+            with self.writer.batch_transaction():
+                yield self
+        except BaseException:
+            self.stale = True
+            raise
+
+    def commit(self):
+        """Commit the writer's transaction."""
+        self.writer.commit()
+
+    def rollback(self):
+        """Roll back the writer and re-copy the file before the next read."""
+        self.writer.rollback()
+        self.stale = True
+
+    def close(self):
+        """Close the file and drop the in-memory copy."""
+        self.replica.close()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+CPSC 408 Assignment 04 - Song Similarity
+Audio-feature similarity search for the playlist management system.
+
+The numeric audio features of every song are held in one normalized float32
+NumPy matrix, so a "songs like this" query is a single vectorized distance
+computation instead of a Python loop over rows.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for similarity search
+    np = None
+
+# Columns of the songs table used as the feature vector
+FEATURE_COLUMNS = ("danceability", "energy", "valence", "tempo", "loudness", "duration_ms")
+
+# Song IDs looked up per query when applying changes
+REFRESH_BATCH_SIZE = 500
+
+
+class SimilarityIndex:
+    """In-memory nearest-neighbour index over the songs' audio features."""
+
+    def __init__(self, db_ops):
+        """
+        Load every song's features from the database.
+
+        Args:
+            db_ops: DatabaseOperations instance to read songs and changes from
+        """
+        if np is None:
+            raise ImportError("Similarity search requires NumPy (pip install numpy)")
+
+        self.db_ops = db_ops
+        self.db_ops.create_change_log()
+        self.rebuild()
+
+    def rebuild(self):
+        """Reload the full feature matrix and recompute the normalization."""
+        # Take the watermark first; changes made while loading are replayed
+        # by the next refresh().
+        self.watermark = self.db_ops.get_change_watermark()
+
+        query = f"SELECT songID, {', '.join(FEATURE_COLUMNS)} FROM songs"
+        self.db_ops.cursor.execute(query)
+        rows = self.db_ops.cursor.fetchall()
+
+        self.song_ids = [row[0] for row in rows]
+        self.positions = {song_id: i for i, song_id in enumerate(self.song_ids)}
+        raw = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+
+        # z-score each feature so tempo and duration do not dominate; missing
+        # values become the column mean (0 after scaling)
+        if len(raw):
+            self.mean = np.nan_to_num(np.nanmean(raw, axis=0))
+            scale = np.nan_to_num(np.nanstd(raw, axis=0))
+            self.scale = np.where(scale > 0, scale, 1.0)
+        else:
+            self.mean = np.zeros(len(FEATURE_COLUMNS))
+            self.scale = np.ones(len(FEATURE_COLUMNS))
+
+        self.size = len(rows)
+        self.vectors = np.zeros((max(self.size, 1024), len(FEATURE_COLUMNS)), dtype=np.float32)
+        self.norms = np.zeros(len(self.vectors), dtype=np.float32)
+        if self.size:
+            self.vectors[:self.size] = self._normalize(raw)
+            self.norms[:self.size] = np.einsum("ij,ij->i", self.vectors[:self.size],
+                                               self.vectors[:self.size])
+
+    def _normalize(self, raw):
+        """Scale raw feature rows with the stored mean and standard deviation."""
+        return np.nan_to_num((raw - self.mean) / self.scale).astype(np.float32)
+
+    def refresh(self):
+        """Apply songs inserted, updated or deleted since the last refresh."""
+        changed_ids, watermark = self.db_ops.get_changed_song_ids(self.watermark)
+        if not changed_ids:
+            return
+
+        # Large change sets (e.g. a bulk load) are cheaper to reload in full
+        if len(changed_ids) > max(1000, self.size // 10):
+            self.rebuild()
+            return
+
+        current = {}
+        columns = ", ".join(FEATURE_COLUMNS)
+        for start in range(0, len(changed_ids), REFRESH_BATCH_SIZE):
+            batch = changed_ids[start:start + REFRESH_BATCH_SIZE]
+            placeholders = ",".join("?" for _ in batch)
+            query = f"SELECT songID, {columns} FROM songs WHERE songID IN ({placeholders})"
+            self.db_ops.cursor.execute(query, batch)
+            current.update((row[0], row[1:]) for row in self.db_ops.cursor.fetchall())
+
+        for song_id in changed_ids:
+            if song_id in current:
+                self._upsert(song_id, current[song_id])
+            else:
+                self._remove(song_id)
+        self.watermark = watermark
+
+    def _upsert(self, song_id: str, features: Tuple):
+        """Insert or overwrite one song's feature vector."""
+        position = self.positions.get(song_id)
+        if position is None:
+            if self.size == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+                self.norms = np.concatenate([self.norms, np.zeros_like(self.norms)])
+            position = self.size
+            self.size += 1
+            self.song_ids.append(song_id)
+            self.positions[song_id] = position
+
+        vector = self._normalize(np.array([features], dtype=np.float64))[0]
+        self.vectors[position] = vector
+        self.norms[position] = vector @ vector
+
+    def _remove(self, song_id: str):
+        """Drop a song by moving the last row into its slot."""
+        position = self.positions.pop(song_id, None)
+        if position is None:
+            return
+
+        last = self.size - 1
+        if position != last:
+            moved_id = self.song_ids[last]
+            self.vectors[position] = self.vectors[last]
+            self.norms[position] = self.norms[last]
+            self.song_ids[position] = moved_id
+            self.positions[moved_id] = position
+        self.song_ids.pop()
+        self.size -= 1
+
+    def nearest(self, song_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Return the k songs closest to song_id in normalized feature space.
+
+        Args:
+            song_id: ID of the query song
+            k: Number of neighbours to return
+
+        Returns:
+            List of (songID, Euclidean distance) pairs, closest first; empty if
+            the song is unknown
+        """
+        position = self.positions.get(song_id)
+        if position is None or self.size < 2 or k < 1:
+            return []
+
+        vectors = self.vectors[:self.size]
+        query = vectors[position]
+        # |a - b|^2 = |a|^2 - 2 a.b + |b|^2, computed for every song at once
+        distances = self.norms[:self.size] - 2.0 * (vectors @ query) + self.norms[position]
+        distances[position] = np.inf
+
+        k = min(k, self.size - 1)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self.song_ids[i], float(np.sqrt(max(distances[i], 0.0)))) for i in nearest]
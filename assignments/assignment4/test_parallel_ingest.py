@@ -0,0 +1,47 @@
+"""
+CPSC 408 Assignment 04 - Parallel Ingest Tests
+Parser processes load a CSV in shards; a parser that dies aborts the load.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import os
+
+import pytest
+
+import parallel_ingest
+from conftest import song_row
+
+parse_shard = parallel_ingest._parse_shard
+
+
+def crash_after_first_shard(file_path, start, end, batch_size, queue):
+    """Parser stand-in: later shards exit like a worker killed mid-shard."""
+    if start > 0:
+        os._exit(3)
+    parse_shard(file_path, start, end, batch_size, queue)
+
+
+def count_songs(db_ops) -> int:
+    db_ops.cursor.execute("SELECT COUNT(*) FROM songs")
+    return db_ops.cursor.fetchone()[0]
+
+
+def test_parallel_load_matches_a_serial_load(db, write_csv):
+    path = write_csv("songs.csv", [song_row(number) for number in range(1, 101)])
+
+    assert parallel_ingest.parallel_load_songs(db, path, workers=3, batch_size=7) == (100, 0)
+    assert count_songs(db) == 100
+
+
+def test_parser_that_dies_aborts_the_load(db, write_csv, monkeypatch):
+    # Worker processes are forked, so they run the patched function
+    monkeypatch.setattr(parallel_ingest, "_parse_shard", crash_after_first_shard)
+    monkeypatch.setattr(parallel_ingest, "QUEUE_POLL_SECONDS", 0.1)
+    path = write_csv("songs.csv", [song_row(number) for number in range(1, 101)])
+
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        parallel_ingest.parallel_load_songs(db, path, workers=2, batch_size=7)
+
+    assert count_songs(db) == 0
@@ -0,0 +1,111 @@
+"""
+CPSC 408 Assignment 04 - Playlist Tests
+Playlists keep their order through inserts, moves and removals, including
+the local respacing of crowded positions, and page through keyset pages.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import random
+
+import pytest
+
+from conftest import song_row
+
+
+@pytest.fixture
+def playlist_db(db, write_csv):
+    db.bulk_load_songs(write_csv("songs.csv", [song_row(number) for number in range(1, 21)]))
+    return db
+
+
+def song_ids(db_ops, playlist_id: int, page_size: int = 500) -> list:
+    return [song.songID for _, _, song in db_ops.iter_playlist_songs(playlist_id, page_size)]
+
+
+def entry_ids(db_ops, playlist_id: int) -> list:
+    return [entry_id for entry_id, _, _ in db_ops.iter_playlist_songs(playlist_id)]
+
+
+def test_append_keeps_order_and_skips_unknown_songs(playlist_db):
+    playlist_id = playlist_db.create_playlist("mix")
+
+    appended = playlist_db.append_to_playlist(
+        playlist_id, iter(["song0003", "missing", "song0001", "song0003"]))
+
+    assert appended == 3
+    assert song_ids(playlist_db, playlist_id) == ["song0003", "song0001", "song0003"]
+    assert playlist_db.get_playlists() == [(playlist_id, "mix", 3)]
+
+
+def test_insert_move_and_remove(playlist_db):
+    playlist_id = playlist_db.create_playlist("mix")
+    playlist_db.append_to_playlist(playlist_id, ["song0001", "song0002", "song0003"])
+    first, second, third = entry_ids(playlist_db, playlist_id)
+
+    assert playlist_db.insert_into_playlist(playlist_id, "song0004", before_entry_id=second)
+    assert playlist_db.move_playlist_entry(third, before_entry_id=first)
+    assert playlist_db.remove_from_playlist(second)
+
+    assert song_ids(playlist_db, playlist_id) == ["song0003", "song0001", "song0004"]
+    assert playlist_db.insert_into_playlist(playlist_id, "missing") is None
+    assert playlist_db.insert_into_playlist(playlist_id, "song0005", before_entry_id=second) is None
+    assert not playlist_db.move_playlist_entry(first, before_entry_id=first)
+
+
+def test_crowded_positions_are_respaced(playlist_db):
+    playlist_id = playlist_db.create_playlist("mix")
+    playlist_db.append_to_playlist(playlist_id, ["song0001", "song0002"])
+    last = entry_ids(playlist_db, playlist_id)[1]
+
+    # Each insert halves the gap in front of the last entry until it is used up
+    for number in range(3, 21):
+        playlist_db.insert_into_playlist(playlist_id, f"song{number:04d}", before_entry_id=last)
+
+    expected = ["song0001"] + [f"song{number:04d}" for number in range(3, 21)] + ["song0002"]
+    assert song_ids(playlist_db, playlist_id) == expected
+    positions = [position for _, position, _ in playlist_db.iter_playlist_songs(playlist_id)]
+    assert len(set(positions)) == len(positions)
+
+
+def test_random_edits_match_a_list(playlist_db):
+    rng = random.Random(24)
+    playlist_id = playlist_db.create_playlist("mix")
+    playlist_db.append_to_playlist(playlist_id, [f"song{number:04d}" for number in range(1, 11)])
+    expected = list(zip(entry_ids(playlist_db, playlist_id),
+                        song_ids(playlist_db, playlist_id)))
+
+    for _ in range(200):
+        action = rng.choice(["insert", "move", "remove"]) if expected else "insert"
+        before = rng.choice(expected + [None]) if expected else None
+        before_entry_id = before[0] if before else None
+        index = expected.index(before) if before else len(expected)
+        if action == "insert":
+            song_id = f"song{rng.randint(1, 20):04d}"
+            entry_id = playlist_db.insert_into_playlist(playlist_id, song_id, before_entry_id)
+            expected.insert(index, (entry_id, song_id))
+        elif action == "move":
+            entry = rng.choice(expected)
+            if playlist_db.move_playlist_entry(entry[0], before_entry_id):
+                expected.remove(entry)
+                expected.insert(expected.index(before) if before else len(expected), entry)
+        else:
+            entry = rng.choice(expected)
+            assert playlist_db.remove_from_playlist(entry[0])
+            expected.remove(entry)
+
+    assert song_ids(playlist_db, playlist_id, page_size=7) == [song_id for _, song_id in expected]
+
+
+def test_entries_go_with_their_song_and_playlist(playlist_db):
+    playlist_id = playlist_db.create_playlist("mix")
+    playlist_db.append_to_playlist(playlist_id, ["song0001", "song0002"])
+
+    playlist_db.delete_song("song0001")
+    assert song_ids(playlist_db, playlist_id) == ["song0002"]
+
+    assert playlist_db.delete_playlist(playlist_id)
+    assert playlist_db.get_playlists() == []
+    playlist_db.cursor.execute("SELECT COUNT(*) FROM playlist_entries")
+    assert playlist_db.cursor.fetchone()[0] == 0
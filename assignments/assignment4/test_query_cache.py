@@ -0,0 +1,86 @@
+"""
+CPSC 408 Assignment 04 - Query Cache Tests
+Cached reads share one entry however they are called, and writes drop the
+entries they make stale, including searches with LIKE wildcards.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import song_row
+from db_operations import DatabaseOperations, like_regex, parse_song_row
+
+
+@pytest.fixture
+def cached_db(tmp_path, write_csv):
+    db_ops = DatabaseOperations(str(tmp_path / "cached.db"), cache_size=100)
+    db_ops.bulk_load_songs(write_csv("songs.csv", [
+        song_row(1, "Time", "Pink Floyd"), song_row(2, "Money", "Pink Floyd")]))
+    yield db_ops
+    db_ops.close()
+
+
+def test_positional_and_keyword_calls_share_an_entry(cached_db):
+    cached_db.search_songs_by_criteria("artist", "floyd")
+    cached_db.search_songs_by_criteria(criteria_type="artist", search_value="floyd")
+    cached_db.search_songs_by_criteria("artist", search_value="floyd")
+
+    assert cached_db.get_cache_stats()["hits"] == 2
+
+
+@pytest.mark.parametrize("search", [
+    lambda db_ops: db_ops.search_songs_by_criteria("artist", "floyd"),
+    lambda db_ops: db_ops.search_songs_by_criteria(criteria_type="artist", search_value="floyd"),
+    lambda db_ops: db_ops.search_songs_by_name(song_name="Time"),
+], ids=["positional", "keywords", "name-keyword"])
+def test_insert_drops_searches_the_new_song_matches(cached_db, search):
+    before = len(search(cached_db))
+
+    assert cached_db.insert_song(parse_song_row(song_row(3, "Timeless", "Pink Floyd")))
+
+    assert len(search(cached_db)) == before + 1
+
+
+def test_update_drops_the_cached_song(cached_db):
+    cached_db.get_song_by_id(song_id="song0001")
+
+    cached_db.update_song_field("song0001", "1", "Renamed")
+
+    assert cached_db.get_song_by_id("song0001").song_name == "Renamed"
+
+
+@pytest.mark.parametrize("search", [
+    lambda db_ops: db_ops.search_songs_by_name("T_me"),
+    lambda db_ops: db_ops.search_songs_by_name("T%e"),
+    lambda db_ops: db_ops.search_songs_by_criteria("artist", "P_nk"),
+    lambda db_ops: db_ops.search_songs_by_criteria("artist", "k%oyd"),
+], ids=["name-underscore", "name-percent", "criteria-underscore", "criteria-percent"])
+def test_insert_drops_wildcard_searches_the_new_song_matches(cached_db, search):
+    before = len(search(cached_db))
+
+    assert cached_db.insert_song(parse_song_row(song_row(3, "Tome", "Punk Floyd")))
+
+    assert len(search(cached_db)) == before + 1
+
+
+def test_wildcard_bulk_update_drops_the_cached_songs(cached_db):
+    cached_db.get_song_by_id("song0001")
+
+    assert cached_db.bulk_update_by_criteria("artist", "P_nk", "4", "1999-09-09") == 2
+
+    assert cached_db.get_song_by_id("song0001").release_date == "1999-09-09"
+
+
+@pytest.mark.parametrize("search_value", ["ime", "T_me", "%", "_", "a%b", "t.e", "(in", "\\", "100%"])
+@pytest.mark.parametrize("value", ["Time", "Tome", "ab", "Breathe (In the Air)", "t\\e", "100% Hits", ""])
+def test_like_regex_agrees_with_sqlite_like(search_value, value):
+    connection = sqlite3.connect(":memory:")
+    expected = connection.execute("SELECT LOWER(?) LIKE LOWER(?)",
+                                  (value, f"%{search_value}%")).fetchone()[0]
+    connection.close()
+
+    assert bool(like_regex(search_value).search(value)) == bool(expected)
@@ -0,0 +1,43 @@
+"""
+CPSC 408 Assignment 04 - Query Statistics Tests
+Full-scan detection in captured query plans.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import pytest
+
+from conftest import song_row
+from db_operations import DatabaseOperations
+from query_stats import FULL_SCAN, INDEX_SCAN
+
+
+@pytest.mark.parametrize("step, full_scan, index_scan", [
+    ("SCAN songs", True, False),
+    ("SCAN s", True, False),
+    ("SCAN songs USING INDEX idx_songs_missing", False, True),
+    ("SCAN songs USING COVERING INDEX idx_songs_name_id", False, True),
+    ("SCAN f VIRTUAL TABLE INDEX 2:D7", False, False),
+    ("SCAN CONSTANT ROW", False, False),
+    ("SEARCH songs USING INDEX sqlite_autoindex_songs_1 (songID=?)", False, False),
+])
+def test_plan_steps_are_classified(step, full_scan, index_scan):
+    assert bool(FULL_SCAN.match(step)) == full_scan
+    assert bool(INDEX_SCAN.match(step)) == index_scan
+
+
+def test_index_walks_are_not_reported_as_full_scans(tmp_path, write_csv):
+    db_ops = DatabaseOperations(str(tmp_path / "stats.db"), instrument=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", [song_row(number) for number in range(1, 21)]))
+
+    db_ops.count_songs_with_null_values()
+    list(db_ops.iter_songs(page_size=5))
+    db_ops.count_songs_by_criteria("genre", "rock")
+    report = db_ops.get_query_stats()
+    db_ops.close()
+
+    def methods(kind):
+        return {method for statement in report[kind] for method in statement["methods"]}
+    assert methods("full_scans") == {"count_songs_by_criteria"}
+    assert {"count_songs_with_null_values", "iter_songs"} <= methods("index_scans")
@@ -0,0 +1,76 @@
+"""
+CPSC 408 Assignment 04 - Replica Tests
+The in-memory replica follows writes made through it and by other
+connections, and reports the query stats of both of its connections.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import song_row
+from db_operations import parse_song_row
+from replica import InMemoryReplica
+
+
+@pytest.fixture
+def replica(tmp_path, write_csv):
+    path = str(tmp_path / "playlist.db")
+    db_ops = InMemoryReplica(path, instrument=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", [song_row(number) for number in range(1, 4)]))
+    db_ops.get_song_by_id("song0001")
+    yield db_ops
+    db_ops.close()
+
+
+def test_replayed_write_is_read_without_a_refresh(replica):
+    refreshes = replica.refreshes
+
+    assert replica.update_song_field("song0001", "1", "Renamed")
+
+    assert replica.get_song_by_id("song0001").song_name == "Renamed"
+    assert replica.refreshes == refreshes
+
+
+def test_commit_by_another_connection_is_read_from_the_copy(replica):
+    connection = sqlite3.connect(replica.writer.db_path)
+    connection.execute("UPDATE songs SET song_name = 'Outside' WHERE songID = 'song0002'")
+    connection.commit()
+    connection.close()
+
+    assert replica.get_song_by_id("song0002").song_name == "Outside"
+
+
+def test_write_after_another_connection_commits_recopies_the_file(replica):
+    connection = sqlite3.connect(replica.writer.db_path)
+    connection.execute("DELETE FROM songs WHERE songID = 'song0003'")
+    connection.commit()
+    connection.close()
+
+    replica.update_song_field("song0001", "1", "Renamed")
+
+    assert replica.get_song_by_id("song0001").song_name == "Renamed"
+    assert replica.get_song_by_id("song0003") is None
+
+
+def test_other_writer_methods_mark_the_copy_stale(replica):
+    replica.insert_song_batch([parse_song_row(song_row(9))])
+    replica.commit()
+
+    assert replica.song_exists("song0009")
+
+
+def test_query_stats_cover_reads_and_writes(replica):
+    replica.reset_query_stats()
+
+    replica.update_song_field("song0001", "1", "Renamed")
+    replica.search_songs_by_name("Song")
+
+    methods = replica.get_query_stats()["methods"]
+    assert methods["update_song_field"]["calls"] == 1
+    assert methods["search_songs_by_name"]["calls"] == 1
+    replica.reset_query_stats()
+    assert replica.get_query_stats()["methods"] == {}
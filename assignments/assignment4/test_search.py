@@ -0,0 +1,178 @@
+"""
+CPSC 408 Assignment 04 - Search Tests
+Name and criteria searches match substrings with or without the FTS5 index;
+fuzzy searches find one-letter typos in the same index.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import sqlite3
+
+import pytest
+
+import db_operations
+from app import PlaylistApp
+from conftest import song_row
+from db_operations import DEFAULT_FUZZY_THRESHOLD, DatabaseOperations, trigram_similarity
+
+SONGS = [
+    song_row(1, "Time", "Pink Floyd", "The Dark Side of the Moon"),
+    song_row(2, "Breathe (In the Air)", "Pink Floyd", "The Dark Side of the Moon"),
+    song_row(3, "Money", "Pink Floyd", "The Dark Side of the Moon"),
+    song_row(4, "Sometimes", "Depeche Mode", "Black Celebration"),
+    song_row(5, "Dark Side Story", "Someone", "Singles 100% Hits"),
+    song_row(6, "Timeless", "Artist_Name", "Album"),
+]
+
+
+@pytest.fixture(params=[False, True], ids=["like", "fts"])
+def search_db(request, tmp_path, write_csv):
+    db_ops = DatabaseOperations(str(tmp_path / "search.db"), full_text_search=request.param)
+    db_ops.bulk_load_songs(write_csv("songs.csv", SONGS))
+    assert db_ops.full_text_search == request.param
+    yield db_ops
+    db_ops.close()
+
+
+def names(songs):
+    return sorted(song.song_name for song in songs)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("ime", ["Sometimes", "Time", "Timeless"]),
+    ("TIME", ["Sometimes", "Time", "Timeless"]),
+    ("dark side", ["Dark Side Story"]),
+    ("e (in", ["Breathe (In the Air)"]),
+    ("on", ["Money"]),
+    ("zzz", []),
+])
+def test_name_search_matches_substrings(search_db, value, expected):
+    assert names(search_db.search_songs_by_name(value)) == expected
+
+
+@pytest.mark.parametrize("criteria, value", [
+    ("artist", "floyd"), ("artist", "ink"), ("artist", "t_n"), ("album", "side of"),
+    ("album", "100%"), ("genre", "ock"), ("genre", "jazz"),
+])
+def test_search_finds_the_songs_a_bulk_update_would_change(search_db, criteria, value):
+    found = search_db.search_songs_by_criteria(criteria, value)
+
+    assert len(found) == search_db.count_songs_by_criteria(criteria, value)
+    assert search_db.bulk_update_by_criteria(criteria, value, "4", "1999-09-09") == len(found)
+    assert all(search_db.get_song_by_id(song.songID).release_date == "1999-09-09"
+               for song in found)
+
+
+def test_fts_index_follows_updates_and_deletes(tmp_path, write_csv):
+    db_ops = DatabaseOperations(str(tmp_path / "search.db"), full_text_search=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", SONGS))
+
+    db_ops.update_song_field("song0003", "1", "Timely Money")
+    db_ops.delete_song("song0001")
+
+    assert names(db_ops.search_songs_by_name("ime")) == ["Sometimes", "Timeless", "Timely Money"]
+    db_ops.cursor.execute("INSERT INTO songs_fts(songs_fts) VALUES ('integrity-check')")
+    db_ops.close()
+
+
+def test_word_tokenized_index_is_rebuilt_as_trigram(tmp_path, write_csv):
+    path = str(tmp_path / "old.db")
+    db_ops = DatabaseOperations(path)
+    db_ops.bulk_load_songs(write_csv("songs.csv", SONGS))
+    db_ops.cursor.execute("""
+    CREATE VIRTUAL TABLE songs_fts USING fts5(
+        song_name, artist_name, album_name, genre, content='songs', content_rowid='rowid')
+    """)
+    db_ops.commit()
+    db_ops.close()
+
+    db_ops = DatabaseOperations(path, full_text_search=True)
+
+    assert names(db_ops.search_songs_by_name("ime")) == ["Sometimes", "Time", "Timeless"]
+    db_ops.close()
+
+
+@pytest.fixture
+def fuzzy_db(tmp_path, write_csv):
+    db_ops = DatabaseOperations(str(tmp_path / "fuzzy.db"), full_text_search=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", SONGS))
+    yield db_ops
+    db_ops.close()
+
+
+@pytest.mark.parametrize("value, criteria, expected", [
+    ("Brethe", "name", "Breathe (In the Air)"),
+    ("Mony", "name", "Money"),
+    ("Sometmes", "name", "Sometimes"),
+    ("Dark Sid", "album", "The Dark Side of the Moon"),
+    ("Pnk Floyd", "artist", "Pink Floyd"),
+    ("Depesh Mode", "artist", "Depeche Mode"),
+])
+def test_fuzzy_search_finds_one_letter_typos(fuzzy_db, value, criteria, expected):
+    position = {"name": 1, "artist": 2, "album": 3}[criteria]
+
+    matches = fuzzy_db.fuzzy_search_songs(value, criteria)
+
+    assert matches and matches[0][0][position] == expected
+
+
+@pytest.mark.parametrize("word", ["breathe", "money", "floyd", "celebration", "heart"])
+def test_default_threshold_accepts_every_one_letter_typo(word):
+    typos = ({word[:i] + word[i + 1:] for i in range(len(word))}
+             | {word[:i] + "x" + word[i + 1:] for i in range(len(word))}
+             | {word[:i] + "x" + word[i:] for i in range(len(word) + 1)})
+
+    assert min(trigram_similarity(typo, word) for typo in typos) >= DEFAULT_FUZZY_THRESHOLD
+
+
+@pytest.mark.parametrize("value, candidate", [
+    ("money", "breathe"), ("time", "floyd"), ("heart", "river"), ("dream", "celebration"),
+])
+def test_default_threshold_rejects_unrelated_words(value, candidate):
+    assert trigram_similarity(value, candidate) < DEFAULT_FUZZY_THRESHOLD
+
+
+def test_fuzzy_search_of_a_name_shared_by_many_songs(tmp_path, write_csv, monkeypatch):
+    # Every trigram of "Pink Floyd" is over the budget, so no candidate can
+    # be ranked; the search still finds the songs containing all of them
+    monkeypatch.setattr(db_operations, "FUZZY_PROBE_BUDGET", 5)
+    db_ops = DatabaseOperations(str(tmp_path / "fuzzy.db"), full_text_search=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", [
+        song_row(number, artist_name="Pink Floyd" if number % 2 else "Floyd Cramer")
+        for number in range(1, 41)]))
+
+    matches = db_ops.fuzzy_search_songs("Pnk Floyd", "artist")
+
+    assert len(matches) == 10
+    assert {song.artist_name for song, _ in matches} == {"Pink Floyd"}
+    db_ops.close()
+
+
+def test_opening_drops_the_old_trigram_index(tmp_path, write_csv):
+    path = str(tmp_path / "fuzzy.db")
+    db_ops = DatabaseOperations(path)
+    db_ops._create_fts_table("songs_trigram", ["song_name", "artist_name", "album_name"],
+                             "tokenize='trigram'")
+    db_ops.close()
+
+    db_ops = DatabaseOperations(path, full_text_search=True)
+    db_ops.bulk_load_songs(write_csv("songs.csv", SONGS))
+
+    db_ops.cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'songs_trigram%'")
+    assert db_ops.cursor.fetchall() == []
+    assert db_ops.fuzzy_search_songs("Brethe")[0][0].song_name == "Breathe (In the Air)"
+    db_ops.close()
+
+
+@pytest.mark.parametrize("replica", [False, True], ids=["file", "replica"])
+def test_app_builds_one_trigram_index(tmp_path, replica):
+    path = str(tmp_path / "playlist.db")
+    app = PlaylistApp(path, replica=replica)
+    app.db_ops.close()
+
+    connection = sqlite3.connect(path)
+    tables = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%trigram%'").fetchall()
+    connection.close()
+    assert tables == [("songs_fts",)]
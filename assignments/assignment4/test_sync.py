@@ -0,0 +1,89 @@
+"""
+CPSC 408 Assignment 04 - Sync Tests
+sync_songs() writes only new and changed songs and, for a full snapshot,
+deletes the songs missing from it.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import pytest
+
+from conftest import song_row
+from db_operations import DatabaseOperations, NormalizedDatabaseOperations
+
+CATALOG = [song_row(number) for number in range(1, 6)]
+
+
+@pytest.fixture(params=[DatabaseOperations, NormalizedDatabaseOperations],
+                ids=["flat", "normalized"])
+def sync_db(request, tmp_path):
+    db_ops = request.param(str(tmp_path / "sync.db"))
+    yield db_ops
+    db_ops.close()
+
+
+def counts(inserted=0, updated=0, unchanged=0, deleted=0):
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged, "deleted": deleted}
+
+
+def test_first_sync_inserts_and_second_changes_nothing(sync_db, write_csv):
+    path = write_csv("catalog.csv", CATALOG)
+
+    assert sync_db.sync_songs(path) == counts(inserted=5)
+    assert sync_db.sync_songs(path) == counts(unchanged=5)
+
+
+def test_sync_onto_a_loaded_catalog_writes_only_changed_songs(sync_db, write_csv):
+    sync_db.bulk_load_songs(write_csv("catalog.csv", CATALOG))
+    changed = CATALOG[:2] + [song_row(3, "Renamed")] + CATALOG[3:] + [song_row(6)]
+
+    assert sync_db.sync_songs(write_csv("update.csv", changed)) == counts(
+        inserted=1, updated=1, unchanged=4)
+    assert sync_db.get_song_by_id("song0003").song_name == "Renamed"
+
+
+def test_song_edited_since_the_last_sync_is_restored(sync_db, write_csv):
+    path = write_csv("catalog.csv", CATALOG)
+    sync_db.sync_songs(path)
+
+    sync_db.update_song_field("song0002", "1", "Edited")
+
+    assert sync_db.sync_songs(path) == counts(updated=1, unchanged=4)
+    assert sync_db.get_song_by_id("song0002").song_name == "Song 2"
+
+
+def test_later_row_for_the_same_song_wins(sync_db, write_csv):
+    path = write_csv("catalog.csv", [song_row(1, "First"), song_row(1, "Second")])
+
+    assert sync_db.sync_songs(path) == counts(inserted=1)
+    assert sync_db.get_song_by_id("song0001").song_name == "Second"
+
+
+def test_full_snapshot_deletes_missing_songs(sync_db, write_csv):
+    sync_db.sync_songs(write_csv("catalog.csv", CATALOG))
+
+    result = sync_db.sync_songs(write_csv("snapshot.csv", CATALOG[:3]), full_snapshot=True)
+
+    assert result == counts(unchanged=3, deleted=2)
+    assert not sync_db.song_exists("song0004")
+
+
+def test_snapshot_without_valid_songs_deletes_nothing(sync_db, write_csv):
+    sync_db.sync_songs(write_csv("catalog.csv", CATALOG))
+
+    result = sync_db.sync_songs(write_csv("snapshot.csv", [["bad", "row"]]), full_snapshot=True)
+
+    assert result == counts()
+    assert sync_db.song_exists("song0001")
+
+
+def test_malformed_snapshot_row_keeps_its_song(sync_db, write_csv):
+    sync_db.sync_songs(write_csv("catalog.csv", CATALOG))
+    snapshot = CATALOG[:2] + [song_row(3, energy="n/a")] + CATALOG[3:4]
+
+    result = sync_db.sync_songs(write_csv("snapshot.csv", snapshot), full_snapshot=True)
+
+    assert result == counts(unchanged=3, deleted=1)
+    assert sync_db.get_song_by_id("song0003").energy == 0.5
+    assert not sync_db.song_exists("song0005")
@@ -0,0 +1,140 @@
+"""
+CPSC 408 Assignment 04 - Transaction Tests
+Checkpointed imports and batch transactions keep or undo writes as a unit.
+
+Author: [Your Name]
+Date: [Current Date]
+"""
+
+import io
+import tempfile
+
+import pytest
+
+from batch import BatchRunner
+from conftest import song_row
+from db_operations import BatchAborted
+from parallel_ingest import attached_databases
+
+
+def reject_song(db_ops, song_id: str):
+    """Make inserts of one song ID fail, as a constraint violation would."""
+    db_ops.cursor.execute(f"""
+    CREATE TRIGGER reject_song BEFORE INSERT ON songs WHEN new.songID = '{song_id}'
+    BEGIN SELECT RAISE(ABORT, 'rejected by test'); END
+    """)
+    db_ops.commit()
+
+
+def count_songs(db_ops) -> int:
+    db_ops.cursor.execute("SELECT COUNT(*) FROM songs")
+    return db_ops.cursor.fetchone()[0]
+
+
+def test_import_rejects_failing_row_and_keeps_the_rest(db, write_csv, tmp_path):
+    reject_song(db, "song0003")
+    path = write_csv("import.csv", [song_row(number) for number in range(1, 6)])
+
+    counts = db.import_songs(path, reject_path=str(tmp_path / "rejects.csv"), chunk_size=10)
+
+    assert counts["loaded"] == 4
+    assert counts["rejected"] == 1
+    assert count_songs(db) == 4
+    assert db.get_import_progress(path)["completed"]
+    assert "song0003" in (tmp_path / "rejects.csv").read_text()
+
+
+def test_import_inside_batch_transaction_keeps_earlier_commands(db, write_csv, tmp_path):
+    reject_song(db, "song0103")
+    loaded = write_csv("load.csv", [song_row(number) for number in range(1, 11)])
+    imported = write_csv("import.csv", [song_row(number) for number in range(101, 106)])
+    output = io.StringIO()
+
+    failed = BatchRunner(db, output).run(
+        [f"load {loaded}", f"import {imported} --reject-file {tmp_path / 'rejects.csv'}"],
+        transaction=True)
+
+    assert failed == 0
+    assert '"committed": 2' in output.getvalue()
+    assert count_songs(db) == 14
+    assert db.get_import_progress(imported)["rows_rejected"] == 1
+
+
+def song_directory(tmp_path, write_csv, name: str, numbers) -> str:
+    """Write one CSV file per song into a new directory."""
+    (tmp_path / name).mkdir()
+    for number in numbers:
+        write_csv(f"{name}/{number}.csv", [song_row(number)])
+    return str(tmp_path / name)
+
+
+def test_directory_loads_in_one_batch_detach_after_commit(db, write_csv, tmp_path, monkeypatch):
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(staging))
+    first = song_directory(tmp_path, write_csv, "first", range(1, 4))
+    second = song_directory(tmp_path, write_csv, "second", range(3, 7))
+    output = io.StringIO()
+
+    failed = BatchRunner(db, output).run(
+        ["playlist create mix", f"load {first}", f"load {second}"], transaction=True)
+
+    assert failed == 0
+    assert count_songs(db) == 6
+    assert attached_databases(db) == []
+    assert list(staging.iterdir()) == []
+
+
+def test_failed_batch_still_detaches_its_directory_loads(db, write_csv, tmp_path):
+    first = song_directory(tmp_path, write_csv, "first", range(1, 4))
+    output = io.StringIO()
+
+    failed = BatchRunner(db, output).run(
+        [f"load {first}", "playlist create mix", "playlist create mix"], transaction=True)
+
+    assert failed == 1
+    assert count_songs(db) == 0
+    assert attached_databases(db) == []
+
+
+def test_failed_command_rolls_back_the_whole_batch(db, write_csv):
+    songs = write_csv("songs.csv", [song_row(1), song_row(2, tempo="")])
+    db.cursor.execute("""
+    CREATE TRIGGER block_deletes BEFORE DELETE ON songs
+    BEGIN SELECT RAISE(ABORT, 'deletes blocked by test'); END
+    """)
+    db.commit()
+    output = io.StringIO()
+
+    # delete_songs_with_null_values() catches the failed delete and returns 0
+    failed = BatchRunner(db, output).run(
+        [f"load {songs}", "purge-nulls", "playlist create mix"], transaction=True)
+
+    assert failed == 1
+    assert '"command": "transaction", "ok": false' in output.getvalue()
+    assert count_songs(db) == 0
+    assert db.get_playlists() == []
+    assert not db.in_batch
+
+
+def test_swallowed_write_failure_still_aborts_the_batch(db):
+    with pytest.raises(BatchAborted):
+        with db.batch_transaction():
+            db.create_playlist("first")
+            try:
+                # Duplicate name: create_playlist() catches the error and rolls back
+                db.create_playlist("first")
+            except BatchAborted:
+                pass
+            db.create_playlist("second")
+
+    assert not db.in_batch
+    assert db.get_playlists() == []
+
+
+def test_rollback_outside_a_batch_is_unchanged(db, write_csv):
+    db.bulk_load_songs(write_csv("load.csv", [song_row(1)]))
+
+    assert db.create_playlist("mix") is not None
+    assert db.create_playlist("mix") is None
+    assert db.song_exists("song0001")